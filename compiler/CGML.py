@@ -6,6 +6,15 @@ from copy import deepcopy
 from string import Template
 
 from compiler.platform_manager import PlatformManager
+from compiler.state_machine_cache import (
+    StateMachineCache,
+    get_state_machine_key
+)
+from compiler.codegen_tables import (
+    ComponentTable,
+    PlatformTable,
+    get_platform_table
+)
 from compiler.types.ide_types import Bounds
 from compiler.types.inner_types import (
     InnerComponent,
@@ -15,10 +24,8 @@ from compiler.types.inner_types import (
 )
 from compiler.types.platform_types import (
     ClassParameter,
-    Component,
     Platform,
-    SetupFunction,
-    Signal
+    SetupFunction
 )
 from cyberiadaml_py.cyberiadaml_parser import CGMLParser
 from cyberiadaml_py.types.elements import (
@@ -50,14 +57,6 @@ _StateId = str
 _VertexId = str
 _ComponentId = str
 _INCLUDE_TEMPLATE = Template('#include "$component_type"')
-_CALL_FUNCTION_TEMPLATE = Template('$id$delimeter$method($args);')
-_CHECK_SIGNAL_TEMPLATE = Template(
-    """
-if($condition) {
-    SIMPLE_DISPATCH(the_STATE_MACHINE_NAME, $signal);
-}
-"""
-)
 STATE_MACHINE_ID = str
 ERROR = str
 
@@ -84,22 +83,56 @@ class CGMLException(Exception):
         return f'CGMLException({repr(self.error_data)})'
 
 
-def __parse_trigger(trigger: str, regexes: List[str]) -> InnerTrigger:
-    """Get condition and trigger by regexes."""
+# Ветви проверяются по порядку, срабатывает первая подошедшая:
+# trigger postfix, trigger[condition], [condition], trigger
+_TRIGGER_REGEX = re.compile(
+    r'^(?:'
+    r'(?P<postfix_trigger>[^\[\]]+) (?P<postfix>.+)'
+    r'|(?P<condition_trigger>[^\[\]]+)\[(?P<trigger_condition>.+)\]'
+    r'|\[(?P<condition>.+)\]'
+    r'|(?P<trigger>[^\[\]]+)'
+    r')$'
+)
+
+
+class _InnerTriggerException(_InnerCGMLException):
+    """Trigger string doesn't match trigger grammar."""
+
+    def __init__(self, trigger: str, reason: str):
+        super().__init__(f'Триггер({trigger}) не соответствует '
+                         f'грамматике триггеров: {reason}.')
+        self.trigger = trigger
+        self.reason = reason
+
+
+def __get_trigger_error_reason(trigger: str) -> str:
+    """Find out, why trigger doesn't match _TRIGGER_REGEX."""
+    opening = trigger.find('[')
+    closing = trigger.rfind(']')
+    if opening == -1 or closing < opening:
+        return 'незакрытые квадратные скобки'
+    if opening + 1 == closing:
+        return 'пустое условие'
+    return 'лишние символы после условия'
+
+
+def __parse_trigger(trigger: str) -> InnerTrigger:
+    """Get trigger, condition and postfix from trigger[condition] postfix\
+        string."""
     if trigger is None or trigger == '':
         raise _InnerCGMLException('Отсутствует триггер.')
-    for regex in regexes:
-        regex_match = re.match(regex, trigger)
-        if regex_match is None:
-            continue
-        regex_dict = regex_match.groupdict()
-        condition = regex_dict.get('condition', None)
-        parsed_trigger = regex_dict.get('trigger', None)
-        postfix = regex_dict.get('postfix', None)
-        return InnerTrigger(parsed_trigger, condition, postfix)
-    raise _InnerCGMLException(
-        f'Триггер({trigger}) не соответствует'
-        'ни одному регулярному выражению для парсинга триггеров.')
+    regex_match = _TRIGGER_REGEX.match(trigger)
+    if regex_match is None:
+        raise _InnerTriggerException(trigger,
+                                     __get_trigger_error_reason(trigger))
+    groups = regex_match.groupdict()
+    if groups['postfix'] is not None:
+        return InnerTrigger(groups['postfix_trigger'], None, groups['postfix'])
+    if groups['trigger_condition'] is not None:
+        return InnerTrigger(groups['condition_trigger'],
+                            groups['trigger_condition'],
+                            None)
+    return InnerTrigger(groups['trigger'], groups['condition'], None)
 
 
 def __parse_actions(actions: str) -> List[InnerEvent]:
@@ -110,28 +143,11 @@ def __parse_actions(actions: str) -> List[InnerEvent]:
     events: List[InnerEvent] = []
     raw_events = actions.split('\n\n')
     for raw_event in raw_events:
-        parsed_event = re.search(
-            r'^(?P<event>[^\/]+)\/(?P<actions>.*)$', raw_event, flags=re.S)
-        if parsed_event is None:
-            continue
-        parsed_dict = parsed_event.groupdict()
-        raw_trigger: str | None = parsed_dict.get('event')
-        do: str | None = parsed_dict.get('actions')
-        if (do is None or raw_trigger is None):
+        # Событие - все до первого '/', действия - все после него
+        raw_trigger, separator, do = raw_event.partition('/')
+        if separator == '' or raw_trigger == '':
             continue
-        inner_trigger = __parse_trigger(
-            raw_trigger,
-            [
-                (
-                    r'^(?P<trigger>[^\[\]]+)\[(?P<condition>.+)\]$'
-                    r'(?P<postfix>w+)$'
-                ),
-                r'^(?P<trigger>[^\[\]]+) (?P<postfix>.+)$',
-                r'^(?P<trigger>[^\[\]]+)\[(?P<condition>.+)\]$',
-                r'^\[(?P<condition>.+)\]$',
-                r'^(?P<trigger>[^\[\]]+)$'
-            ]
-        )
+        inner_trigger = __parse_trigger(raw_trigger)
         check_function: str | None = None
         if inner_trigger.trigger is not None and '.' in inner_trigger.trigger:
             check_function = inner_trigger.trigger
@@ -343,7 +359,8 @@ def __parse_components(
 
 def __generate_create_components_code(
         components: Dict[_ComponentId, InnerComponent],
-        platform: Platform) -> List[ParserNote]:
+        platform: Platform,
+        table: PlatformTable) -> List[ParserNote]:
     """
     Generate code, that create component's variables in h-file.
 
@@ -357,10 +374,9 @@ def __generate_create_components_code(
     for component_id in components:
         component: InnerComponent = components[component_id]
         type: str = component.type
-        platform_component = platform.components[type]
-
-        if platform_component.singletone:
+        if table.components[type].singletone:
             continue
+        platform_component = platform.components[type]
 
         construct_parameters = platform_component.constructorParameters
         args: str = __create_parameters_sequence(
@@ -399,60 +415,45 @@ def __create_parameters_sequence(
 
 
 def __generate_function_call(
-        platform: Platform,
+        table: PlatformTable,
         component_type: str,
         component_id: str,
         method: str,
         args: str) -> str:
     """
-    Generate function call code using _CALL_FUNCTION_TEMPLATE.
+    Generate function call code.
 
-    Check component's static and platform's static.
+    Delimeter depends on component's static and platform's static.
     """
-    delimeter = '.'
-    if (platform.static_components or
-            platform.components[component_type].singletone):
-        delimeter = '::'
-    return _CALL_FUNCTION_TEMPLATE.substitute(
-        {
-            'id': component_id,
-            'method': method,
-            'args': args,
-            'delimeter': delimeter
-        }
-    )
+    delimeter = table.components[component_type].delimeter
+    return f'{component_id}{delimeter}{method}({args});'
 
 
 def __generate_signal_checker(
-        platform: Platform,
+        table: PlatformTable,
         component_type: str,
         component_id: str,
         method: str,
         signal_name: str
 ) -> str:
-    """Generate code part for checking and emitting signals using\
-        _CHECK_SIGNAL_TEMPLATE."""
-    platform_component: Component | None = platform.components.get(
+    """Generate code part for checking and emitting signals."""
+    component_table: ComponentTable | None = table.components.get(
         component_type)
-    if platform_component is None:
+    if component_table is None:
         raise _InnerCGMLException(
             f'В платформе отсутствует компонент типа {component_type}.')
-    signal: Signal | None = platform_component.signals.get(method)
-    if signal is None:
+    check_call: str | None = component_table.signal_checks.get(method)
+    if check_call is None:
         raise _InnerCGMLException(
             f'Для компонента {component_id} типа {component_type} '
             f'отсутствует сигнал {component_type}.')
-    call_method = signal.checkMethod
-    condition = __generate_function_call(
-        platform, component_type, component_id, call_method, '')
-    return _CHECK_SIGNAL_TEMPLATE.substitute({
-        'signal': signal_name,
-        'condition': condition.rstrip(';')
-    })
+    return (f'\nif({component_id}{check_call}) {{\n'
+            f'    SIMPLE_DISPATCH(the_STATE_MACHINE_NAME, {signal_name});\n'
+            '}\n')
 
 
 def __generate_loop_signal_checks_code(
-    platform: Platform,
+    table: PlatformTable,
     triggers: List[ParserTrigger],
     components: Dict[_ComponentId, InnerComponent]
 ) -> List[ParserNote]:
@@ -480,14 +481,14 @@ def __generate_loop_signal_checks_code(
         component_id, method = condition.split('.')
         type = components[component_id].type
         code_to_insert = __generate_signal_checker(
-            platform, type, component_id, method, trigger.name)
+            table, type, component_id, method, trigger.name)
         notes.append(create_note(Labels.LOOP, code_to_insert))
         checked_signals.add(trigger.name)
     return notes
 
 
 def __generate_loop_tick_actions_code(
-    platform: Platform,
+    table: PlatformTable,
     components: Dict[_ComponentId, InnerComponent]
 ) -> List[ParserNote]:
     """
@@ -500,12 +501,9 @@ def __generate_loop_tick_actions_code(
     """
     notes: List[ParserNote] = []
     for component_id, component in components.items():
-        platform_component: Component = platform.components[component.type]
-        loop_actions: List[str] = platform_component.loopActions
-        for method in loop_actions:
-            code_to_insert = __generate_function_call(
-                platform, component.type, component_id, method, '')
-            notes.append(create_note(Labels.LOOP, code_to_insert))
+        for loop_action in table.components[component.type].loop_actions:
+            notes.append(create_note(Labels.LOOP,
+                                     component_id + loop_action))
     return notes
 
 
@@ -522,7 +520,8 @@ def __generate_default_setup_function(
 
 def __generate_setup_function_code(
         components: Dict[_ComponentId, InnerComponent],
-        platform: Platform) -> List[ParserNote]:
+        platform: Platform,
+        table: PlatformTable) -> List[ParserNote]:
     """
     Generate code for initialization components in setup function.
 
@@ -554,18 +553,18 @@ def __generate_setup_function_code(
                 component.parameters,
                 init_parameters)
         code_to_insert = __generate_function_call(
-            platform, type, component_id, init_func, args)
+            table, type, component_id, init_func, args)
         notes.append(create_note(Labels.SETUP, code_to_insert))
     return notes
 
 
-def __get_include_libraries(platform: Platform,
+def __get_include_libraries(table: PlatformTable,
                             components: List[InnerComponent]) -> List[str]:
     """Get set of source files, that must be included."""
-    included_libraries: List[str] = deepcopy(platform.default_include_files)
+    included_libraries: List[str] = list(table.default_include_files)
     for component in components:
         included_libraries.extend(
-            platform.components[component.type].importFiles)
+            table.components[component.type].import_files)
     return included_libraries
 
 
@@ -580,14 +579,14 @@ def __generate_includes_libraries_code(
 
 
 def __get_build_files(
-    platform: Platform,
+    table: PlatformTable,
     components: List[InnerComponent]
 ) -> Set[str]:
     """Get set of files, that must be included for compiling."""
-    build_libraries: Set[str] = deepcopy(platform.default_build_files)
+    build_libraries: Set[str] = set(table.default_build_files)
     for component in components:
         build_libraries.update(
-            platform.components[component.type].buildFiles)
+            table.components[component.type].build_files)
     return build_libraries
 
 
@@ -756,6 +755,15 @@ async def parse(xml: str) -> tuple[Dict[StateMachineId, ERROR],
                 continue
                 # raise CGMLException(
                 # f'Platform {platform.name} not supporting compiling!')
+            # Неизменившиеся машины состояний не разбираются повторно
+            cache_key = get_state_machine_key(sm_id,
+                                              platform_version,
+                                              state_machine)
+            cached_state_machine = StateMachineCache.get(cache_key,
+                                                         platform)
+            if cached_state_machine is not None:
+                state_machines[sm_id] = cached_state_machine
+                continue
             sm_name: str | None = state_machine.name
             if check_sm_id(sm_id):
                 raise _InnerCGMLException(
@@ -822,18 +830,22 @@ async def parse(xml: str) -> tuple[Dict[StateMachineId, ERROR],
             states_with_initials = _add_initials_to_states(
                 initial_with_transition, states_with_parents)
             parsed_components = __parse_components(state_machine.components)
+            table = get_platform_table(platform)
             included_libraries: List[str] = __get_include_libraries(
-                platform, list(parsed_components.values()))
+                table, list(parsed_components.values()))
             build_files = __get_build_files(
-                platform, list(parsed_components.values()))
+                table, list(parsed_components.values()))
             notes: List[ParserNote] = [
                 *__generate_create_components_code(parsed_components,
-                                                   platform),
-                *__generate_setup_function_code(parsed_components, platform),
+                                                   platform,
+                                                   table),
+                *__generate_setup_function_code(parsed_components,
+                                                platform,
+                                                table),
                 *__generate_includes_libraries_code(included_libraries),
-                * __generate_loop_tick_actions_code(platform,
+                * __generate_loop_tick_actions_code(table,
                                                     parsed_components),
-                *__generate_loop_signal_checks_code(platform,
+                *__generate_loop_signal_checks_code(table,
                                                     all_triggers,
                                                     parsed_components)
             ]
@@ -846,7 +858,8 @@ async def parse(xml: str) -> tuple[Dict[StateMachineId, ERROR],
                 build_files,
                 platform.id,
                 platform_version,
-                platform.compiling_settings
+                platform.compiling_settings,
+                platform.artifacts
             )
             state_machines[sm_id] = StateMachine(
                 start_node=start_node,
@@ -864,6 +877,7 @@ async def parse(xml: str) -> tuple[Dict[StateMachineId, ERROR],
                 language=platform.language,
                 header_file_extension=platform.header_file_extension
             )
+            StateMachineCache.put(cache_key, platform, state_machines[sm_id])
         except _InnerCGMLException as e:
             errors[sm_id] = (
                 'Во время парсинга схемы '
@@ -1,9 +1,20 @@
 """Module implements communication with compilers."""
 import asyncio.subprocess
+import contextlib
 import os
 import asyncio
 from asyncio.subprocess import Process
-from typing import Dict, List, Set, TypedDict, AsyncGenerator
+from typing import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Set,
+    TypedDict
+)
 
 from aiopath import AsyncPath
 from aiofile import async_open
@@ -13,7 +24,32 @@ from compiler.types.platform_types import CompilingSettings
 from compiler.config import get_config
 from compiler.types.inner_types import CommandResult, BuildFile, File
 from compiler.utils import get_file_extension, get_filename
-from compiler.os_commands import os_commands
+from compiler.library_staging import stage_files
+from compiler.arduino_daemon import ArduinoDaemonPool
+
+
+OutputStream = Literal['stdout', 'stderr']
+# Аргументы: команда, поток вывода, строка
+OutputCallback = Callable[[str, OutputStream, str], Awaitable[None]]
+# Максимальная длина строки вывода компилятора
+_STREAM_LIMIT = 1024 * 1024
+
+
+async def _read_lines(stream: Optional[asyncio.StreamReader],
+                      command: str,
+                      stream_name: OutputStream,
+                      on_output: OutputCallback) -> bytes:
+    """Read stream line by line, call on_output for every line\
+        and return full output."""
+    if stream is None:
+        return b''
+    output: List[bytes] = []
+    async for line in stream:
+        output.append(line)
+        await on_output(command,
+                        stream_name,
+                        line.decode('utf-8', errors='replace').rstrip('\n'))
+    return b''.join(output)
 
 
 async def get_build_files(
@@ -125,30 +161,63 @@ class Compiler:
     @staticmethod
     async def compile_project(
         base_dir: str,
-        commands: List[CompilingSettings]
+        commands: List[CompilingSettings],
+        on_output: Optional[OutputCallback] = None
     ) -> List[CommandResult]:
-        """Compile project in base_dir by compiler with flags."""
+        """
+        Compile project in base_dir by compiler with flags.
+
+        If on_output is passed, it's called for every line of stdout\
+            and stderr, while command is running.
+        arduino-cli commands are sent to warm daemons, if daemon\
+            backend is enabled.
+        """
         command_results: List[CommandResult] = []
-        # FIXME: грязный хак, чтобы устранить проблему с пропадающим файлом
-        await asyncio.sleep(0.1)
         for command in commands:
+            if (command.command == 'arduino-cli' and
+                    ArduinoDaemonPool.available()):
+                daemon_result = await ArduinoDaemonPool.compile(
+                    base_dir, command.flags)
+                if daemon_result is not None:
+                    command_results.append(daemon_result)
+                    continue
+            command_line = command.command + ' ' + ' '.join(command.flags)
             process: Process = await asyncio.create_subprocess_exec(
                 command.command,
                 *command.flags,
                 cwd=base_dir,
                 text=False,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.PIPE,
+                limit=_STREAM_LIMIT
             )
-            await process.wait()
-            stdout, stderr = await process.communicate()
+            if on_output is None:
+                stdout, stderr = await process.communicate()
+            else:
+                try:
+                    stdout, stderr = await asyncio.gather(
+                        _read_lines(process.stdout, command_line,
+                                    'stdout', on_output),
+                        _read_lines(process.stderr, command_line,
+                                    'stderr', on_output)
+                    )
+                except BaseException:
+                    # Клиент отключился или запрос отменен:
+                    # процесс больше никто не читает, поэтому он завершается,
+                    # чтобы не зависнуть на заполненном канале
+                    if process.returncode is None:
+                        with contextlib.suppress(ProcessLookupError):
+                            process.kill()
+                    await process.wait()
+                    raise
+                await process.wait()
             if process.returncode is None:
                 raise CompilerException('Process doesnt return code.')
             command_results.append(CommandResult(
-                command=command.command + ' ' + ' '.join(command.flags),
+                command=command_line,
                 return_code=process.returncode,
-                stdout=str(stdout.decode('utf-8')),
-                stderr=str(stderr.decode('utf-8'))))
+                stdout=stdout.decode('utf-8', errors='replace'),
+                stderr=stderr.decode('utf-8', errors='replace')))
         return command_results
 
     @staticmethod
@@ -184,7 +253,6 @@ class Compiler:
                     stderr=asyncio.subprocess.PIPE)
             case _:
                 raise CompilerException('Not supported compiler')
-        await process.wait()
         stdout, stderr = await process.communicate()
 
         if process.returncode is None:
@@ -201,14 +269,19 @@ class Compiler:
                                    libraries: Set[str],
                                    target_directory: str
                                    ) -> None:
-        """Include source files from platform's \
-            library directory to target directory."""
+        """
+        Include source files from platform's \
+            library directory to target directory.
+
+        Files are linked, not copied, if filesystem allows it.
+        """
         path = get_source_path(platform_id, platform_version)
         path_to_libs = set([os.path.join(path, library)
                            for library in libraries])
 
-        await os_commands.copy(path_to_libs, target_directory,
-                               get_config().build_directory)
+        await stage_files(path_to_libs,
+                          os.path.join(get_config().build_directory,
+                                       target_directory))
 
     @staticmethod
     async def include_library_files(
@@ -225,6 +298,6 @@ class Compiler:
                 extension]
         ) for library in libraries}
 
-        await os_commands.copy(paths_to_libs,
-                               target_directory,
-                               get_config().build_directory)
+        await stage_files(paths_to_libs,
+                          os.path.join(get_config().build_directory,
+                                       target_directory))
@@ -10,7 +10,9 @@ class Timer:
     Реализация таймера.
 
     Принимает на вход время таймаута, асинхронную функцию и ее аргументы.
-    Заготовлена для использования в PlatformManager.
+    Используется в PlatformManager для выгрузки платформ.
+    Пока время не истекло, задача не создается, поэтому перезапуск\
+        таймера только переносит срабатывание.
     """
 
     def __init__(self, timeout: int | float,
@@ -19,20 +21,26 @@ class Timer:
         self._timeout: int | float = timeout
         self._callback: FunctionType = callback
         self._args: tuple[Any] = args
+        self._handle: asyncio.TimerHandle | None = None
+        # Задача вызова callback, ссылка хранится до его завершения
+        self._task: asyncio.Task | None = None
 
-    async def _work(self) -> None:
-        await asyncio.sleep(self._timeout)
-        await self._callback(*self._args)
+    def _fire(self) -> None:
+        self._handle = None
+        self._task = asyncio.create_task(self._callback(*self._args))
 
     def start(self) -> None:
-        """Start task."""
-        self._task = asyncio.create_task(self._work())
+        """Start timer."""
+        self._handle = asyncio.get_running_loop().call_later(self._timeout,
+                                                             self._fire)
 
     def cancel(self) -> None:
-        """Cancel task."""
-        self._task.cancel()
+        """Cancel timer, if callback isn't called yet."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
 
     def restart(self) -> None:
-        """Restart task."""
+        """Restart timer."""
         self.cancel()
         self.start()
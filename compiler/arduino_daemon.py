@@ -0,0 +1,230 @@
+"""
+Module implements compiling through warm arduino-cli daemons.
+
+Backend is optional: it requires grpcio and python stubs,\
+    generated from arduino-cli rpc/*.proto files (package cc.arduino.cli).
+If they aren't installed, compile_project runs arduino-cli processes.
+"""
+import asyncio
+import os
+import socket
+from typing import Any, List, Optional
+
+from compiler.config import get_config
+from compiler.logger import Logger
+from compiler.types.inner_types import CommandResult
+
+try:
+    # Необязательные зависимости: grpcio и модули, сгенерированные
+    # из proto-файлов arduino-cli
+    import grpc  # pyright: ignore[reportMissingModuleSource]
+    from cc.arduino.cli.commands.v1 import (  # pyright: ignore
+        commands_pb2,
+        commands_pb2_grpc,
+        compile_pb2
+    )
+except ImportError:
+    grpc = None
+    commands_pb2 = None
+    commands_pb2_grpc = None
+    compile_pb2 = None
+
+_START_TIMEOUT = 30
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def parse_compile_flags(flags: List[str]) -> tuple[str, bool] | None:
+    """
+    Get fqbn and export flag from 'arduino-cli compile' flags.
+
+    Return None, if flags contain something, that daemon backend\
+        doesn't support, in this case process backend must be used.
+    """
+    if not flags or flags[0] != 'compile':
+        return None
+    fqbn: str | None = None
+    export_binaries = False
+    i = 1
+    while i < len(flags):
+        match flags[i]:
+            case '-b' | '--fqbn':
+                if i + 1 >= len(flags):
+                    return None
+                fqbn = flags[i + 1]
+                i += 2
+                continue
+            case '-e' | '--export-binaries':
+                export_binaries = True
+            case _:
+                return None
+        i += 1
+    if fqbn is None:
+        return None
+    return fqbn, export_binaries
+
+
+def export_directory(base_dir: str, fqbn: str) -> str:
+    """
+    Get directory, where 'arduino-cli compile --export-binaries'\
+        puts binaries: build/<fqbn with dots>/ of sketch.
+
+    Daemon exports to the same directory, so artifacts don't depend\
+        on backend.
+    """
+    return os.path.join(os.path.abspath(base_dir), 'build',
+                        fqbn.replace(':', '.'))
+
+
+class _ArduinoDaemon:
+    """One arduino-cli daemon process with initialized instance."""
+
+    def __init__(self) -> None:
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.channel: Any = None
+        self.stub: Any = None
+        self.instance: Any = None
+
+    async def start(self) -> None:
+        # Демоны создаются, только если ArduinoDaemonPool.available()
+        assert (grpc is not None and commands_pb2 is not None and
+                commands_pb2_grpc is not None)
+        port = _free_port()
+        self.process = await asyncio.create_subprocess_exec(
+            'arduino-cli', 'daemon', '--port', str(port),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL)
+        self.channel = grpc.aio.insecure_channel(f'127.0.0.1:{port}')
+        await asyncio.wait_for(self.channel.channel_ready(), _START_TIMEOUT)
+        self.stub = commands_pb2_grpc.ArduinoCoreServiceStub(self.channel)
+        response = await self.stub.Create(commands_pb2.CreateRequest())
+        self.instance = response.instance
+        # Загрузка ядер и индексов происходит один раз при старте
+        async for _ in self.stub.Init(
+                commands_pb2.InitRequest(instance=self.instance)):
+            ...
+
+    async def compile(self,
+                      base_dir: str,
+                      fqbn: str,
+                      export_binaries: bool) -> tuple[int, str, str]:
+        assert grpc is not None and compile_pb2 is not None
+        request = compile_pb2.CompileRequest(
+            instance=self.instance,
+            fqbn=fqbn,
+            sketch_path=os.path.abspath(base_dir))
+        if export_binaries:
+            request.export_dir = export_directory(base_dir, fqbn)
+        stdout: List[bytes] = []
+        stderr: List[bytes] = []
+        return_code = 0
+        try:
+            async for response in self.stub.Compile(request):
+                stdout.append(response.out_stream)
+                stderr.append(response.err_stream)
+        except grpc.aio.AioRpcError as e:
+            return_code = 1
+            stderr.append(str(e.details()).encode('utf-8'))
+        return (return_code,
+                b''.join(stdout).decode('utf-8', errors='replace'),
+                b''.join(stderr).decode('utf-8', errors='replace'))
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def close(self) -> None:
+        if self.channel is not None:
+            await self.channel.close()
+        if self.alive:
+            assert self.process is not None
+            self.process.terminate()
+            await self.process.wait()
+
+
+class ArduinoDaemonPool:
+    """
+    Pool of warm arduino-cli daemons.
+
+    Pool size is set by ARDUINO_CLI_DAEMONS, 0 disables the backend.
+    Daemons are started on first compilation.
+    """
+
+    _idle: Optional[asyncio.Queue[_ArduinoDaemon]] = None
+    _daemons: List[_ArduinoDaemon] = []
+    _start_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def available() -> bool:
+        """Is daemon backend enabled and installed."""
+        return (grpc is not None and compile_pb2 is not None and
+                get_config().arduino_cli_daemons > 0)
+
+    @classmethod
+    async def _start(cls) -> asyncio.Queue[_ArduinoDaemon]:
+        if cls._start_lock is None:
+            cls._start_lock = asyncio.Lock()
+        async with cls._start_lock:
+            if cls._idle is not None:
+                return cls._idle
+            idle: asyncio.Queue[_ArduinoDaemon] = asyncio.Queue()
+            for _ in range(get_config().arduino_cli_daemons):
+                daemon = _ArduinoDaemon()
+                cls._daemons.append(daemon)
+                await daemon.start()
+                idle.put_nowait(daemon)
+            cls._idle = idle
+            return idle
+
+    @classmethod
+    async def compile(cls,
+                      base_dir: str,
+                      flags: List[str]) -> CommandResult | None:
+        """
+        Compile sketch in base_dir by one of daemons.
+
+        Return None, if daemon can't be used for these flags or\
+            daemon doesn't work, then caller must run arduino-cli process.
+        """
+        parsed_flags = parse_compile_flags(flags)
+        if parsed_flags is None:
+            return None
+        fqbn, export_binaries = parsed_flags
+        try:
+            idle = await cls._start()
+        except Exception:
+            await Logger.logException()
+            await cls.close()
+            return None
+        daemon = await idle.get()
+        try:
+            if not daemon.alive:
+                await daemon.close()
+                cls._daemons.remove(daemon)
+                daemon = _ArduinoDaemon()
+                cls._daemons.append(daemon)
+                await daemon.start()
+            return_code, stdout, stderr = await daemon.compile(
+                base_dir, fqbn, export_binaries)
+        except Exception:
+            await Logger.logException()
+            return None
+        finally:
+            idle.put_nowait(daemon)
+        return CommandResult(
+            command='arduino-cli ' + ' '.join(flags),
+            return_code=return_code,
+            stdout=stdout,
+            stderr=stderr)
+
+    @classmethod
+    async def close(cls) -> None:
+        """Stop all daemons."""
+        for daemon in cls._daemons:
+            await daemon.close()
+        cls._daemons = []
+        cls._idle = None
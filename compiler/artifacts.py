@@ -0,0 +1,164 @@
+"""Module implements reading and sending build artifacts."""
+import asyncio
+import base64
+import gzip
+from fnmatch import fnmatch
+from typing import Any, List, Protocol
+
+from aiohttp import web
+from aiofile import async_open
+from aiopath import AsyncPath
+from compiler.config import get_config
+from compiler.types.inner_types import (
+    ArtifactCompression,
+    ArtifactInfo,
+    File
+)
+
+try:
+    # Необязательная зависимость, устанавливается с extra zstd
+    import zstandard  # pyright: ignore[reportMissingImports]
+except ImportError:
+    zstandard = None
+
+# Параметр запроса, включающий передачу артефактов бинарными кадрами
+BINARY_ARTIFACTS_QUERY = 'binary_artifacts'
+# Параметр запроса со списком шаблонов нужных клиенту файлов через запятую
+ARTIFACTS_QUERY = 'artifacts'
+# Параметр запроса со списком поддерживаемых клиентом алгоритмов сжатия
+ACCEPT_COMPRESSION_QUERY = 'accept_compression'
+
+
+class ArtifactSender(Protocol):
+    """Websocket methods, used to send artifacts."""
+
+    async def send_json(self, data: Any) -> None:
+        """Send JSON message."""
+        ...
+
+    async def send_bytes(self, data: bytes) -> None:
+        """Send binary frame."""
+        ...
+
+
+def is_binary_artifacts(request: web.Request) -> bool:
+    """Check, that client requested artifacts as binary frames."""
+    return request.query.get(BINARY_ARTIFACTS_QUERY, '').lower() in (
+        '1', 'true', 'yes')
+
+
+def get_requested_artifacts(request: web.Request) -> List[str]:
+    """
+    Get filename patterns of artifacts, requested by client.
+
+    Example: ?artifacts=*.hex,*.bin
+    Empty list means all artifacts, allowed by platform.
+    """
+    return [pattern.strip()
+            for pattern in request.query.get(ARTIFACTS_QUERY, '').split(',')
+            if pattern.strip()]
+
+
+def get_artifact_compression(request: web.Request) -> ArtifactCompression:
+    """
+    Choose compression of artifact frames.
+
+    Configured algorithm is used, if client listed it\
+        in accept_compression query parameter, e.g. ?accept_compression=gzip
+    If zstandard isn't installed, zstd is replaced by gzip.
+    """
+    accepted = request.query.get(ACCEPT_COMPRESSION_QUERY, '').split(',')
+    compression = get_config().artifact_compression
+    if compression == 'zstd' and zstandard is None:
+        compression = 'gzip'
+    if compression in ('gzip', 'zstd') and compression in accepted:
+        return compression
+    return 'none'
+
+
+def compress_artifact(data: bytes, compression: ArtifactCompression) -> bytes:
+    """Compress artifact content."""
+    match compression:
+        case 'gzip':
+            return gzip.compress(data, mtime=0)
+        case 'zstd':
+            # get_artifact_compression не выбирает zstd без zstandard
+            assert zstandard is not None
+            return zstandard.ZstdCompressor().compress(data)
+        case _:
+            return data
+
+
+def _match(filename: str, patterns: List[str]) -> bool:
+    return not patterns or any(fnmatch(filename, pattern)
+                               for pattern in patterns)
+
+
+async def find_artifacts(build_path: str,
+                         *pattern_groups: List[str]) -> List[AsyncPath]:
+    """
+    Get paths to files in build directory.
+
+    File is returned, if its name matches at least one pattern\
+        of every non-empty group, e.g. platform and client patterns.
+    """
+    paths: List[AsyncPath] = []
+    async for path in AsyncPath(build_path).rglob('*'):
+        if not all(_match(path.name, patterns)
+                   for patterns in pattern_groups):
+            continue
+        if await path.is_file():
+            paths.append(path)
+    return paths
+
+
+async def read_artifact(path: AsyncPath) -> File:
+    """Read artifact and encode it to base64."""
+    async with async_open(path, 'rb') as f:
+        binary = await f.read()
+    return File(
+        filename=path.name.split('.')[0],
+        extension=''.join(path.suffixes),
+        fileContent=base64.b64encode(binary).decode('ascii'),
+    )
+
+
+async def get_artifact_info(
+        state_machine: str,
+        path: AsyncPath,
+        compression: ArtifactCompression = 'none') -> ArtifactInfo:
+    """Get manifest entry for artifact."""
+    return ArtifactInfo(
+        state_machine=state_machine,
+        filename=path.name.split('.')[0],
+        extension=''.join(path.suffixes),
+        size=(await path.stat()).st_size,
+        compression=compression
+    )
+
+
+async def send_artifacts(
+        ws: ArtifactSender,
+        artifacts: List[tuple[str, AsyncPath]],
+        compression: ArtifactCompression = 'none') -> None:
+    """
+    Send artifacts as binary frames.
+
+    First sends JSON manifest {'artifacts': [ArtifactInfo, ...]},\
+        then one binary frame per artifact in the manifest order.
+    Frames are compressed by compression algorithm,\
+        size in manifest is size of uncompressed artifact.
+    Only one artifact is kept in memory at a time.
+    """
+    manifest = [await get_artifact_info(state_machine, path, compression)
+                for state_machine, path in artifacts]
+    await ws.send_json(
+        {'artifacts': [info.model_dump() for info in manifest]})
+    for _, path in artifacts:
+        async with async_open(path, 'rb') as f:
+            data = await f.read()
+        if compression != 'none':
+            data = await asyncio.to_thread(compress_artifact,
+                                           data,
+                                           compression)
+        await ws.send_bytes(data)
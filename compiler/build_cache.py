@@ -0,0 +1,210 @@
+"""Module implements content-addressed cache of build results."""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Iterable, List
+
+import aioshutil
+from aiofile import async_open
+from aiopath import AsyncPath
+from compiler.config import get_config
+from compiler.types.inner_types import CommandResult, File
+from compiler.types.platform_types import CompilingSettings
+
+_RESULT_FILENAME = 'commands.json'
+_BUILD_DIRECTORY = 'build'
+# Поддиректория BUILD_CACHE_DIRECTORY с записями кэша
+_ENTRIES_DIRECTORY = 'builds'
+
+
+def _directory_size(path: str) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                ...
+    return size
+
+
+def _remove_entry(entry: str) -> None:
+    # Переименование скрывает запись от читателей до ее удаления
+    removed = f'{entry}.{uuid.uuid4().hex}.removed'
+    try:
+        os.rename(entry, removed)
+    except OSError:
+        return
+    shutil.rmtree(removed, ignore_errors=True)
+
+
+def _is_entry_name(name: str) -> bool:
+    # Временные и удаляемые записи не учитываются
+    return not name.startswith('.') and not name.endswith('.removed')
+
+
+def _evict(root: str, limit: int) -> None:
+    """Remove least recently used entries, until cache fits limit."""
+    entries: List[tuple[float, int, str]] = []
+    # Директории могут удаляться другими процессами во время обхода
+    try:
+        platforms = [platform.path for platform in os.scandir(root)
+                     if _is_entry_name(platform.name)]
+    except OSError:
+        return
+    for platform_path in platforms:
+        try:
+            platform_entries = list(os.scandir(platform_path))
+        except OSError:
+            continue
+        for entry in platform_entries:
+            if not _is_entry_name(entry.name):
+                continue
+            try:
+                used_at = entry.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((used_at, _directory_size(entry.path),
+                            entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        _remove_entry(path)
+        total -= size
+
+
+def get_build_key(sources: List[File],
+                  platform_id: str,
+                  platform_version: str,
+                  build_files: Iterable[str],
+                  commands: List[CompilingSettings]) -> str:
+    """
+    Calculate cache key for project.
+
+    Key is sha256 of generated sources, platform id and version,\
+        names of build files and compiler commands with flags.
+    Platform sources are not hashed, because platform version\
+        is immutable.
+    """
+    meta = {
+        'platform_id': platform_id,
+        'platform_version': platform_version,
+        'build_files': sorted(build_files),
+        'commands': [[command.command, *command.flags]
+                     for command in commands]
+    }
+    key = hashlib.sha256(json.dumps(meta, sort_keys=True).encode('utf-8'))
+    for source in sorted(sources,
+                         key=lambda file: (file.filename, file.extension)):
+        content = source.fileContent
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        key.update(f'{source.filename}.{source.extension}:'
+                   f'{len(content)}:'.encode('utf-8'))
+        key.update(content)
+    return key.hexdigest()
+
+
+class BuildCache:
+    """
+    Persistent cache of compilation results.
+
+    Each entry is directory BUILD_CACHE_DIRECTORY/builds/platform_id/key/,\
+        that contains build directory and results of compiler commands.
+    Cache is disabled, if BUILD_CACHE_DIRECTORY is empty string.
+    Size is limited by BUILD_CACHE_SIZE megabytes,\
+        least recently used entries are evicted first.
+    Entries of platform are removed, when platform is changed or deleted.
+    """
+
+    @staticmethod
+    def enabled() -> bool:
+        """Is build cache enabled in config."""
+        return get_config().build_cache_directory != ''
+
+    @staticmethod
+    def _platform_path(platform_id: str) -> AsyncPath:
+        return AsyncPath(get_config().build_cache_directory,
+                         _ENTRIES_DIRECTORY,
+                         platform_id)
+
+    @staticmethod
+    async def load(platform_id: str,
+                   key: str,
+                   build_path: str) -> List[CommandResult] | None:
+        """
+        Restore cached build directory to build_path.
+
+        Return commands results or None, if there is no entry with key.
+        """
+        if not BuildCache.enabled():
+            return None
+        entry = BuildCache._platform_path(platform_id).joinpath(key)
+        result_path = entry.joinpath(_RESULT_FILENAME)
+        try:
+            async with async_open(result_path, 'r') as f:
+                raw_results = json.loads(await f.read())
+            await aioshutil.copytree(entry.joinpath(_BUILD_DIRECTORY),
+                                     build_path,
+                                     dirs_exist_ok=True)
+            # Время изменения записи - время ее последнего использования
+            await asyncio.to_thread(os.utime, entry)
+        except OSError:
+            # Записи нет или ее удалил другой процесс
+            return None
+        return [CommandResult(**result) for result in raw_results]
+
+    @staticmethod
+    async def save(platform_id: str,
+                   key: str,
+                   build_path: str,
+                   commands_results: List[CommandResult]) -> None:
+        """
+        Save build directory and commands results.
+
+        Only successful builds are saved.\
+            The entry is written to temporary directory\
+            and then renamed, so readers never see partial entry.
+        """
+        if not BuildCache.enabled():
+            return
+        if any(result.return_code for result in commands_results):
+            return
+        platform_path = BuildCache._platform_path(platform_id)
+        entry = platform_path.joinpath(key)
+        if await entry.exists():
+            return
+        tmp_entry = platform_path.joinpath(f'.{key}-{uuid.uuid4().hex}')
+        await tmp_entry.mkdir(parents=True)
+        await aioshutil.copytree(build_path,
+                                 tmp_entry.joinpath(_BUILD_DIRECTORY))
+        async with async_open(tmp_entry.joinpath(_RESULT_FILENAME),
+                              'w') as f:
+            await f.write(json.dumps(
+                [result.model_dump() for result in commands_results]))
+        try:
+            await asyncio.to_thread(os.rename, tmp_entry, entry)
+        except OSError:
+            # Другой запрос уже сохранил такую же сборку
+            await aioshutil.rmtree(tmp_entry)
+            return
+        limit = get_config().build_cache_size * 1024 * 1024
+        if limit > 0:
+            await asyncio.to_thread(
+                _evict,
+                os.path.join(get_config().build_cache_directory,
+                             _ENTRIES_DIRECTORY),
+                limit)
+
+    @staticmethod
+    async def invalidate(platform_id: str) -> None:
+        """Remove cached builds of all platform versions."""
+        if not BuildCache.enabled():
+            return
+        path = BuildCache._platform_path(platform_id)
+        if await path.exists():
+            await asyncio.to_thread(_remove_entry, str(path))
@@ -0,0 +1,77 @@
+"""Module implements code generation tables, precomputed for platforms."""
+from dataclasses import dataclass
+from typing import Mapping
+
+from compiler.types.platform_types import Component, Platform
+
+
+@dataclass(frozen=True)
+class ComponentTable:
+    """
+    Precomputed code parts of platform component.
+
+    Calls are stored without component id,\
+        e.g. '.isPressed()' or '::read();'.
+    """
+
+    delimeter: str
+    singletone: bool
+    # Сигнал -> вызов функции проверки сигнала
+    signal_checks: Mapping[str, str]
+    loop_actions: tuple[str, ...]
+    import_files: tuple[str, ...]
+    build_files: frozenset[str]
+
+
+@dataclass(frozen=True)
+class PlatformTable:
+    """Precomputed code parts of platform."""
+
+    components: Mapping[str, ComponentTable]
+    default_include_files: tuple[str, ...]
+    default_build_files: frozenset[str]
+
+
+def _build_component_table(platform: Platform,
+                           component: Component) -> ComponentTable:
+    delimeter = '.'
+    if platform.static_components or component.singletone:
+        delimeter = '::'
+    return ComponentTable(
+        delimeter=delimeter,
+        singletone=component.singletone,
+        signal_checks={
+            name: f'{delimeter}{signal.checkMethod}()'
+            for name, signal in component.signals.items()
+        },
+        loop_actions=tuple(f'{delimeter}{method}();'
+                           for method in component.loopActions),
+        import_files=tuple(component.importFiles),
+        build_files=frozenset(component.buildFiles)
+    )
+
+
+def build_platform_table(platform: Platform) -> PlatformTable:
+    """Compute code generation table of platform."""
+    return PlatformTable(
+        components={
+            name: _build_component_table(platform, component)
+            for name, component in platform.components.items()
+        },
+        default_include_files=tuple(platform.default_include_files),
+        default_build_files=frozenset(platform.default_build_files)
+    )
+
+
+def get_platform_table(platform: Platform) -> PlatformTable:
+    """
+    Get code generation table of platform.
+
+    Table is computed on first call and stored in platform object,\
+        so it lives as long as platform is loaded.
+    """
+    table = platform._codegen_table
+    if table is None:
+        table = build_platform_table(platform)
+        platform._codegen_table = table
+    return table
@@ -0,0 +1,125 @@
+"""Module implements limiting of simultaneous compilations."""
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional
+
+from compiler.config import get_config
+
+QueuePositionCallback = Callable[[int], Awaitable[None]]
+
+
+class CompileQueueFullException(Exception):
+    """Compilation queue is full, request is rejected."""
+
+    ...
+
+
+class _Waiter:
+    """Request waiting for free compilation slot."""
+
+    def __init__(self) -> None:
+        self.granted = False
+        # Выставляется, когда очередь сдвинулась или слот выдан
+        self.changed = asyncio.Event()
+
+
+class CompileScheduler:
+    """
+    Scheduler of compilations.
+
+    No more than max_jobs compilations run at the same time,\
+        other requests wait in FIFO queue with max_queue_size length.
+    If queue is full, CompileQueueFullException is raised immediately.
+    """
+
+    def __init__(self, max_jobs: int, max_queue_size: int) -> None:
+        if max_jobs < 1:
+            raise ValueError('max_jobs must be positive.')
+        self.max_jobs = max_jobs
+        self.max_queue_size = max_queue_size
+        self._running = 0
+        self._waiters: Deque[_Waiter] = deque()
+
+    @property
+    def running(self) -> int:
+        """Count of running compilations."""
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        """Count of requests in queue."""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        on_queue_position: Optional[QueuePositionCallback] = None
+    ) -> AsyncIterator[None]:
+        """
+        Wait for free compilation slot and hold it inside 'with' statement.
+
+        on_queue_position is called with 1-based position,\
+            when request is queued and every time, when queue moves.
+        """
+        await self._acquire(on_queue_position)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(
+            self,
+            on_queue_position: Optional[QueuePositionCallback]) -> None:
+        if self._running < self.max_jobs and not self._waiters:
+            self._running += 1
+            return
+        if len(self._waiters) >= self.max_queue_size:
+            raise CompileQueueFullException(
+                'Очередь компиляции переполнена, повторите запрос позже.')
+        waiter = _Waiter()
+        self._waiters.append(waiter)
+        try:
+            position = len(self._waiters)
+            while not waiter.granted:
+                if on_queue_position is not None:
+                    await on_queue_position(position)
+                await waiter.changed.wait()
+                waiter.changed.clear()
+                if not waiter.granted:
+                    position = self._waiters.index(waiter) + 1
+        except BaseException:
+            if waiter.granted:
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+                self._notify_waiters()
+            raise
+
+    def _release(self) -> None:
+        if self._waiters:
+            # Слот передается следующему в очереди,
+            # поэтому счетчик запущенных компиляций не меняется
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            waiter.changed.set()
+            self._notify_waiters()
+        else:
+            self._running -= 1
+
+    def _notify_waiters(self) -> None:
+        for waiter in self._waiters:
+            waiter.changed.set()
+
+
+_scheduler: CompileScheduler | None = None
+
+
+def get_compile_scheduler() -> CompileScheduler:
+    """Get compile scheduler, create it from config on first call."""
+    global _scheduler
+    if _scheduler is None:
+        config = get_config()
+        _scheduler = CompileScheduler(config.max_compile_jobs,
+                                      config.max_compile_queue_size)
+    return _scheduler
@@ -0,0 +1,104 @@
+"""Module implements stateless compile worker process."""
+import asyncio
+import os
+from typing import Any
+
+from compiler.CGML import CGMLException
+from compiler.compile_scheduler import CompileQueueFullException
+from compiler.config import get_config
+from compiler.handler import compile_scheme_locally
+from compiler.logger import Logger
+from compiler.worker_dispatcher import (
+    WORKER_PARENT_ENV,
+    WorkerException,
+    check_token,
+    is_loopback_address,
+    read_frame,
+    start_server,
+    write_frame
+)
+
+
+async def _compile(job: Any) -> dict:
+    try:
+        response = await compile_scheme_locally(
+            job['xml'], job.get('requested_artifacts', []))
+        return {'type': 'result', 'response': response.model_dump()}
+    except CGMLException as e:
+        errors = e.error_data
+    except CompileQueueFullException as e:
+        await Logger.logger.warning(str(e))
+        errors = {'': str(e)}
+    except Exception:
+        await Logger.logException()
+        errors = {'': 'Internal error!'}
+    return {'type': 'error', 'message': 'Ошибка компиляции.',
+            'errors': errors}
+
+
+async def _handle_connection(reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+    """
+    Handle jobs of one dispatcher connection.
+
+    Jobs:
+    - {'type': 'ping'} -> {'type': 'pong'};
+    - {'type': 'compile', 'xml', 'requested_artifacts'} ->\
+        {'type': 'result', 'response': CompilerResponse} |\
+        {'type': 'error', 'message', 'errors': {sm_id: error}}.
+    Unknown job -> {'type': 'error', 'message'}.
+    Job without WORKER_TOKEN -> {'type': 'error', 'message'},\
+        connection is closed.
+    """
+    try:
+        while True:
+            try:
+                job = await read_frame(reader)
+            except asyncio.IncompleteReadError:
+                break
+            if not check_token(job):
+                await write_frame(writer, {
+                    'type': 'error',
+                    'message': 'Неверный секрет сборщика.'
+                })
+                break
+            match job.get('type'):
+                case 'ping':
+                    await write_frame(writer, {'type': 'pong'})
+                case 'compile':
+                    await write_frame(writer, await _compile(job))
+                case _:
+                    await write_frame(writer, {
+                        'type': 'error',
+                        'message': f'Неизвестная задача {job.get("type")}.'
+                    })
+    except (OSError, WorkerException, ValueError):
+        await Logger.logException()
+    finally:
+        writer.close()
+
+
+async def _watch_parent(server: asyncio.AbstractServer,
+                        parent_pid: int) -> None:
+    while os.getppid() == parent_pid:
+        await asyncio.sleep(1)
+    server.close()
+
+
+async def serve(address: str) -> asyncio.AbstractServer:
+    """
+    Start accepting jobs on unix:path or host:port address.
+
+    Local worker, started by WorkerDispatcher, is stopped,\
+        when server process exits.
+    Without WORKER_TOKEN only unix socket or loopback address is allowed.
+    """
+    if get_config().worker_token == '' and not is_loopback_address(address):
+        raise WorkerException(
+            f'Сборщик на адресе {address} требует секрет сборщиков '
+            '(--worker-token).')
+    server = await start_server(address, _handle_connection)
+    parent_pid = os.environ.get(WORKER_PARENT_ENV)
+    if parent_pid is not None:
+        asyncio.create_task(_watch_parent(server, int(parent_pid)))
+    return server
@@ -19,6 +19,52 @@ _LIBRARY_PATH = os.path.join(_MODULE_PATH, 'library')
 _PLATFORM_DIRECTORY = os.path.join(_MODULE_PATH, 'platforms')
 _LOG_PATH = 'logs.log'  # Замените на нужную папку
 _MAX_MSG_SIZE = 1024 * 50  # Максимальный размер сообщения от клиента.
+# Директория кэша сборок, пустая строка отключает кэш.
+_BUILD_CACHE_DIRECTORY = '/tmp/lapki-compiler-cache/'
+# Лимит размера кэша сборок в мегабайтах, 0 - без лимита.
+_BUILD_CACHE_SIZE = 1024
+# Количество одновременно запущенных компиляций.
+_MAX_COMPILE_JOBS = os.cpu_count() or 1
+# Количество запросов, ожидающих компиляции.
+_MAX_COMPILE_QUEUE_SIZE = 64
+# Количество запущенных демонов arduino-cli, 0 - компиляция процессами.
+_ARDUINO_CLI_DAEMONS = 0
+# 1 - сжатие websocket-сообщений (permessage-deflate), 0 - без сжатия.
+_WEBSOCKET_COMPRESSION = 1
+# Сжатие артефактов, передаваемых бинарными кадрами: none, gzip или zstd.
+_ARTIFACT_COMPRESSION = 'gzip'
+# Время хранения проекта после ответа в секундах, 0 - удаление сразу.
+_WORKSPACE_TTL = 0
+# Лимит размера хранимых проектов в мегабайтах, 0 - без лимита.
+_BUILD_DIRECTORY_QUOTA = 1024
+# Директория в RAM (например, /dev/shm/lapki-compiler/) для проектов,
+# пустая строка - проекты создаются только в _BUILD_DIRECTORY.
+_MEMORY_BUILD_DIRECTORY = ''
+# Максимальное количество загруженных в память платформ, 0 - без лимита.
+_MAX_LOADED_PLATFORMS = 16
+# Время в секундах, после которого неиспользуемая платформа выгружается,
+# 0 - платформы не выгружаются по времени.
+_PLATFORM_TTL = 3600
+# Файл с метаданными найденных схем платформ, ускоряет запуск.
+# Пустая строка отключает манифест.
+_PLATFORM_MANIFEST = '/tmp/lapki-compiler-cache/platforms.json'
+# Количество машин состояний, хранимых разобранными вместе со сгенерированным
+# кодом, 0 - кэш отключен.
+_STATE_MACHINE_CACHE_SIZE = 64
+# Количество локальных процессов-сборщиков, 0 - сборка в основном процессе.
+_COMPILE_WORKERS = 0
+# Адреса запущенных отдельно сборщиков через запятую,
+# например unix:/tmp/worker.sock,10.0.0.2:9000
+_WORKER_ADDRESSES = ''
+# Адрес, на котором процесс работает сборщиком вместо веб-сервера,
+# пустая строка - обычный запуск.
+_WORKER_LISTEN = ''
+# Время выполнения задачи сборщиком в секундах, после которого сборщик
+# перезапускается, 0 - без ограничения.
+_WORKER_JOB_TIMEOUT = 600
+# Общий секрет сервера и сборщиков. Без него сборщик принимает задачи
+# только на unix-сокете или loopback-адресе.
+_WORKER_TOKEN = ''
 # КОНЕЦ ПОЛЬЗОВАТЕЛЬСКИХ НАСТРОЕК
 T = TypeVar('T', str, int)
 
@@ -34,7 +80,26 @@ def get_default_config() -> Config:
                   _ACCESS_TOKENS_FILE,
                   _BUILD_DIRECTORY,
                   _MODULE_PATH,
-                  _BASE_DIRECTORY)
+                  _BASE_DIRECTORY,
+                  _BUILD_CACHE_DIRECTORY,
+                  _MAX_COMPILE_JOBS,
+                  _MAX_COMPILE_QUEUE_SIZE,
+                  _ARDUINO_CLI_DAEMONS,
+                  _WEBSOCKET_COMPRESSION,
+                  _ARTIFACT_COMPRESSION,
+                  _WORKSPACE_TTL,
+                  _BUILD_DIRECTORY_QUOTA,
+                  _MEMORY_BUILD_DIRECTORY,
+                  _MAX_LOADED_PLATFORMS,
+                  _PLATFORM_TTL,
+                  _PLATFORM_MANIFEST,
+                  _STATE_MACHINE_CACHE_SIZE,
+                  _COMPILE_WORKERS,
+                  _WORKER_ADDRESSES,
+                  _WORKER_LISTEN,
+                  _BUILD_CACHE_SIZE,
+                  _WORKER_JOB_TIMEOUT,
+                  _WORKER_TOKEN)
 
 
 _config = get_default_config()
@@ -94,6 +159,60 @@ def configure(parser: ArgumentParser):
         args.max_msg_size, 'LAPKI_COMPILER_MAX_MSG_SIZE', _MAX_MSG_SIZE)
     build_directory = _choice(
         args.build_path, 'LAPKI_COMPILER_BUILD_PATH', _BUILD_DIRECTORY)
+    build_cache_directory = _choice(
+        args.build_cache_directory, 'LAPKI_COMPILER_BUILD_CACHE_DIRECTORY',
+        _BUILD_CACHE_DIRECTORY)
+    max_compile_jobs = _choice(
+        args.max_compile_jobs, 'LAPKI_COMPILER_MAX_COMPILE_JOBS',
+        _MAX_COMPILE_JOBS)
+    max_compile_queue_size = _choice(
+        args.max_compile_queue_size, 'LAPKI_COMPILER_MAX_COMPILE_QUEUE_SIZE',
+        _MAX_COMPILE_QUEUE_SIZE)
+    arduino_cli_daemons = _choice(
+        args.arduino_cli_daemons, 'LAPKI_COMPILER_ARDUINO_CLI_DAEMONS',
+        _ARDUINO_CLI_DAEMONS)
+    websocket_compression = _choice(
+        args.websocket_compression, 'LAPKI_COMPILER_WEBSOCKET_COMPRESSION',
+        _WEBSOCKET_COMPRESSION)
+    artifact_compression = _choice(
+        args.artifact_compression, 'LAPKI_COMPILER_ARTIFACT_COMPRESSION',
+        _ARTIFACT_COMPRESSION)
+    workspace_ttl = _choice(
+        args.workspace_ttl, 'LAPKI_COMPILER_WORKSPACE_TTL', _WORKSPACE_TTL)
+    build_directory_quota = _choice(
+        args.build_directory_quota, 'LAPKI_COMPILER_BUILD_DIRECTORY_QUOTA',
+        _BUILD_DIRECTORY_QUOTA)
+    memory_build_directory = _choice(
+        args.memory_build_directory, 'LAPKI_COMPILER_MEMORY_BUILD_DIRECTORY',
+        _MEMORY_BUILD_DIRECTORY)
+    max_loaded_platforms = _choice(
+        args.max_loaded_platforms, 'LAPKI_COMPILER_MAX_LOADED_PLATFORMS',
+        _MAX_LOADED_PLATFORMS)
+    platform_ttl = _choice(
+        args.platform_ttl, 'LAPKI_COMPILER_PLATFORM_TTL', _PLATFORM_TTL)
+    platform_manifest = _choice(
+        args.platform_manifest, 'LAPKI_COMPILER_PLATFORM_MANIFEST',
+        _PLATFORM_MANIFEST)
+    state_machine_cache_size = _choice(
+        args.state_machine_cache_size,
+        'LAPKI_COMPILER_STATE_MACHINE_CACHE_SIZE',
+        _STATE_MACHINE_CACHE_SIZE)
+    compile_workers = _choice(
+        args.compile_workers, 'LAPKI_COMPILER_COMPILE_WORKERS',
+        _COMPILE_WORKERS)
+    worker_addresses = _choice(
+        args.worker_addresses, 'LAPKI_COMPILER_WORKER_ADDRESSES',
+        _WORKER_ADDRESSES)
+    worker_listen = _choice(
+        args.worker_listen, 'LAPKI_COMPILER_WORKER_LISTEN', _WORKER_LISTEN)
+    build_cache_size = _choice(
+        args.build_cache_size, 'LAPKI_COMPILER_BUILD_CACHE_SIZE',
+        _BUILD_CACHE_SIZE)
+    worker_job_timeout = _choice(
+        args.worker_job_timeout, 'LAPKI_COMPILER_WORKER_JOB_TIMEOUT',
+        _WORKER_JOB_TIMEOUT)
+    worker_token = _choice(
+        args.worker_token, 'LAPKI_COMPILER_WORKER_TOKEN', _WORKER_TOKEN)
     set_config(Config(
         library_path,
         server_host,
@@ -104,5 +223,24 @@ def configure(parser: ArgumentParser):
         access_token_file,
         build_directory,
         _MODULE_PATH,
-        _BASE_DIRECTORY)
+        _BASE_DIRECTORY,
+        build_cache_directory,
+        max_compile_jobs,
+        max_compile_queue_size,
+        arduino_cli_daemons,
+        websocket_compression,
+        artifact_compression,
+        workspace_ttl,
+        build_directory_quota,
+        memory_build_directory,
+        max_loaded_platforms,
+        platform_ttl,
+        platform_manifest,
+        state_machine_cache_size,
+        compile_workers,
+        worker_addresses,
+        worker_listen,
+        build_cache_size,
+        worker_job_timeout,
+        worker_token)
     )
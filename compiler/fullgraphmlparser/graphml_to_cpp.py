@@ -17,8 +17,14 @@ from compiler.fullgraphmlparser.stateclasses import (
     Condition
 )
 from compiler.fullgraphmlparser.graphml import *
+from compiler.fullgraphmlparser.template_cache import TemplateCache
 
 MODULE_PATH = os.path.dirname(os.path.abspath(inspect.stack()[0][1]))
+PLACEHOLDERS = re.compile('STATE_MACHINE_LOWERED_NAME'
+                          '|STATE_MACHINE_CAPITALIZED_NAME'
+                          '|STATE_MACHINE_NAME'
+                          '|HEADER_EXTENSION'
+                          '|[ ]*\n')
 IF_EXPRESSION = string.Template("""$offset if ($condition) {
 $actions
 $offset}""")
@@ -66,7 +72,6 @@ def get_enum(text_labels: List[str]) -> str:
 class CppFileWriter:
     id_to_name = {}
     notes_dict = {}
-    f = None
     all_signals = []
     userFlag = False  # Флаг на наличие кода для класса User
     list_notes_dict: Dict[str, List[str]] = {}
@@ -75,6 +80,9 @@ class CppFileWriter:
                  state_machine: StateMachine,
                  create_setup=False,
                  create_loop=False) -> None:
+        # Код накапливается в памяти и записывается в файл целиком
+        self._output: List[str] = []
+        self._pending: List[str] = []
         self.header_file_extension = state_machine.header_file_extension
         self.language = state_machine.language
         self.filename = 'sketch'
@@ -269,35 +277,44 @@ class CppFileWriter:
             await self._insert_string('}\n\n')
 
     async def write_to_file(self, folder: str, extension: str):
-        async with async_open(os.path.join(folder, f'{self.filename}.{extension}'), 'w') as f:
-            self.f = f
-            await self._insert_file_template(f'preamble_c.txt')
-            await self._write_constructor()
-            await self._write_initial()
-            await self._write_states_definitions_recursively(self.states[0], 'SMs::%s::SM' % self._sm_capitalized_name())
-            await self._write_initial_vertexes_definition()
-            await self._write_choice_vertex_definition()
-            await self._write_final_states_definition()
-            if self.notes_dict['setup'] or self.create_setup:
-                await self._insert_string('\nvoid setup() {')
-                await self._insert_string('\n\t' + '\n\t'.join(self.notes_dict['setup'].split('\n')[1:]))
-                # Ставим дилей, так как без него в Serial
-                # не выводится сообщения из глобального начального состояния
-                await self._insert_string('\n\tSTATE_MACHINE_CAPITALIZED_NAME_ctor();')
-                await self._insert_string('\n\tQEvt event;')
-                await self._insert_string(f'\n\tQMsm_init(the_{self.sm_id}, &event);')
-                await self._insert_string('\n}')
-            if self.notes_dict['loop'] or self.create_loop:
-                await self._insert_string('\nvoid loop() {')
-                await self._insert_file_template('q_vertex_sig.txt')
-                await self._insert_file_template('defer_loop.txt')
-                await self._insert_string('\n\t' + '\n\t'.join(self.notes_dict['loop'].split('\n')[1:]))
-                await self._insert_string('\n}')
-            if self.notes_dict['main_function']:
-                await self._insert_string(self.notes_dict['main_function'])
-            if self.notes_dict['raw_cpp_code']:
-                await self._insert_string('\n'.join(self.notes_dict['raw_cpp_code'].split('\n')[1:]) + '\n')
-            self.f = None
+        """Generate files and write each of them with a single write."""
+        for filename, content in (await self.generate(extension)).items():
+            async with async_open(os.path.join(folder, filename), 'w') as f:
+                await f.write(content)
+
+    async def generate(self, extension: str) -> Dict[str, str]:
+        """
+        Generate source and header files in memory.
+
+        Return dict, where key is filename and value is file content.
+        """
+        await self._insert_file_template(f'preamble_c.txt')
+        await self._write_constructor()
+        await self._write_initial()
+        await self._write_states_definitions_recursively(self.states[0], 'SMs::%s::SM' % self._sm_capitalized_name())
+        await self._write_initial_vertexes_definition()
+        await self._write_choice_vertex_definition()
+        await self._write_final_states_definition()
+        if self.notes_dict['setup'] or self.create_setup:
+            await self._insert_string('\nvoid setup() {')
+            await self._insert_string('\n\t' + '\n\t'.join(self.notes_dict['setup'].split('\n')[1:]))
+            # Ставим дилей, так как без него в Serial
+            # не выводится сообщения из глобального начального состояния
+            await self._insert_string('\n\tSTATE_MACHINE_CAPITALIZED_NAME_ctor();')
+            await self._insert_string('\n\tQEvt event;')
+            await self._insert_string(f'\n\tQMsm_init(the_{self.sm_id}, &event);')
+            await self._insert_string('\n}')
+        if self.notes_dict['loop'] or self.create_loop:
+            await self._insert_string('\nvoid loop() {')
+            await self._insert_file_template('q_vertex_sig.txt')
+            await self._insert_file_template('defer_loop.txt')
+            await self._insert_string('\n\t' + '\n\t'.join(self.notes_dict['loop'].split('\n')[1:]))
+            await self._insert_string('\n}')
+        if self.notes_dict['main_function']:
+            await self._insert_string(self.notes_dict['main_function'])
+        if self.notes_dict['raw_cpp_code']:
+            await self._insert_string('\n'.join(self.notes_dict['raw_cpp_code'].split('\n')[1:]) + '\n')
+        main_file = self._take_output()
         # async with async_open(os.path.join(folder, 'User.h'), "w") as f:
         #     self.f = f
         #     await self._insert_file_template('user_preamble_h.txt')
@@ -331,56 +348,57 @@ class CppFileWriter:
         #     if self.notes_dict['user_methods_c']:
         #         await self._insert_string('\n'.join(self.notes_dict['user_methods_c'].split('\n')[1:]) + '\n')
 
-        async with async_open(os.path.join(folder, f'{self.filename}.{self.header_file_extension}'), 'w') as f:
-            self.f = f
-
-            await self._insert_file_template(f'preamble_{self.header_file_extension}.txt')
-            # if self.userFlag:
-            # await self._insert_string('#include "User.h"\n')
-            if self.notes_dict['raw_h_code']:
-                await self._insert_string('//Start of h code from diagram\n')
-                await self._insert_string('\n'.join(self.notes_dict['raw_h_code'].split('\n')[1:]) + '\n')
-                await self._insert_string('//End of h code from diagram\n\n\n')
-
-            await self._insert_string('typedef struct {\n')
-            await self._insert_string('/* protected: */\n')
-            await self._insert_string('    QHsm super;\n')
-            await self._insert_string('\n')
-            await self._insert_string('/* public: */\n')
-            constructor_fields: str = self.notes_dict['state_fields']
-            await self._insert_string('    ' + '\n    '.join(constructor_fields.split('\n')[1:]) + '\n')
-            await self._insert_string('} STATE_MACHINE_CAPITALIZED_NAME;\n\n')
-            await self._insert_string('/* protected: */\n')
-            await self._insert_string('QState DEFAULT_STATE_MACHINE_CAPITALIZED_NAME_initial(STATE_MACHINE_CAPITALIZED_NAME * const me, void const * const par);\n')
-            await self._write_states_declarations_recursively(self.states[0])
-            await self._write_vertexes_declaration([*self.initial_states,
-                                                    *self.choices,
-                                                    *self.final_states
-                                                    ])
-            await self._insert_string('\n#ifdef DESKTOP\n')
-            await self._insert_string('#endif /* def DESKTOP */\n\n')
-            await self._insert_string('extern QHsm * const the_STATE_MACHINE_LOWERED_NAME; /* opaque pointer to the STATE_MACHINE_LOWERED_NAME HSM */\n\n')
-
-            await self._insert_string('typedef struct STATE_MACHINE_LOWERED_NAMEQEvt {\n')
-            await self._insert_string('    QEvt super;\n')
-            event_fields: str = self.notes_dict['event_fields']
-            await self._insert_string('    ' + '\n    '.join(event_fields.split('\n')[1:]) + '\n')
-            await self._insert_string('} STATE_MACHINE_LOWERED_NAMEQEvt;\n\n')
-            await self._insert_string(get_enum(self.player_signal) + '\n')
-            await self._insert_string('\nstatic STATE_MACHINE_CAPITALIZED_NAME STATE_MACHINE_LOWERED_NAME; /* the only instance of the STATE_MACHINE_CAPITALIZED_NAME class */\n\n\n\n')
-            await self._insert_string('void STATE_MACHINE_CAPITALIZED_NAME_ctor(')
-            constructor_fields: str = self.notes_dict['constructor_fields']
-            if constructor_fields:
-                await self._insert_string(
-                    '\n    ' + ',\n    '.join(constructor_fields.replace(';', '').split('\n')[1:]) + ');\n')
-            else:
-                await self._insert_string('void);\n')
-            if self.notes_dict['declare_h_code']:
-                await self._insert_string('//Start of h code from diagram\n')
-                await self._insert_string('\n'.join(self.notes_dict['declare_h_code'].split('\n')[1:]) + '\n')
-                await self._insert_string('//End of h code from diagram\n\n\n')
-            await self._insert_file_template(f'footer_{self.header_file_extension}.txt')
-            self.f = None
+        await self._insert_file_template(f'preamble_{self.header_file_extension}.txt')
+        # if self.userFlag:
+        # await self._insert_string('#include "User.h"\n')
+        if self.notes_dict['raw_h_code']:
+            await self._insert_string('//Start of h code from diagram\n')
+            await self._insert_string('\n'.join(self.notes_dict['raw_h_code'].split('\n')[1:]) + '\n')
+            await self._insert_string('//End of h code from diagram\n\n\n')
+
+        await self._insert_string('typedef struct {\n')
+        await self._insert_string('/* protected: */\n')
+        await self._insert_string('    QHsm super;\n')
+        await self._insert_string('\n')
+        await self._insert_string('/* public: */\n')
+        constructor_fields: str = self.notes_dict['state_fields']
+        await self._insert_string('    ' + '\n    '.join(constructor_fields.split('\n')[1:]) + '\n')
+        await self._insert_string('} STATE_MACHINE_CAPITALIZED_NAME;\n\n')
+        await self._insert_string('/* protected: */\n')
+        await self._insert_string('QState DEFAULT_STATE_MACHINE_CAPITALIZED_NAME_initial(STATE_MACHINE_CAPITALIZED_NAME * const me, void const * const par);\n')
+        await self._write_states_declarations_recursively(self.states[0])
+        await self._write_vertexes_declaration([*self.initial_states,
+                                                *self.choices,
+                                                *self.final_states
+                                                ])
+        await self._insert_string('\n#ifdef DESKTOP\n')
+        await self._insert_string('#endif /* def DESKTOP */\n\n')
+        await self._insert_string('extern QHsm * const the_STATE_MACHINE_LOWERED_NAME; /* opaque pointer to the STATE_MACHINE_LOWERED_NAME HSM */\n\n')
+
+        await self._insert_string('typedef struct STATE_MACHINE_LOWERED_NAMEQEvt {\n')
+        await self._insert_string('    QEvt super;\n')
+        event_fields: str = self.notes_dict['event_fields']
+        await self._insert_string('    ' + '\n    '.join(event_fields.split('\n')[1:]) + '\n')
+        await self._insert_string('} STATE_MACHINE_LOWERED_NAMEQEvt;\n\n')
+        await self._insert_string(get_enum(self.player_signal) + '\n')
+        await self._insert_string('\nstatic STATE_MACHINE_CAPITALIZED_NAME STATE_MACHINE_LOWERED_NAME; /* the only instance of the STATE_MACHINE_CAPITALIZED_NAME class */\n\n\n\n')
+        await self._insert_string('void STATE_MACHINE_CAPITALIZED_NAME_ctor(')
+        constructor_fields: str = self.notes_dict['constructor_fields']
+        if constructor_fields:
+            await self._insert_string(
+                '\n    ' + ',\n    '.join(constructor_fields.replace(';', '').split('\n')[1:]) + ');\n')
+        else:
+            await self._insert_string('void);\n')
+        if self.notes_dict['declare_h_code']:
+            await self._insert_string('//Start of h code from diagram\n')
+            await self._insert_string('\n'.join(self.notes_dict['declare_h_code'].split('\n')[1:]) + '\n')
+            await self._insert_string('//End of h code from diagram\n\n\n')
+        await self._insert_file_template(f'footer_{self.header_file_extension}.txt')
+        header_file = self._take_output()
+        return {
+            f'{self.filename}.{extension}': main_file,
+            f'{self.filename}.{self.header_file_extension}': header_file
+        }
 
     async def _write_constructor(self):
         await self._insert_string('void STATE_MACHINE_CAPITALIZED_NAME_ctor(')
@@ -428,14 +446,49 @@ class CppFileWriter:
     def _sm_lowered_name(self) -> str:
         return self.sm_id[0].lower() + self.sm_id[1:]
 
+    def _replace_placeholder(self, match: re.Match) -> str:
+        placeholder = match.group(0)
+        if placeholder == 'STATE_MACHINE_LOWERED_NAME':
+            return self._sm_lowered_name()
+        if placeholder == 'STATE_MACHINE_CAPITALIZED_NAME':
+            return self._sm_capitalized_name()
+        if placeholder == 'STATE_MACHINE_NAME':
+            return self.sm_id
+        if placeholder == 'HEADER_EXTENSION':
+            return self.header_file_extension
+        # Убираем пробелы в конце строки
+        return '\n'
+
+    def _flush_pending(self):
+        """Substitute placeholders in pending fragments in one pass."""
+        if self._pending:
+            self._output.append(PLACEHOLDERS.sub(self._replace_placeholder,
+                                                 ''.join(self._pending)))
+            self._pending = []
+
+    def _take_output(self) -> str:
+        """Get generated file content and clear buffer."""
+        self._flush_pending()
+        content = ''.join(self._output)
+        self._output = []
+        return content
+
     async def _insert_string(self, s: str):
-        await self.f.write(re.sub('[ ]*\n', '\n',
-                                  s.replace('STATE_MACHINE_LOWERED_NAME', self._sm_lowered_name()).replace('STATE_MACHINE_CAPITALIZED_NAME', self._sm_capitalized_name()).replace('STATE_MACHINE_NAME', self.sm_id).replace('HEADER_EXTENSION', self.header_file_extension)))
+        self._pending.append(s)
+
+    async def _insert_raw_string(self, s: str):
+        """Insert string without placeholders substitution."""
+        self._flush_pending()
+        self._output.append(s)
 
     async def _insert_file_template(self, filename: str):
-        async with async_open(os.path.join(MODULE_PATH, 'templates', filename)) as input_file:
-            async for line in input_file:
-                await self._insert_string(str(line))
+        template = TemplateCache.get(filename)
+        await self._insert_raw_string(template.fill({
+            'STATE_MACHINE_LOWERED_NAME': self._sm_lowered_name(),
+            'STATE_MACHINE_CAPITALIZED_NAME': self._sm_capitalized_name(),
+            'STATE_MACHINE_NAME': self.sm_id,
+            'HEADER_EXTENSION': self.header_file_extension
+        }))
 
     def _generate_defer(self, trigger_name: str, offset='\t\t') -> str:
         return DEFER.safe_substitute({'trigger_name': trigger_name + '_SIG', 'offset': offset})
@@ -445,7 +498,7 @@ class CppFileWriter:
         state_comment = '/*.${' + state_path + '} '
         state_comment = state_comment + '.' * \
             (76 - len(state_comment)) + '*/\n'
-        await self.f.write(state_comment)
+        await self._insert_raw_string(state_comment)
         await self._insert_string('QState STATE_MACHINE_CAPITALIZED_NAME_%s(STATE_MACHINE_CAPITALIZED_NAME * const me, QEvt const * const e) {\n' % state.id)
         await self._insert_string('    QState status_;\n')
         await self._insert_string('    switch (e->sig) {\n')
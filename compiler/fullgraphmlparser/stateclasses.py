@@ -215,6 +215,8 @@ class SMCompilingSettings:
     platform_id: str
     platform_version: str
     platform_compiler_settings: List[CompilingSettings]
+    # Шаблоны имен файлов сборки, отправляемых клиенту
+    artifacts: List[str] = Field(default_factory=list)
 
 
 @dataclass
@@ -234,6 +236,8 @@ class StateMachine:
     choices: List[ParserChoiceVertex] = Field(default_factory=list)
     final_states: List[ParserFinalVertex] = Field(default_factory=list)
     compiling_settings: Optional[SMCompilingSettings] = None
+    # Ключ в StateMachineCache, None - машина состояний не кэшируется
+    cache_key: Optional[str] = None
 
 
 class CodeGenerationException(Exception):
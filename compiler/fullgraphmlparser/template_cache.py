@@ -0,0 +1,72 @@
+"""Module implements cache of code generation templates."""
+import os
+import re
+import inspect
+from typing import Dict, List
+
+MODULE_PATH = os.path.dirname(os.path.abspath(inspect.stack()[0][1]))
+TEMPLATES_PATH = os.path.join(MODULE_PATH, 'templates')
+NAME_PLACEHOLDERS = re.compile('(STATE_MACHINE_LOWERED_NAME'
+                               '|STATE_MACHINE_CAPITALIZED_NAME'
+                               '|STATE_MACHINE_NAME'
+                               '|HEADER_EXTENSION)')
+
+
+class Template:
+    """
+    Template split by placeholders.
+
+    Even parts are literal text, odd parts are placeholder names.
+    Trailing spaces are removed at load time.
+    """
+
+    def __init__(self, text: str) -> None:
+        text = re.sub('[ ]*\n', '\n', text)
+        self.parts: List[str] = NAME_PLACEHOLDERS.split(text)
+
+    def fill(self, values: Dict[str, str]) -> str:
+        """Substitute placeholders by values."""
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return ''.join(parts)
+
+
+class TemplateCache:
+    """
+    Templates, loaded once from templates directory.
+
+    Call reload after editing templates to apply changes without restart.
+    """
+
+    _templates: Dict[str, Template] | None = None
+    # Увеличивается при каждой загрузке шаблонов
+    _generation = 0
+
+    @classmethod
+    def reload(cls) -> None:
+        """Read all templates from disk."""
+        templates: Dict[str, Template] = {}
+        for filename in os.listdir(TEMPLATES_PATH):
+            path = os.path.join(TEMPLATES_PATH, filename)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'r') as f:
+                templates[filename] = Template(f.read())
+        # Заменяем словарь целиком, чтобы параллельные генерации
+        # не увидели частично загруженные шаблоны
+        cls._templates = templates
+        cls._generation += 1
+
+    @classmethod
+    def generation(cls) -> int:
+        """Get number of templates loads, changed by every reload."""
+        return cls._generation
+
+    @classmethod
+    def get(cls, filename: str) -> Template:
+        """Get template by filename, load templates on first call."""
+        if cls._templates is None:
+            cls.reload()
+        assert cls._templates is not None
+        return cls._templates[filename]
@@ -1,13 +1,14 @@
 """Module implements handling and processing requests."""
+import asyncio
+import hashlib
 import json
-import base64
 import os
 import time
 import os.path
-from typing import Dict, List, Optional, Set
-from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 from itertools import chain
 
+import aiohttp
 from aiohttp import web
 from aiofile import async_open
 from aiopath import AsyncPath
@@ -16,9 +17,12 @@ from compiler.fullgraphmlparser.stateclasses import CodeGenerationException
 from compiler.CGML import parse, CGMLException
 from compiler.platform_manager import PlatformException
 from compiler.types.inner_types import (
+    BatchItem,
+    BatchResult,
     CompilerResponse,
     File,
     CommandResult,
+    CompilerOutput,
     LegacyResponse,
     StateMachineResult
 )
@@ -28,16 +32,49 @@ from compiler.fullgraphmlparser.stateclasses import (
     SMCompilingSettings
 )
 from compiler.types.ide_types import IdeStateMachine
+from compiler.types.ws_types import WebSocket
 from compiler.graphml_parser import GraphmlParser
 from compiler.cjson_parser import CJsonParser
 from compiler.fullgraphmlparser.graphml_to_cpp import CppFileWriter
-from compiler.Compiler import Compiler
+from compiler.Compiler import Compiler, OutputCallback, OutputStream
+from compiler.build_cache import BuildCache, get_build_key
+from compiler.state_machine_cache import StateMachineCache
+from compiler.precompiled_cache import PrecompiledCache
+from compiler.compile_scheduler import (
+    CompileQueueFullException,
+    QueuePositionCallback,
+    get_compile_scheduler
+)
+from compiler.artifacts import (
+    find_artifacts,
+    get_artifact_compression,
+    get_requested_artifacts,
+    is_binary_artifacts,
+    read_artifact,
+    send_artifacts
+)
 from compiler.json_converter import JsonConverter
-from compiler.request_error import send_sm_error
+from compiler.workspace_manager import WorkspaceManager
+from compiler.worker_dispatcher import (
+    WorkerDispatcher,
+    WorkerException,
+    WorkersUnavailableException
+)
+from compiler.request_error import create_sm_error_response, send_sm_error
 from compiler.config import get_config
 from compiler.logger import Logger
 
 BinaryFile = File
+CompileResults = Dict[str, tuple[List[CommandResult], StateMachine]]
+GenerateResults = Dict[str, List[File]]
+# Аргументы: id машины состояний, команда, поток вывода, строка
+SMOutputCallback = Callable[[str, str, OutputStream, str], Awaitable[None]]
+# Параметр запроса, включающий потоковую передачу вывода компилятора
+STREAM_OUTPUT_QUERY = 'stream_output'
+# Параметр запроса, включающий только генерацию кода без компиляции
+GENERATE_ONLY_QUERY = 'generate_only'
+# Параметр запроса, включающий отправку позиции в очереди компиляции
+QUEUE_POSITION_QUERY = 'queue_position'
 
 
 def get_sm_path(base_directory: str,
@@ -46,17 +83,40 @@ def get_sm_path(base_directory: str,
     return os.path.join(base_directory, sm_id, 'sketch')
 
 
-async def create_response(
-        validation_errors: Dict[str, str],
+async def find_sm_artifacts(
         base_dir: str,
-        compiler_result: Dict[str, tuple[List[CommandResult], StateMachine]]
-) -> CompilerResponse:
-    """
-    Get source files, binary files from\
-        directory and create CompilerResponse.
+        sm_id: str,
+        sm: StateMachine,
+        requested_artifacts: List[str]
+) -> List[AsyncPath]:
+    """Get paths to state machine's build artifacts,\
+        declared by platform and requested by client."""
+    build_path = os.path.join(get_sm_path(base_dir, sm_id), 'build/')
+    platform_artifacts = (sm.compiling_settings.artifacts
+                          if sm.compiling_settings is not None else [])
+    return await find_artifacts(build_path,
+                                platform_artifacts,
+                                requested_artifacts)
 
-        Doesn't send anything.
-    """
+
+async def get_response_artifacts(
+        base_dir: str,
+        compiler_result: CompileResults,
+        requested_artifacts: Optional[List[str]] = None
+) -> List[tuple[str, AsyncPath]]:
+    """Get paths to build artifacts of every state machine."""
+    artifacts: List[tuple[str, AsyncPath]] = []
+    for sm_id, (_, sm) in compiler_result.items():
+        artifacts.extend(
+            (sm_id, path)
+            for path in await find_sm_artifacts(base_dir, sm_id, sm,
+                                                requested_artifacts or []))
+    return artifacts
+
+
+def _create_validation_response(
+        validation_errors: Dict[str, str]) -> CompilerResponse:
+    """Create CompilerResponse with results of invalid state machines."""
     status = 'OK' if len(validation_errors) == 0 else 'NOTOK'
 
     compiler_response = CompilerResponse(
@@ -64,8 +124,6 @@ async def create_response(
         state_machines={}
     )
 
-    build_path = os.path.join(base_dir, 'build/')
-
     for sm_id, error in validation_errors.items():
         response = StateMachineResult(
             name=sm_id,
@@ -80,6 +138,43 @@ async def create_response(
             source=[]
         )
         compiler_response.state_machines[sm_id] = response
+    return compiler_response
+
+
+def create_generate_response(
+        validation_errors: Dict[str, str],
+        generate_result: GenerateResults) -> CompilerResponse:
+    """Create CompilerResponse with generated sources only."""
+    compiler_response = _create_validation_response(validation_errors)
+    for sm_id, sources in generate_result.items():
+        compiler_response.state_machines[sm_id] = StateMachineResult(
+            name=sm_id,
+            result='OK',
+            commands=[],
+            binary=[],
+            source=sources
+        )
+    return compiler_response
+
+
+async def create_response(
+        validation_errors: Dict[str, str],
+        base_dir: str,
+        compiler_result: Dict[str, tuple[List[CommandResult], StateMachine]],
+        embed_binaries: bool = True,
+        requested_artifacts: Optional[List[str]] = None
+) -> CompilerResponse:
+    """
+    Get source files, binary files from\
+        directory and create CompilerResponse.
+
+        Only artifacts, declared by platform and matching\
+            requested_artifacts patterns, are added.
+        If embed_binaries is False, binary lists are left empty,\
+            artifacts must be sent by send_artifacts.
+        Doesn't send anything.
+    """
+    compiler_response = _create_validation_response(validation_errors)
 
     for sm_id, commands_result_and_sm in compiler_result.items():
         commands_result, sm = commands_result_and_sm
@@ -97,19 +192,10 @@ async def create_response(
             binary=[],
             source=[]
         )
-        build_path = os.path.join(path_to_sm, 'build/')
-        async for path in AsyncPath(build_path).rglob('*'):
-            if await path.is_file():
-                async with async_open(path, 'rb') as f:
-                    binary = await f.read()
-                    b64_data: bytes = base64.b64encode(binary)
-                    response.binary.append(
-                        File(
-                            filename=path.name.split('.')[0],
-                            extension=''.join(path.suffixes),
-                            fileContent=b64_data.decode('ascii'),
-                        )
-                    )
+        if embed_binaries:
+            for path in await find_sm_artifacts(base_dir, sm_id, sm,
+                                                requested_artifacts or []):
+                response.binary.append(await read_artifact(path))
         response.source.append(await Handler.readSourceFile(
             'sketch',
             sm.main_file_extension,
@@ -148,64 +234,384 @@ async def create_sm_directory(base_directory: str,
     return path
 
 
+def queue_position_sender(
+        request: web.Request,
+        ws: WebSocket) -> Optional[QueuePositionCallback]:
+    """
+    Create callback, that sends position in compilation queue.
+
+    Return None, if client didn't request queue positions.
+    """
+    if request.query.get(QUEUE_POSITION_QUERY, '').lower() not in (
+            '1', 'true', 'yes'):
+        return None
+
+    async def send_queue_position(position: int) -> None:
+        # Одно сообщение, так как позиции могут отправлять
+        # несколько параллельно компилируемых машин состояний.
+        await ws.send_json({'queue_position': position})
+
+    return send_queue_position
+
+
+def is_generate_only(request: web.Request) -> bool:
+    """Check, that client requested generated code without compiling."""
+    return request.query.get(GENERATE_ONLY_QUERY, '').lower() in (
+        '1', 'true', 'yes')
+
+
+def is_output_streaming(request: web.Request) -> bool:
+    """Check, that client requested streaming of compiler output."""
+    return request.query.get(STREAM_OUTPUT_QUERY, '').lower() in (
+        '1', 'true', 'yes')
+
+
+def compiler_output_sender(ws: WebSocket) -> SMOutputCallback:
+    """Create callback, that sends compiler output lines."""
+    async def send_compiler_output(sm_id: str,
+                                   command: str,
+                                   stream: OutputStream,
+                                   line: str) -> None:
+        # Одно сообщение на строку, чтобы вывод параллельно
+        # компилируемых машин состояний не перемешивался.
+        await ws.send_json({
+            'compiler_output': CompilerOutput(
+                state_machine=sm_id,
+                command=command,
+                stream=stream,
+                line=line
+            ).model_dump()
+        })
+
+    return send_compiler_output
+
+
+def _bind_sm_output(sm_id: str,
+                    on_output: Optional[SMOutputCallback]
+                    ) -> Optional[OutputCallback]:
+    if on_output is None:
+        return None
+
+    async def on_sm_output(command: str,
+                           stream: OutputStream,
+                           line: str) -> None:
+        await on_output(sm_id, command, stream, line)
+
+    return on_sm_output
+
+
+def _create_source_file(name: str, content: str) -> File:
+    filename, extension = os.path.splitext(name)
+    return File(filename=filename,
+                extension=extension[1:],
+                fileContent=content)
+
+
+async def _compile_state_machine(
+    sm_id: str,
+    sm: StateMachine,
+    base_dir_path: str,
+    on_queue_position: Optional[QueuePositionCallback] = None,
+    on_output: Optional[SMOutputCallback] = None
+) -> tuple[List[CommandResult], StateMachine]:
+    """Generate code for one state machine, include libraries\
+        and compile it."""
+    default_library = get_default_libraries(
+        (
+            'c' if sm.main_file_extension == 'ino'
+            else sm.main_file_extension
+        ),
+        sm.header_file_extension)
+    path = await create_sm_directory(base_dir_path, sm_id)
+    sources: List[File] = []
+    for name, content in (await StateMachineCache.generate(sm)).items():
+        async with async_open(os.path.join(path, name), 'w') as f:
+            await f.write(content)
+        sources.append(_create_source_file(name, content))
+    settings: SMCompilingSettings | None = sm.compiling_settings
+    build_path = os.path.join(path, 'build')
+    await AsyncPath(build_path).mkdir(exist_ok=True)
+    if settings is None:
+        raise PlatformException(
+            'У платформы отсутствуют настройки компиляции.')
+
+    build_key = get_build_key(
+        sources,
+        settings.platform_id,
+        settings.platform_version,
+        settings.build_files | default_library,
+        settings.platform_compiler_settings)
+    cached_results = await BuildCache.load(settings.platform_id,
+                                           build_key,
+                                           build_path)
+    if cached_results is not None:
+        return (cached_results, sm)
+
+    await Compiler.include_source_files(
+        Compiler.DEFAULT_LIBRARY_ID,
+        '1.0',  # TODO: Версия стандарта?
+        default_library,
+        path
+    )
+    await Compiler.include_source_files(settings.platform_id,
+                                        settings.platform_version,
+                                        settings.build_files,
+                                        path)
+
+    async with get_compile_scheduler().slot(on_queue_position):
+        commands = await PrecompiledCache.prepare_commands(
+            settings.platform_id,
+            settings.platform_version,
+            settings.platform_compiler_settings,
+            path)
+        commands_results = await Compiler.compile_project(
+            path,
+            commands,
+            _bind_sm_output(sm_id, on_output))
+    await BuildCache.save(settings.platform_id,
+                          build_key,
+                          build_path,
+                          commands_results)
+
+    return (commands_results, sm)
+
+
 async def compile_xml(
     xml: str,
-    base_dir_path: str) -> tuple[Dict[str, str],
-                                 Dict[str,
-                                      tuple[
-                                          List[CommandResult],
-                                          StateMachine]
-                                      ]
-                                 ]:
+    base_dir_path: str,
+    on_queue_position: Optional[QueuePositionCallback] = None,
+    on_output: Optional[SMOutputCallback] = None
+) -> tuple[Dict[str, str], CompileResults]:
     """
     Compile CGML scheme.
 
     This function generate code from scheme, compile it.
+    State machines are processed concurrently,\
+        results are returned in the order of the scheme.\
+        If one of them fails, e.g. compile queue is full,\
+        others are cancelled and error is raised immediately.
+    Compilation waits for free slot in compile scheduler,\
+        on_queue_position is called, while request is in queue.
+    on_output is called for every line of compiler output.
+
+    Doesn't send anything by itself.
+    """
+    errors, state_machines = await parse(xml)
+    compile_results: CompileResults = {}
+    # Машины состояний компилируются параллельно, количество одновременно
+    # запущенных компиляторов ограничивается планировщиком.
+    tasks = [
+        asyncio.create_task(
+            _compile_state_machine(sm_id, sm, base_dir_path,
+                                   on_queue_position, on_output))
+        for sm_id, sm in state_machines.items()
+    ]
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                error = task.exception()
+                # Например, запрос отклонен планировщиком: остальные
+                # машины состояний не компилируются
+                if (error is not None and
+                        not isinstance(error, CodeGenerationException)):
+                    raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for sm_id, task in zip(state_machines, tasks):
+        error = task.exception()
+        if isinstance(error, CodeGenerationException):
+            errors[sm_id] = (
+                f'Ошибка во время генерации кода! {error.error_data}')
+        else:
+            compile_results[sm_id] = task.result()
+
+    return (errors, compile_results)
+
 
-    Doesn't send anything.
+async def generate_xml(
+    xml: str
+) -> tuple[Dict[str, str], GenerateResults]:
+    """
+    Generate code from CGML scheme without compiling.
+
+    Sources are generated in memory: nothing is written to disk\
+        and no processes are started.
     """
     errors, state_machines = await parse(xml)
-    compile_results: Dict[str, tuple[List[CommandResult], StateMachine]] = {}
+    generate_results: GenerateResults = {}
     for sm_id, sm in state_machines.items():
         try:
-            default_library = get_default_libraries(
-                (
-                    'c' if sm.main_file_extension == 'ino'
-                    else sm.main_file_extension
-                ),
-                sm.header_file_extension)
-            path = await create_sm_directory(base_dir_path, sm_id)
-            await CppFileWriter(sm, True, True).write_to_file(
-                path,
-                sm.main_file_extension)
-            settings: SMCompilingSettings | None = sm.compiling_settings
-            build_path = os.path.join(path, 'build')
-            await AsyncPath(build_path).mkdir(exist_ok=True)
-            if settings is None:
-                raise PlatformException(
-                    'У платформы отсутствуют настройки компиляции.')
-
-            await Compiler.include_source_files(
-                Compiler.DEFAULT_LIBRARY_ID,
-                '1.0',  # TODO: Версия стандарта?
-                default_library,
-                path
-            )
-            await Compiler.include_source_files(settings.platform_id,
-                                                settings.platform_version,
-                                                settings.build_files,
-                                                path)
-
-            commands_results = await Compiler.compile_project(
-                path,
-                settings.platform_compiler_settings
-            )
-
-            compile_results[sm_id] = (commands_results, sm)
+            files = await StateMachineCache.generate(sm)
         except CodeGenerationException as e:
-            errors[sm_id] = f'Ошибка во время генерации кода! {e.error_data}'
+            errors[sm_id] = (
+                f'Ошибка во время генерации кода! {e.error_data}')
+            continue
+        generate_results[sm_id] = [_create_source_file(name, content)
+                                   for name, content in files.items()]
+    return (errors, generate_results)
 
-    return (errors, compile_results)
+
+async def compile_scheme_locally(
+        xml: str,
+        requested_artifacts: List[str],
+        on_queue_position: Optional[QueuePositionCallback] = None
+) -> CompilerResponse:
+    """
+    Compile CGML scheme in its own workspace of this process.
+
+    Artifacts are embedded to response.
+    """
+    workspace = await WorkspaceManager.allocate()
+    try:
+        base_dir = os.path.join(workspace, 'sketch')
+        await AsyncPath(base_dir).mkdir(parents=True)
+        validation_errors, compiler_result = await compile_xml(
+            xml, base_dir, on_queue_position)
+        return await create_response(validation_errors,
+                                     base_dir,
+                                     compiler_result,
+                                     True,
+                                     requested_artifacts)
+    finally:
+        await WorkspaceManager.release(workspace)
+
+
+async def compile_scheme(
+        xml: str,
+        requested_artifacts: List[str],
+        on_queue_position: Optional[QueuePositionCallback] = None
+) -> CompilerResponse:
+    """Compile CGML scheme by worker, if workers are configured,\
+        otherwise in this process.
+
+    If no worker is available, scheme is compiled in this process.
+    Errors are raised the same way for both,\
+        worker errors as WorkerException.
+    """
+    if WorkerDispatcher.enabled():
+        try:
+            return await WorkerDispatcher.compile(xml,
+                                                  requested_artifacts,
+                                                  on_queue_position)
+        except WorkersUnavailableException as e:
+            await Logger.logger.warning(
+                f'{e} Компиляция в процессе сервера.')
+    return await compile_scheme_locally(xml,
+                                        requested_artifacts,
+                                        on_queue_position)
+
+
+async def compile_scheme_or_error(
+        xml: str,
+        requested_artifacts: List[str]) -> CompilerResponse:
+    """Compile CGML scheme, errors are returned as NOTOK response,\
+        that send_sm_error sends."""
+    try:
+        return await compile_scheme(xml, requested_artifacts)
+    except CGMLException as e:
+        return create_sm_error_response(e.error_data)
+    except WorkerException as e:
+        await Logger.logger.error(str(e))
+        return create_sm_error_response(e.error_data)
+    except CompileQueueFullException as e:
+        await Logger.logger.warning(str(e))
+        return create_sm_error_response({'': str(e)})
+    except Exception:
+        await Logger.logException()
+        return create_sm_error_response({'': 'Internal error!'})
+
+
+class _CGMLBatch:
+    """
+    Compilation of batch items.
+
+    Identical schemes are compiled once, their results are sent\
+        for every item id. Results are kept until the batch ends.
+    Items are compiled concurrently, at most max_jobs at a time,\
+        so large batch doesn't overflow compile scheduler's queue.
+    If compile workers are configured, items are compiled by them.
+    If result can't be sent, e.g. client disconnected,\
+        other items aren't compiled.
+    """
+
+    def __init__(self,
+                 ws: WebSocket,
+                 requested_artifacts: List[str],
+                 max_jobs: int) -> None:
+        self._ws = ws
+        self._requested_artifacts = requested_artifacts
+        self._semaphore = asyncio.Semaphore(max_jobs)
+        self._send_lock = asyncio.Lock()
+        # Хэш схемы -> id элементов, ожидающих результата
+        self._waiting: Dict[str, List[str]] = {}
+        self._results: Dict[str, CompilerResponse] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.count = 0
+
+    async def add(self, item: BatchItem) -> None:
+        """Start compiling item or reuse result of identical scheme."""
+        self.count += 1
+        key = hashlib.sha256(item.scheme.encode('utf-8')).hexdigest()
+        result = self._results.get(key)
+        if result is not None:
+            await self._send(item.id, result)
+            return
+        waiting = self._waiting.get(key)
+        if waiting is not None:
+            waiting.append(item.id)
+            return
+        self._waiting[key] = [item.id]
+        self._tasks.append(asyncio.create_task(
+            self._compile(key, item.scheme)))
+
+    async def _compile(self, key: str, xml: str) -> None:
+        async with self._semaphore:
+            response = await compile_scheme_or_error(
+                xml, self._requested_artifacts)
+        self._results[key] = response
+        try:
+            for item_id in self._waiting.pop(key):
+                await self._send(item_id, response)
+        except Exception:
+            # Результаты некуда отправлять, остальные элементы
+            # не компилируются
+            current = asyncio.current_task()
+            for task in self._tasks:
+                if task is not current:
+                    task.cancel()
+            raise
+
+    async def _send(self, item_id: str, response: CompilerResponse) -> None:
+        async with self._send_lock:
+            await self._ws.send_json({
+                'batch_result': BatchResult(
+                    id=item_id,
+                    response=response
+                ).model_dump()
+            })
+
+    async def wait(self) -> None:
+        """
+        Wait, until all items are compiled and sent.
+
+        Raise the first error of sending results.
+        """
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        for result in results:
+            if (isinstance(result, BaseException) and
+                    not isinstance(result, asyncio.CancelledError)):
+                raise result
+
+    async def cancel(self) -> None:
+        """Stop compiling items."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
 
 
 class HandlerException(Exception):
@@ -236,56 +642,168 @@ class Handler:
     @staticmethod
     async def handle_cgml_compile(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None
-    ) -> web.WebSocketResponse:
-        """Generate code from CGML-scheme and compile it."""
-        config = get_config()
-        if ws is None:
-            ws = web.WebSocketResponse(
-                autoclose=False, max_msg_size=config.max_msg_size)
-            await ws.prepare(request)
+        ws: WebSocket
+    ) -> None:
+        """
+        Generate code from CGML-scheme and compile it.
+
+        If request has stream_output query parameter, compiler output\
+            is sent line by line before CompilerResponse.
+        If request has queue_position query parameter,\
+            {'queue_position': n} is sent, while request waits\
+            for compilation.
+        If request has binary_artifacts query parameter, artifacts\
+            are sent by send_artifacts after CompilerResponse.
+        artifacts query parameter limits returned build files.
+        If request has generate_only query parameter,\
+            handle_cgml_generate is used.
+        If compile workers are configured, scheme is compiled by worker,\
+            unless compiler output or binary artifacts are requested.
+        """
+        if is_generate_only(request):
+            await Handler.handle_cgml_generate(request, ws)
+            return
+        workspace: Optional[str] = None
         try:
             xml = await ws.receive_str()
-            base_dir = os.path.join(
-                config.build_directory,
-                str(datetime.now()).replace(' ', '_').replace(':', '_'),
-                'sketch')
+            if (WorkerDispatcher.enabled() and
+                    not is_output_streaming(request) and
+                    not is_binary_artifacts(request)):
+                response = await compile_scheme(
+                    xml,
+                    get_requested_artifacts(request),
+                    queue_position_sender(request, ws))
+                await Logger.logger.info(response)
+                await ws.send_json(response.model_dump())
+                return
+            workspace = await WorkspaceManager.allocate()
+            base_dir = os.path.join(workspace, 'sketch')
             await AsyncPath(base_dir).mkdir(parents=True)
             validation_errors, compiler_result = await compile_xml(
                 xml,
-                base_dir
+                base_dir,
+                queue_position_sender(request, ws),
+                (compiler_output_sender(ws)
+                 if is_output_streaming(request) else None)
             )
+            binary_artifacts = is_binary_artifacts(request)
+            requested_artifacts = get_requested_artifacts(request)
             response = await create_response(validation_errors, base_dir,
                                              compiler_result,
-                                             )
+                                             not binary_artifacts,
+                                             requested_artifacts)
             await Logger.logger.info(response)
             await ws.send_json(response.model_dump())
+            if binary_artifacts:
+                await send_artifacts(ws,
+                                     await get_response_artifacts(
+                                         base_dir,
+                                         compiler_result,
+                                         requested_artifacts),
+                                     get_artifact_compression(request))
         except CGMLException as e:
             await Logger.logException()
             await send_sm_error(
                 ws,
                 e.error_data
             )
+        except WorkerException as e:
+            await Logger.logger.error(str(e))
+            await send_sm_error(ws, e.error_data)
+        except CompileQueueFullException as e:
+            await Logger.logger.warning(str(e))
+            await send_sm_error(ws, {'': str(e)})
         except Exception:
             await Logger.logException()
             await send_sm_error(ws, {'': 'Internal error!'})
-        return ws
+        finally:
+            if workspace is not None:
+                await WorkspaceManager.release(workspace)
+
+    @staticmethod
+    async def handle_cgml_generate(
+        request: web.Request,
+        ws: WebSocket
+    ) -> None:
+        """
+        Generate code from CGML-scheme without compiling it.
+
+        Send: CompilerResponse without commands and binaries | RequestError
+        """
+        try:
+            xml = await ws.receive_str()
+            response = create_generate_response(*await generate_xml(xml))
+            await Logger.logger.info(response)
+            await ws.send_json(response.model_dump())
+        except CGMLException as e:
+            await Logger.logException()
+            await send_sm_error(
+                ws,
+                e.error_data
+            )
+        except Exception:
+            await Logger.logException()
+            await send_sm_error(ws, {'': 'Internal error!'})
+
+    @staticmethod
+    async def handle_cgml_batch(
+        request: web.Request,
+        ws: WebSocket
+    ) -> None:
+        """
+        Compile many independent CGML-schemes in one request.
+
+        Client sends BatchItem messages, then 'stop'.
+        Send: {'batch_result': BatchResult} for every item\
+            as soon as it's compiled, in order of completion,\
+            then {'batch_done': items count} | RequestError
+        artifacts query parameter limits returned build files.
+        """
+        config = get_config()
+        batch = _CGMLBatch(ws,
+                           get_requested_artifacts(request),
+                           max(config.max_compile_jobs,
+                               WorkerDispatcher.capacity()))
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                if msg.data == 'stop':
+                    break
+                await batch.add(BatchItem.model_validate_json(msg.data))
+            if ws.closed:
+                await batch.cancel()
+                return
+            await batch.wait()
+            await ws.send_json({'batch_done': batch.count})
+        except ValidationError as e:
+            await batch.cancel()
+            await Logger.logger.info(e.errors())
+            await send_sm_error(ws, {
+                '': f'Validation error: {e.errors()}'
+            })
+        except Exception:
+            await batch.cancel()
+            await Logger.logException()
+            await send_sm_error(ws, {'': 'Internal error!'})
 
     @staticmethod
     async def handle_ws_compile(
             request: web.Request,
-            ws: Optional[web.WebSocketResponse] = None):
+            ws: WebSocket) -> None:
         """
         Generate code from Lapki IDE's internal JSON scheme\
             and compile it.
 
-        Send: CompilerResponse | RequestError
+        Send: LegacyResponse | RequestError
+        If request has queue_position query parameter,\
+            {'queue_position': n} is sent, while request waits\
+            for compilation.
+        If request has binary_artifacts query parameter, artifacts\
+            are sent by send_artifacts after LegacyResponse.
+        artifacts query parameter limits returned build files.
         """
-        config = get_config()
-        if ws is None:
-            ws = web.WebSocketResponse(
-                autoclose=False, max_msg_size=config.max_msg_size)
-            await ws.prepare(request)
+        workspace: Optional[str] = None
         try:
             await Logger.logger.info(request)
             a = await ws.receive_str()
@@ -296,9 +814,9 @@ class Handler:
                 raise HandlerException('Internal error: never is reached.')
             compiler = compiler_settings.compiler
             flags: List[str] = compiler_settings.flags
-            dirname = str(datetime.now()) + '/'
-            dirname = dirname.replace(' ', '_')
-            path = os.path.join(config.build_directory, dirname)
+            workspace = await WorkspaceManager.allocate()
+            dirname = workspace + '/'
+            path = dirname
             extension = Compiler.supported_compilers[compiler]['extension'][0]
             parser = CJsonParser()
             components = list(data.components.values())
@@ -306,7 +824,7 @@ class Handler:
             match compiler:
                 case 'g++' | 'gcc':
                     platform = 'cpp'
-                    await AsyncPath(path).mkdir(parents=True)
+                    await AsyncPath(path).mkdir(parents=True, exist_ok=True)
                     sm: StateMachine = parser.parseStateMachine(data)
                     await CppFileWriter(sm).write_to_file(path, extension)
                     libraries = libraries.union(
@@ -343,11 +861,13 @@ class Handler:
                         path)
                     await Logger.logger.info(f'{libraries} included')
 
-            result: CommandResult = await Compiler.compile(
-                path,
-                set(),
-                ['compile', *flags],
-                compiler)
+            async with get_compile_scheduler().slot(
+                    queue_position_sender(request, ws)):
+                result: CommandResult = await Compiler.compile(
+                    path,
+                    set(),
+                    ['compile', *flags],
+                    compiler)
             response = LegacyResponse(
                 result='NOTOK',
                 return_code=result.return_code if result.return_code else 0,
@@ -357,21 +877,17 @@ class Handler:
                 source=[]
             )
 
+            binary_artifacts = is_binary_artifacts(request)
+            artifacts: List[AsyncPath] = []
             if result.return_code == 0:
                 response.result = 'OK'
-                build_path = ''.join(
-                    [config.build_directory, dirname, 'build/'])
-                source_path = ''.join([config.build_directory, dirname])
-                async for path in AsyncPath(build_path).rglob('*'):
-                    if await path.is_file():
-                        async with async_open(path, 'rb') as f:
-                            binary = await f.read()
-                            b64_data: bytes = base64.b64encode(binary)
-                            response.binary.append(File(
-                                filename=path.name.split('.')[0],
-                                extension=''.join(path.suffixes),
-                                fileContent=b64_data.decode('ascii'),
-                            ))
+                build_path = os.path.join(path, 'build/')
+                source_path = path
+                artifacts = await find_artifacts(
+                    build_path, get_requested_artifacts(request))
+                if not binary_artifacts:
+                    for artifact in artifacts:
+                        response.binary.append(await read_artifact(artifact))
 
                 response.source.append(await Handler.readSourceFile(
                     'sketch',
@@ -385,6 +901,11 @@ class Handler:
                 )
             await Logger.logger.info(response)
             await ws.send_json(response.model_dump())
+            if binary_artifacts:
+                await send_artifacts(ws,
+                                     [('', artifact)
+                                      for artifact in artifacts],
+                                     get_artifact_compression(request))
         except KeyError as e:
             await Logger.logger.error('Invalid request, there isnt'
                                       f'{e.args[0]} key.')
@@ -402,6 +923,9 @@ class Handler:
             await send_sm_error(ws, {
                 '': f'Validation error: {e.errors()}'
             }, True)
+        except CompileQueueFullException as e:
+            await Logger.logger.warning(str(e))
+            await send_sm_error(ws, {'': str(e)}, legacy=True)
         except Exception:
             await Logger.logException()
             await send_sm_error(
@@ -412,7 +936,9 @@ class Handler:
                 legacy=True
             )
             await ws.close()
-        return ws
+        finally:
+            if workspace is not None:
+                await WorkspaceManager.release(workspace)
 
     @staticmethod
     def calculateBearlogaId() -> str:
@@ -422,16 +948,12 @@ class Handler:
     @staticmethod
     async def handle_berloga_import(
             request: web.Request,
-            ws: Optional[web.WebSocketResponse] = None):
+            ws: WebSocket) -> None:
         """
         Generate Lapki IDE's internal JSON scheme from yed-GraphMl.
 
         Send: CompilerResponse | RequestError
         """
-        config = get_config()
-        if ws is None:
-            ws = web.WebSocketResponse(max_msg_size=config.max_msg_size)
-            await ws.prepare(request)
         unprocessed_xml = await ws.receive_str()
         filename_without_extension = await ws.receive_str()
 
@@ -475,21 +997,15 @@ class Handler:
                 legacy=True
             )
 
-        return ws
-
     @staticmethod
     async def handle_berloga_export(
             request: web.Request,
-            ws: Optional[web.WebSocketResponse] = None):
+            ws: WebSocket) -> None:
         """
         Generate yed-GraphMl from Lapki IDE's internal JSON scheme.
 
         Send: File | RequestError
         """
-        config = get_config()
-        if ws is None:
-            ws = web.WebSocketResponse(max_msg_size=config.max_msg_size)
-            await ws.prepare(request)
         data = IdeStateMachine(**json.loads(await ws.receive_str()))
         filename = await ws.receive_str()
         await Logger.logger.info(data)
@@ -517,7 +1033,6 @@ class Handler:
                     f'key {e.args[0]}'
                 },
                 legacy=True)
-            return ws
         except Exception as e:
             await Logger.logException()
             await send_sm_error(
@@ -525,5 +1040,3 @@ class Handler:
                 {'': 'Something went wrong'
                  f'{e.args[0]}'},
                 legacy=True)
-            return ws
-        return ws
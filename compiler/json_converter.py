@@ -3,10 +3,10 @@ from typing import Any, Dict, List
 from copy import deepcopy
 
 import xmltodict
-from aiohttp.web import WebSocketResponse
 from compiler.types.ide_types import InitialState, Point
 from compiler.fullgraphmlparser.stateclasses import ParserState
 from compiler.logger import Logger
+from compiler.types.ws_types import WebSocket
 
 
 DEFAULT_TRANSITION_DATA = {
@@ -55,7 +55,7 @@ DEFAULT_TRANSITION_DATA = {
 class JsonConverter:
     """Класс для экспорта в берлогу."""
 
-    def __init__(self, ws: WebSocketResponse) -> None:
+    def __init__(self, ws: WebSocket) -> None:
         self.ws = ws
         self.transitions: List[Dict[str, Any]] = []
 
@@ -0,0 +1,65 @@
+"""Module implements staging of platform library files into projects."""
+import os
+import asyncio
+from typing import Iterable
+
+import aioshutil
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl FICLONE из linux/fs.h
+_FICLONE = 0x40049409
+
+
+def _reflink(source: str, target: str) -> bool:
+    """Clone file with copy-on-write, if filesystem supports it."""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+
+
+def _link(source: str, target: str) -> bool:
+    """
+    Make target share data with source without copying.
+
+    Existing target is replaced. Try hardlink, then reflink.\
+        Return False, if both are not supported.
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        return _reflink(source, target)
+
+
+async def _stage_file(source: str, target: str) -> None:
+    # Клонирование читает и пишет файлы, поэтому выполняется в потоке
+    if not await asyncio.to_thread(_link, source, target):
+        await aioshutil.copy(source, target)
+
+
+async def stage_files(paths: Iterable[str], target_directory: str) -> None:
+    """
+    Put files to target directory, keeping only their names.
+
+    Platform sources are immutable, so files are hardlinked or reflinked.
+    If filesystem doesn't support links, files are copied in-process.
+    No processes are spawned. Raise OSError, if source file doesn't exist.
+    """
+    await asyncio.gather(*(
+        _stage_file(path,
+                    os.path.join(target_directory, os.path.basename(path)))
+        for path in paths
+    ))
@@ -1,6 +1,7 @@
 """Root module."""
-from typing import NoReturn
 import asyncio
+import os
+import signal
 
 from aiohttp import web
 from compiler.routes import setup_routes
@@ -12,17 +13,41 @@ from compiler.platform_manager import PlatformManager
 from compiler.access_controller import AccessController
 from compiler.logger import Logger
 from compiler.types.config_types import ArgumentParser
-from compiler.os_commands import init_os_commands
+from compiler.fullgraphmlparser.template_cache import TemplateCache
+from compiler.arduino_daemon import ArduinoDaemonPool
+from compiler.workspace_manager import WorkspaceManager
+from compiler.worker_dispatcher import WorkerDispatcher
+from compiler import compile_worker
 
 
-async def main() -> NoReturn:
+async def run_worker(address: str) -> None:
+    """Run stateless compile worker on address."""
+    config = get_config()
+    await Logger.init_logger()
+    await PlatformManager().init_platforms(config.platform_directory)
+    TemplateCache.reload()
+    await WorkspaceManager.start(cleanup_stale=False)
+    server = await compile_worker.serve(address)
+    print(f'Сборщик запущен на {address}...')
+    try:
+        async with server:
+            # Локальный сборщик закрывается вместе с запустившим его сервером
+            await server.wait_closed()
+    finally:
+        await ArduinoDaemonPool.close()
+        await WorkspaceManager.stop()
+
+
+async def main() -> None:
     """Config and running app."""
-    init_os_commands()
     args_parser = ArgumentParser()
-    app = web.Application()
-    setup_routes(app)
     configure(args_parser)
     config = get_config()
+    if config.worker_listen != '':
+        await run_worker(config.worker_listen)
+        return
+    app = web.Application()
+    setup_routes(app)
     runner = web.AppRunner(app)
     await runner.setup()
     platform_manager = PlatformManager()
@@ -32,10 +57,22 @@ async def main() -> NoReturn:
                        port=config.server_port)
     await Logger.init_logger()
     await platform_manager.init_platforms(config.platform_directory)
+    TemplateCache.reload()
+    await WorkspaceManager.start()
+    await WorkerDispatcher.start()
+    if os.name == 'posix':
+        # kill -HUP <pid> перечитывает шаблоны без перезапуска
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP,
+                                                      TemplateCache.reload)
     await site.start()
     print('Модуль компилятора запущен...')
-    while True:
-        await asyncio.sleep(3600)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await WorkerDispatcher.stop()
+        await ArduinoDaemonPool.close()
+        await WorkspaceManager.stop()
 
 
 def sync_main():
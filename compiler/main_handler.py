@@ -1,4 +1,5 @@
 """Module implement main route handler."""
+from dataclasses import dataclass
 from typing import get_args
 
 import aiohttp
@@ -7,80 +8,127 @@ from compiler.logger import Logger
 from compiler.config import get_config
 from compiler.handler import Handler
 from compiler.platform_handler import PlatformHandler
-from compiler.types.ws_types import Message
+from compiler.pipelined_session import (
+    PipelinedRequest,
+    PipelinedSession,
+    parse_tagged_message
+)
+from compiler.types.ws_types import Message, WebSocket
+
+
+@dataclass
+class _Connection:
+    request: web.Request
+    token: str | None = None
+
+
+async def _handle_command(command: str,
+                          connection: _Connection,
+                          ws: WebSocket) -> None:
+    request = connection.request
+    match command:
+        case 'close':
+            await ws.close()
+        case 'arduino':
+            # Я не понимаю, у pyright какие-то проблемы
+            # с моими асинхронными функциями
+            # type: ignore
+            await Handler.handle_ws_compile(request, ws)
+        case 'berlogaImport':
+            # type: ignore
+            await Handler.handle_berloga_import(request, ws)
+        case 'berlogaExport':
+            await Handler.handle_berloga_export(request, ws)
+        case 'cgml':
+            await Handler.handle_cgml_compile(request, ws)
+        case 'cgml_generate':
+            await Handler.handle_cgml_generate(request, ws)
+        case 'cgml_batch':
+            await Handler.handle_cgml_batch(request, ws)
+        case 'add_platform':
+            await PlatformHandler.handle_add_platform(
+                request,
+                ws,
+                connection.token
+            )
+        case 'remove_platform':
+            await PlatformHandler.handle_remove_platform(
+                request,
+                ws,
+                connection.token
+            )
+        case 'remove_platform_versions':
+            await PlatformHandler.handle_remove_platform_by_versions(
+                request,
+                ws,
+                connection.token
+            )
+        case 'update_platform':
+            await PlatformHandler.handle_update_platform(
+                request,
+                ws,
+                connection.token
+            )
+        case 'get_platform_json':
+            await PlatformHandler.handle_get_platform_by_id(
+                request,
+                ws
+            )
+        case 'get_platform_images':
+            await PlatformHandler.handle_get_platform_images(
+                request,
+                ws
+            )
+        case 'get_platform_sources':
+            await PlatformHandler.handle_get_platform_source_files(
+                request,
+                ws
+            )
+        case 'auth':
+            connection.token = await PlatformHandler.handle_auth(ws)
+        case _:
+            await ws.send_str(f'Unknown {command}!'
+                              f'Use {get_args(Message)}'
+                              )
 
 
 async def main_handle(request: web.Request) -> web.WebSocketResponse:
-    """Root handler, call other handlers."""
+    """
+    Root handler, call other handlers.
+
+    Command can be sent as plain text, then it's handled before\
+        next message is read.
+    Command can be sent as TaggedMessage with request id,\
+        then it's handled in PipelinedSession concurrently with\
+        other requests, and next TaggedMessages with the same id\
+        are passed to its handler.
+    Request uses token, which was set when the request was started.
+    """
+    config = get_config()
     ws = web.WebSocketResponse(
-        autoclose=False, max_msg_size=get_config().max_msg_size)
+        autoclose=False, max_msg_size=config.max_msg_size,
+        compress=bool(config.websocket_compression))
     await ws.prepare(request)
     await Logger.logger.info(request)
-    token: str | None = None
-    async for msg in ws:
-        await Logger.logger.info(msg)
-        if msg.type == aiohttp.WSMsgType.TEXT:
-            match msg.data:
-                case 'close':
-                    await ws.close()
-                case 'arduino':
-                    # Я не понимаю, у pyright какие-то проблемы
-                    # с моими асинхронными функциями
-                    # type: ignore
-                    await Handler.handle_ws_compile(request, ws)
-                case 'berlogaImport':
-                    # type: ignore
-                    await Handler.handle_berloga_import(request, ws)
-                case 'berlogaExport':
-                    await Handler.handle_berloga_export(request, ws)
-                case 'cgml':
-                    await Handler.handle_cgml_compile(request, ws)
-                case 'add_platform':
-                    await PlatformHandler.handle_add_platform(
-                        request,
-                        ws,
-                        token
-                    )
-                case 'remove_platform':
-                    await PlatformHandler.handle_remove_platform(
-                        request,
-                        ws,
-                        token
-                    )
-                case 'remove_platform_versions':
-                    await PlatformHandler.handle_remove_platform_by_versions(
-                        request,
-                        ws,
-                        token
-                    )
-                case 'update_platform':
-                    await PlatformHandler.handle_update_platform(
-                        request,
-                        ws,
-                        token
-                    )
-                case 'get_platform_json':
-                    await PlatformHandler.handle_get_platform_by_id(
-                        request,
-                        ws
-                    )
-                case 'get_platform_images':
-                    await PlatformHandler.handle_get_platform_images(
-                        request,
-                        ws
-                    )
-                case 'get_platform_sources':
-                    await PlatformHandler.handle_get_platform_source_files(
-                        request,
-                        ws
-                    )
-                case 'auth':
-                    token = await PlatformHandler.handle_auth(ws)
-                case _:
-                    await ws.send_str(f'Unknown {msg}!'
-                                      f'Use {get_args(Message)}'
-                                      )
-        elif msg.type == aiohttp.WSMsgType.ERROR:
-            pass
+    connection = _Connection(request)
+
+    async def handle_pipelined(command: str,
+                               pipelined_request: PipelinedRequest) -> None:
+        await _handle_command(command, connection, pipelined_request)
+
+    session = PipelinedSession(ws, handle_pipelined)
+    try:
+        async for msg in ws:
+            await Logger.logger.info(msg)
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                tagged_message = parse_tagged_message(msg.data)
+                if tagged_message is not None:
+                    await session.dispatch(tagged_message)
+                else:
+                    await _handle_command(msg.data, connection, ws)
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                pass
+    finally:
+        await session.close()
 
     return ws
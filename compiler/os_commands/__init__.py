@@ -1,2 +0,0 @@
-"""Module contains os_commands variable."""
-from .os_dependent_commands import os_commands, init_os_commands
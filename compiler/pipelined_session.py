@@ -0,0 +1,197 @@
+"""Module implements several requests in flight on one websocket."""
+import asyncio
+import base64
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from aiohttp import web
+from pydantic import ValidationError
+from compiler.logger import Logger
+from compiler.types.ws_types import (
+    RequestId,
+    TaggedMessage,
+    TaggedResponse,
+    TaggedResponseType
+)
+
+# Максимальное количество одновременно обрабатываемых запросов соединения
+_MAX_REQUESTS_IN_FLIGHT = 32
+# Количество запоминаемых завершенных и отклоненных запросов соединения
+_MAX_FINISHED_REQUESTS = 1024
+
+# Аргументы: команда, канал запроса
+RequestHandler = Callable[[str, 'PipelinedRequest'], Awaitable[None]]
+
+
+def parse_tagged_message(data: str) -> Optional[TaggedMessage]:
+    """Get TaggedMessage, if data is JSON object with request_id."""
+    if not data.startswith('{'):
+        return None
+    try:
+        return TaggedMessage.model_validate_json(data)
+    except ValidationError:
+        return None
+
+
+class PipelinedRequest:
+    """
+    Channel of one request with id, used by handlers as websocket.
+
+    Handler receives only messages of its request,\
+        every sent message is wrapped in TaggedResponse.
+    Binary frame is sent right after TaggedResponse with type binary\
+        and frame size.
+    close() finishes only this request, not connection.
+    """
+
+    def __init__(self,
+                 request_id: RequestId,
+                 ws: web.WebSocketResponse,
+                 send_lock: asyncio.Lock) -> None:
+        self.request_id = request_id
+        self._ws = ws
+        self._send_lock = send_lock
+        self._inbox: asyncio.Queue[str] = asyncio.Queue()
+        self._closed = False
+
+    def put(self, message: Any) -> None:
+        """Pass client message to handler."""
+        self._inbox.put_nowait(message if isinstance(message, str)
+                               else json.dumps(message))
+
+    @property
+    def closed(self) -> bool:
+        """Is request finished or connection closed."""
+        return self._closed or self._ws.closed
+
+    async def receive_str(self) -> str:
+        """Receive next message of request."""
+        return await self._inbox.get()
+
+    async def receive_json(self) -> Any:
+        """Receive next message of request and decode it."""
+        return json.loads(await self.receive_str())
+
+    async def receive_bytes(self) -> bytes:
+        """Receive next message of request, encoded to base64."""
+        return base64.b64decode(await self.receive_str())
+
+    def __aiter__(self) -> 'PipelinedRequest':
+        return self
+
+    async def __anext__(self) -> aiohttp.WSMessage:
+        if self.closed:
+            raise StopAsyncIteration
+        return aiohttp.WSMessage(aiohttp.WSMsgType.TEXT,
+                                 await self.receive_str(),
+                                 None)
+
+    async def send(self,
+                   response_type: TaggedResponseType,
+                   data: Any = None) -> None:
+        """Send TaggedResponse of this request."""
+        async with self._send_lock:
+            await self._ws.send_json(TaggedResponse(
+                request_id=self.request_id,
+                type=response_type,
+                data=data
+            ).model_dump())
+
+    async def send_str(self, data: str) -> None:
+        """Send text message of handler."""
+        await self.send('text', data)
+
+    async def send_json(self, data: Any) -> None:
+        """Send JSON message of handler."""
+        await self.send('json', data)
+
+    async def send_bytes(self, data: bytes) -> None:
+        """Send binary message of handler."""
+        async with self._send_lock:
+            await self._ws.send_json(TaggedResponse(
+                request_id=self.request_id,
+                type='binary',
+                data=len(data)
+            ).model_dump())
+            await self._ws.send_bytes(data)
+
+    async def close(self) -> None:
+        """Finish request."""
+        self._closed = True
+
+
+class PipelinedSession:
+    """
+    Requests with id of one connection.
+
+    Every request is handled in its own task, so responses\
+        of different requests can come out of order.
+    After handler is finished, TaggedResponse with type done is sent.
+    Id of finished or rejected request can't be reused: its messages\
+        are answered by TaggedResponse with type error.
+    """
+
+    def __init__(self,
+                 ws: web.WebSocketResponse,
+                 handler: RequestHandler) -> None:
+        self._ws = ws
+        self._handler = handler
+        self._send_lock = asyncio.Lock()
+        self._requests: Dict[RequestId, PipelinedRequest] = {}
+        self._tasks: Dict[RequestId, asyncio.Task] = {}
+        self._finished: 'OrderedDict[RequestId, None]' = OrderedDict()
+
+    def _finish(self, request_id: RequestId) -> None:
+        self._finished[request_id] = None
+        self._finished.move_to_end(request_id)
+        while len(self._finished) > _MAX_FINISHED_REQUESTS:
+            self._finished.popitem(last=False)
+
+    async def dispatch(self, message: TaggedMessage) -> None:
+        """Start new request or pass message to running request."""
+        request = self._requests.get(message.request_id)
+        if request is not None:
+            request.put(message.message)
+            return
+        request = PipelinedRequest(message.request_id,
+                                   self._ws,
+                                   self._send_lock)
+        if message.request_id in self._finished:
+            # Продолжение завершенного или отклоненного запроса
+            # не должно выполняться как новая команда
+            await request.send('error',
+                               'Запрос с этим id завершен или отклонен.')
+            return
+        if len(self._requests) >= _MAX_REQUESTS_IN_FLIGHT:
+            self._finish(message.request_id)
+            await request.send('error',
+                               'Слишком много одновременных запросов.')
+            return
+        self._requests[message.request_id] = request
+        self._tasks[message.request_id] = asyncio.create_task(
+            self._run(request, str(message.message)))
+
+    async def _run(self, request: PipelinedRequest, command: str) -> None:
+        try:
+            await self._handler(command, request)
+        except Exception:
+            await Logger.logException()
+        finally:
+            del self._requests[request.request_id]
+            del self._tasks[request.request_id]
+            self._finish(request.request_id)
+        try:
+            if not self._ws.closed:
+                await request.send('done')
+        except ConnectionError:
+            # Клиент отключился, пока обрабатывался запрос
+            pass
+
+    async def close(self) -> None:
+        """Cancel unfinished requests."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
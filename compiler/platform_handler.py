@@ -15,9 +15,9 @@ from compiler.access_controller import (
     AccessController,
     AccessControllerException
 )
-from compiler.config import get_config
 from compiler.types.inner_types import File
 from compiler.types.platform_types import Platform
+from compiler.types.ws_types import WebSocket
 
 
 class PlatformHandlerException(Exception):
@@ -94,7 +94,7 @@ Images = List[File]
 SourceFiles = List[File]
 
 
-async def _get_platform_sources(ws: web.WebSocketResponse,
+async def _get_platform_sources(ws: WebSocket,
                                 visual: bool,
                                 compile: bool) -> tuple[Images, SourceFiles]:
     source_files: List[File] = []
@@ -129,26 +129,16 @@ async def _get_platform_sources(ws: web.WebSocketResponse,
     return images, source_files
 
 
-async def _prepare_request(ws: Optional[web.WebSocketResponse],
-                           request: web.Request) -> web.WebSocketResponse:
-    if ws is None:
-        ws = web.WebSocketResponse(
-            autoclose=False, max_msg_size=get_config().max_msg_size)
-        await ws.prepare(request)
-    return ws
-
-
 class PlatformHandler:
     """Class for handling requests CRUD-operations with platforms."""
 
     @staticmethod
     async def handle_add_platform(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None,
+        ws: WebSocket,
         access_token: Optional[str] = None
-    ) -> web.WebSocketResponse:
+    ) -> None:
         """Validate and save platform."""
-        ws = await _prepare_request(ws, request)
         try:
             if access_token is None:
                 access_token = await ws.receive_str()
@@ -167,15 +157,13 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
     async def handle_get_platform_by_id(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None
-    ) -> web.WebSocketResponse:
+        ws: WebSocket
+    ) -> None:
         """Get platform json scheme."""
-        ws = await _prepare_request(ws, request)
         try:
             platform_id = await ws.receive_str()
             version = await ws.receive_str()
@@ -187,15 +175,13 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
     async def handle_get_platform_source_files(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None
-    ) -> web.WebSocketResponse:
+        ws: WebSocket
+    ) -> None:
         """Get platform source-code files."""
-        ws = await _prepare_request(ws, request)
         try:
             platform_manager = PlatformManager()
             platform_id = await ws.receive_str()
@@ -211,15 +197,13 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
     async def handle_get_platform_images(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None,
-    ) -> web.WebSocketResponse:
+        ws: WebSocket,
+    ) -> None:
         """Get platform s images."""
-        ws = await _prepare_request(ws, request)
         try:
             platform_id = await ws.receive_str()
             version = await ws.receive_str()
@@ -235,16 +219,14 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
     async def handle_update_platform(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None,
+        ws: WebSocket,
         access_token: Optional[str] = None
-    ) -> web.WebSocketResponse:
+    ) -> None:
         """Update platform by id."""
-        ws = await _prepare_request(ws, request)
         try:
             if access_token is None:
                 access_token = await ws.receive_str()
@@ -263,19 +245,17 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
     async def handle_remove_platform_by_versions(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None,
+        ws: WebSocket,
         access_token: str | None = None
-    ) -> web.WebSocketResponse:
+    ) -> None:
         """Remove platform by versions and platform id.
 
         Versions is a string like "v1.0, 2.0, 3.0".
         """
-        ws = await _prepare_request(ws, request)
         try:
             if access_token is None:
                 access_token = await ws.receive_str()
@@ -291,16 +271,14 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
     async def handle_remove_platform(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None,
+        ws: WebSocket,
         access_token: str | None = None
-    ) -> web.WebSocketResponse:
+    ) -> None:
         """Remove all versions of platform."""
-        ws = await _prepare_request(ws, request)
         try:
             if access_token is None:
                 access_token = await ws.receive_str()
@@ -315,10 +293,9 @@ class PlatformHandler:
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
 
     @staticmethod
-    async def handle_auth(ws: web.WebSocketResponse) -> str | None:
+    async def handle_auth(ws: WebSocket) -> str | None:
         """Check token."""
         try:
             token = await ws.receive_str()
@@ -334,15 +311,11 @@ class PlatformHandler:
 
     @staticmethod
     async def handle_get_list(request: web.Request,
-                              ws: Optional[web.WebSocketResponse] = None
-                              ) -> web.WebSocketResponse:
+                              ws: WebSocket) -> None:
         """Get list of all platforms."""
-        ws = await _prepare_request(ws, request)
         try:
             platform_list = _get_platforms_list()
             await ws.send_json(platform_list)
-            return ws
         except Exception:
             await Logger.logException()
             await send_error(ws, 'Internal error!')
-        return ws
@@ -2,8 +2,10 @@
 import asyncio
 import json
 import os
+import re
 import uuid
 import traceback
+from collections import OrderedDict
 from copy import deepcopy
 from typing import (
     AsyncGenerator,
@@ -20,11 +22,17 @@ from pprint import pprint
 from aiofile import async_open
 from aiopath import AsyncPath
 from compiler.config import get_config
+from compiler.build_cache import BuildCache
+from compiler.precompiled_cache import PrecompiledCache
+from compiler.Timer import Timer
 from compiler.types.inner_types import File
 from compiler.types.platform_types import PlatformMeta, Platform
 
 PlatformId = str
 PlatformVersion = str
+# Поля схемы платформы, которые нужны при запуске
+_META_FIELDS = ('id', 'version', 'name', 'author')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
 
 
 async def _write_source(path: str, source_files: List[File]) -> None:
@@ -119,6 +127,100 @@ async def _read_platform_files(
                        fileContent=content)
 
 
+def read_platform_meta(data: str) -> Dict[str, str]:
+    """
+    Read id, version, name and author from platform JSON scheme.
+
+    Top-level keys are read one by one, reading stops,\
+        when all fields are found, so usually components\
+        aren't parsed. The scheme isn't validated.
+
+    Raise ValueError, if scheme isn't JSON object or id, name\
+        or version is missing.
+    """
+    decoder = json.JSONDecoder()
+
+    def skip_whitespace(idx: int) -> int:
+        match = _JSON_WHITESPACE.match(data, idx)
+        assert match is not None
+        return match.end()
+
+    idx = skip_whitespace(0)
+    if data[idx:idx + 1] != '{':
+        raise ValueError('Platform scheme must be JSON object.')
+    idx = skip_whitespace(idx + 1)
+    meta: Dict[str, str] = {}
+    while data[idx:idx + 1] != '}' and len(meta) < len(_META_FIELDS):
+        key, idx = decoder.raw_decode(data, idx)
+        idx = skip_whitespace(idx)
+        if data[idx:idx + 1] != ':':
+            raise ValueError(f'Expected ":" at {idx}.')
+        value, idx = decoder.raw_decode(data, skip_whitespace(idx + 1))
+        if key in _META_FIELDS:
+            if not isinstance(value, str):
+                raise ValueError(f'Field {key} must be string.')
+            meta[key] = value
+        idx = skip_whitespace(idx)
+        if data[idx:idx + 1] == ',':
+            idx = skip_whitespace(idx + 1)
+    for field in ('id', 'name', 'version'):
+        if not meta.get(field):
+            raise ValueError(f'Platform scheme has no field {field}.')
+    meta.setdefault('author', '')
+    return meta
+
+
+async def _load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load manifest of platform schemes, return empty dict on errors."""
+    if path == '' or not await AsyncPath(path).is_file():
+        return {}
+    try:
+        async with async_open(path, 'r') as f:
+            manifest = json.loads(await f.read())
+        if isinstance(manifest, dict):
+            return manifest
+    except (OSError, ValueError):
+        ...
+    return {}
+
+
+async def _save_manifest(path: str,
+                         manifest: Dict[str, Dict[str, Any]]) -> None:
+    if path == '':
+        return
+    try:
+        await AsyncPath(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        async with async_open(tmp_path, 'w') as f:
+            await f.write(json.dumps(manifest))
+        os.replace(tmp_path, path)
+    except OSError:
+        print(f'Не удалось сохранить манифест платформ "{path}"!')
+
+
+async def _scan_platform(
+        path: AsyncPath,
+        manifest: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Get manifest entry of platform scheme.
+
+    If file's size and modification time are the same as in manifest,\
+        file isn't read. Otherwise the whole scheme is validated,\
+        so broken schemes don't get into manifest.
+    """
+    stat = await path.stat()
+    entry = manifest.get(str(path))
+    if (entry is not None and
+            entry.get('mtime') == stat.st_mtime_ns and
+            entry.get('size') == stat.st_size):
+        return entry
+    async with async_open(path, 'r') as f:
+        data = await f.read()
+    meta = read_platform_meta(data)
+    Platform(**json.loads(data))
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'meta': meta}
+
+
 class PlatformException(Exception):
     """Error during process platforms."""
 
@@ -129,8 +231,9 @@ class PlatformManager:
     """
     Класс-синглтон, отвечающий за загрузку платформ.
 
-    TODO: А также их удаление из памяти, если их не используют
-    какое-то время.
+    А также их удаление из памяти, если их не используют
+    PLATFORM_TTL секунд, или загружено больше MAX_LOADED_PLATFORMS
+    платформ (удаляются давно не использованные).
     """
 
     _instance: Optional['PlatformManager'] = None
@@ -138,8 +241,14 @@ class PlatformManager:
 
     def __init__(self) -> None:
         if not self._initialized:
-            self.__platforms: Dict[str, Platform] = {}
+            # Порядок - от давно использованных к недавно использованным
+            self.__platforms: OrderedDict[str, Platform] = OrderedDict()
             self.__versions_info: Dict[PlatformId, PlatformMeta] = {}
+            # id -> версия -> путь до JSON-схемы
+            self.__paths: Dict[PlatformId, Dict[PlatformVersion, str]] = {}
+            self.__unload_timers: Dict[str, Timer] = {}
+            # Загружаемые сейчас платформы
+            self.__loading: Dict[str, asyncio.Task[Platform]] = {}
             self._initialized = True
 
     def __new__(cls, *args, **kwargs) -> 'PlatformManager':
@@ -159,7 +268,9 @@ class PlatformManager:
 
     @platforms.setter
     def platforms(self, new_value: Dict[str, Platform]):
-        self.__platforms = new_value
+        self.__platforms = OrderedDict(new_value)
+        self._cancel_unload_timers(set(self.__unload_timers) -
+                                   set(self.__platforms))
 
     @property
     def versions_info(self):
@@ -192,6 +303,9 @@ class PlatformManager:
             raise PlatformException(
                 f'Platform with id {platform.id} is already exist.')
         await self._save_platform(platform, source_files, images)
+        self._index_path(platform.id,
+                         platform.version,
+                         get_path_to_platform(platform.id, platform.version))
         new_versions_info = deepcopy(self.__versions_info)
         new_versions_info[platform.id] = PlatformMeta(
             versions=set((platform.version,)),
@@ -234,6 +348,63 @@ class PlatformManager:
         if images is not None:
             await _write_source(img_path, images)
 
+    def _index_path(self,
+                    platform_id: str,
+                    version: str,
+                    path: str | AsyncPath) -> None:
+        self.__paths.setdefault(platform_id, {})[version] = str(path)
+
+    def _unindex_versions(self, platform_id: str, versions: Set[str]) -> None:
+        paths = self.__paths.get(platform_id, {})
+        for version in versions:
+            paths.pop(version, None)
+        if not paths:
+            self.__paths.pop(platform_id, None)
+
+    def get_platform_path(self, platform_id: str, version: str) -> str:
+        """Get path to platform JSON scheme from index."""
+        path = self.__paths.get(platform_id, {}).get(version)
+        if path is None:
+            return get_path_to_platform(platform_id, version)
+        return path
+
+    def _cancel_unload_timers(self, full_platform_names: Set[str]) -> None:
+        """Cancel unload timers of platforms, removed from memory."""
+        for full_platform_name in full_platform_names:
+            timer = self.__unload_timers.pop(full_platform_name, None)
+            if timer is not None:
+                timer.cancel()
+
+    async def _unload(self, full_platform_name: str) -> None:
+        """Remove platform from memory, called by unload timer."""
+        self.__unload_timers.pop(full_platform_name, None)
+        self.__platforms.pop(full_platform_name, None)
+
+    def _touch(self, full_platform_name: str) -> None:
+        """Mark platform as recently used and restart its unload timer."""
+        self.__platforms.move_to_end(full_platform_name)
+        timer = self.__unload_timers.get(full_platform_name)
+        if timer is not None:
+            timer.restart()
+
+    def _cache_platform(self,
+                        full_platform_name: str,
+                        platform: Platform) -> None:
+        """Add platform to memory, evict least recently used platforms."""
+        config = get_config()
+        self.__platforms[full_platform_name] = platform
+        self._cancel_unload_timers({full_platform_name})
+        if config.platform_ttl > 0:
+            timer = Timer(config.platform_ttl,
+                          self._unload,  # type: ignore
+                          (full_platform_name,))
+            timer.start()
+            self.__unload_timers[full_platform_name] = timer
+        while (config.max_loaded_platforms > 0 and
+               len(self.__platforms) > config.max_loaded_platforms):
+            evicted, _ = self.__platforms.popitem(last=False)
+            self._cancel_unload_timers({evicted})
+
     async def load_platform(self,
                             path_to_platform: str | AsyncPath) -> Platform:
         """Load platform from file and add it to dict."""
@@ -248,7 +419,10 @@ class PlatformManager:
                 )
 
                 if self.__platforms.get(full_platform_name, None) is None:
-                    self.__platforms[full_platform_name] = platform
+                    self._cache_platform(full_platform_name, platform)
+                    self._index_path(platform.id,
+                                     platform.version,
+                                     path_to_platform)
                 else:
                     raise PlatformException(
                         f'Platform with id {platform.id} and version '
@@ -269,39 +443,61 @@ class PlatformManager:
                 f'произошла ошибка! {e}')
 
     async def init_platforms(self, path_to_schemas_dir: str) -> None:
-        """Find platforms in directory and add it to Dict."""
+        """
+        Find platforms in directory and add it to Dict.
+
+        Files are scanned concurrently, only metadata is read from them.
+        Metadata is saved to PLATFORM_MANIFEST, so unchanged\
+            files aren't read on next start.
+        Schemes are validated, when they are added to manifest.
+        """
         print(f'Поиск схем в папке "{path_to_schemas_dir}"...')
-        async for path in AsyncPath(path_to_schemas_dir).rglob('*json'):
-            try:
-                async with async_open(path, 'r') as f:
-                    unprocessed_platform_data: str = await f.read()
-                    platform = Platform(
-                        **json.loads(unprocessed_platform_data))
-                    id = platform.id
-                    if self.platform_exist(id):
-                        versions = (
-                            self.__versions_info[id].versions)
-                        versions.add(
-                            platform.version)
-                    else:
-                        self.__versions_info[id] = PlatformMeta(
-                            versions=set((platform.version,)),
-                            name=platform.name,
-                            author=platform.author)
-            except Exception:
+        manifest_path = get_config().platform_manifest
+        manifest = await _load_manifest(manifest_path)
+        paths = sorted([path async for path in
+                        AsyncPath(path_to_schemas_dir).rglob('*json')])
+        entries = await asyncio.gather(
+            *(_scan_platform(path, manifest) for path in paths),
+            return_exceptions=True)
+        new_manifest: Dict[str, Dict[str, Any]] = {}
+        for path, entry in zip(paths, entries):
+            if isinstance(entry, BaseException):
                 print(
                     f'Во время обработки файла "{await path.absolute()}"'
-                    f'произошла ошибка!' + '\n' + traceback.format_exc())
+                    f'произошла ошибка!' + '\n' + ''.join(
+                        traceback.format_exception(entry)))
+                continue
+            new_manifest[str(path)] = entry
+            meta: Dict[str, str] = entry['meta']
+            id = meta['id']
+            self._index_path(id, meta['version'], path)
+            if self.platform_exist(id):
+                versions = (
+                    self.__versions_info[id].versions)
+                versions.add(meta['version'])
+            else:
+                self.__versions_info[id] = PlatformMeta(
+                    versions=set((meta['version'],)),
+                    name=meta['name'],
+                    author=meta['author'])
+        if new_manifest != manifest:
+            await _save_manifest(manifest_path, new_manifest)
 
         print('Были найдены платформы:')
         pprint(dict(self.__versions_info), indent=3)
 
     async def get_platform(self, platform_id: str, version: str) -> Platform:
-        """Get platform object by id."""
+        """
+        Get platform object by id.
+
+        If platform isn't loaded, load it. Concurrent calls\
+            for the same platform wait for one load.
+        """
         full_platform_name = get_full_platform_name(platform_id, version)
         platform: Platform | None = self.__platforms.get(full_platform_name)
 
         if platform is not None:
+            self._touch(full_platform_name)
             return platform
 
         if (version not in
@@ -309,8 +505,24 @@ class PlatformManager:
             raise PlatformException(
                 f'Unsupported platform {platform_id}, version {version}')
 
-        return await self.load_platform(
-            get_path_to_platform(platform_id, version))
+        task = self.__loading.get(full_platform_name)
+        if task is None:
+            task = asyncio.create_task(self._load_once(
+                full_platform_name,
+                self.get_platform_path(platform_id, version)))
+            self.__loading[full_platform_name] = task
+            task.add_done_callback(
+                lambda _: self.__loading.pop(full_platform_name, None))
+        # Отмена одного из ожидающих запросов не отменяет загрузку
+        return await asyncio.shield(task)
+
+    async def _load_once(self,
+                         full_platform_name: str,
+                         path_to_platform: str) -> Platform:
+        platform = self.__platforms.get(full_platform_name)
+        if platform is not None:
+            return platform
+        return await self.load_platform(path_to_platform)
 
     def is_loaded(self, platform_id: str, version: str) -> bool:
         """Is platform loaded ar __platforms."""
@@ -334,7 +546,7 @@ class PlatformManager:
         if not self.has_version(platform_id, version):
             raise PlatformException(f'Unsupported platform {platform_id}')
 
-        path_to_platform = get_path_to_platform(platform_id, version)
+        path_to_platform = self.get_platform_path(platform_id, version)
         async with async_open(path_to_platform, 'r') as f:
             return await f.read()
 
@@ -371,6 +583,11 @@ class PlatformManager:
                 f'already has version {platform.version}'
             )
         await self._save_platform(platform, source_files, images)
+        self._index_path(platform.id,
+                         platform.version,
+                         get_path_to_platform(platform.id, platform.version))
+        await PrecompiledCache.invalidate(platform.id)
+        await BuildCache.invalidate(platform.id)
 
         new_versions_info = deepcopy(
             self.__versions_info)
@@ -388,10 +605,10 @@ class PlatformManager:
         source_dir = get_source_path(platform_id, version)
         return _read_platform_files(source_dir, 'r')
 
-    def _delete_versions_from_platform_registry(self,
-                                                platform_id: str,
-                                                versions: Set[str]
-                                                ) -> Dict[str, Platform]:
+    def _delete_versions_from_platform_registry(
+            self,
+            platform_id: str,
+            versions: Set[str]) -> OrderedDict[str, Platform]:
         """Remove versions of platform from __platform."""
         new_platform_registry = deepcopy(self.__platforms)
         for version in versions:
@@ -431,6 +648,8 @@ class PlatformManager:
                 raise PlatformException(
                     f'Platform with id {platform_id} and '
                     f'version {version} doesnt exist.')
+        await PrecompiledCache.invalidate(platform_id)
+        await BuildCache.invalidate(platform_id)
         versions_info = self.__versions_info[platform_id].versions
         for version in versions:
             json_scheme_folder = await AsyncPath(
@@ -447,6 +666,10 @@ class PlatformManager:
         new_versions_info[platform_id].versions = versions_info
         self.__platforms = self._delete_versions_from_platform_registry(
             platform_id, versions)
+        self._cancel_unload_timers(
+            {get_full_platform_name(platform_id, version)
+             for version in versions})
+        self._unindex_versions(platform_id, versions)
         if len(versions_info) == 0:
             await _delete_platform(platform_id)
             del new_versions_info[platform_id]
@@ -464,9 +687,16 @@ class PlatformManager:
         if not self.platform_exist(platform_id):
             raise PlatformException(f'Platform {platform_id} doesnt exist.')
         await _delete_platform(platform_id)
+        await PrecompiledCache.invalidate(platform_id)
+        await BuildCache.invalidate(platform_id)
         new_versions_info = deepcopy(self.__versions_info)
-        self._delete_versions_from_platform_registry(
+        self.__platforms = self._delete_versions_from_platform_registry(
             platform_id, new_versions_info[platform_id].versions)
+        self._cancel_unload_timers(
+            {get_full_platform_name(platform_id, version)
+             for version in new_versions_info[platform_id].versions})
+        self._unindex_versions(platform_id,
+                               new_versions_info[platform_id].versions)
         del new_versions_info[platform_id]
         return new_versions_info
 
@@ -0,0 +1,221 @@
+"""Module implements cache of precompiled platform translation units."""
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+import aioshutil
+from aiopath import AsyncPath
+from compiler.config import get_config
+from compiler.types.platform_types import CompilingSettings
+
+_SOURCE_EXTENSIONS = ('.c', '.cpp', '.cc', '.s', '.S')
+# Флаги компоновщика, у которых аргумент идет отдельным токеном
+_LINK_FLAGS_WITH_ARG = ('-o', '-T', '-Xlinker', '-L', '-l')
+# Флаги компиляции, у которых аргумент идет отдельным токеном
+_COMPILE_FLAGS_WITH_ARG = ('-I', '-D', '-U', '-include', '-isystem')
+# Генерируемые файлы компилируются при каждом запросе
+_GENERATED_FILENAME = 'sketch'
+# Время в секундах, после которого повторяется неудавшаяся сборка объектов
+_FAILED_RETRY_TIMEOUT = 300
+
+
+def _is_gcc_like(command: str) -> bool:
+    return command.endswith(('gcc', 'g++'))
+
+
+def _split_flags(flags: List[str]) -> tuple[List[str], List[str]]:
+    """
+    Split command flags to compile flags and translation units.
+
+    Linker flags are dropped from compile flags.
+    """
+    compile_flags: List[str] = []
+    units: List[str] = []
+    i = 0
+    while i < len(flags):
+        flag = flags[i]
+        if flag in _LINK_FLAGS_WITH_ARG:
+            i += 2
+            continue
+        if flag in _COMPILE_FLAGS_WITH_ARG:
+            compile_flags.extend(flags[i:i + 2])
+            i += 2
+            continue
+        if flag.startswith(('-Wl,', '-l', '-L')):
+            pass
+        elif flag.startswith('-'):
+            compile_flags.append(flag)
+        elif flag.endswith(_SOURCE_EXTENSIONS):
+            units.append(flag)
+        i += 1
+    return compile_flags, units
+
+
+def _is_platform_unit(unit: str) -> bool:
+    filename = os.path.basename(unit)
+    return os.path.splitext(filename)[0] != _GENERATED_FILENAME
+
+
+class PrecompiledCache:
+    """
+    Cache of object files for platform translation units.
+
+    Platform library units (for example qhsm.cpp or startup assembler)\
+        are compiled once per platform version and compile flags, then\
+        object files are passed to the compiler instead of sources.
+    Only the generated sketch is compiled on every request.
+    Objects are stored in BUILD_CACHE_DIRECTORY/platforms/.
+    Several processes can share the directory: objects are compiled\
+        to unique temporary directory and renamed,\
+        finished entries are never changed.
+
+    arduino-cli commands are not changed,\
+        because arduino-cli caches precompiled core by itself.
+    """
+
+    # Путь объектных файлов -> блокировка и количество ожидающих ее сборок
+    _locks: Dict[str, tuple[asyncio.Lock, int]] = {}
+    # Пути, для которых не удалось собрать объектные файлы,
+    # и время неудачи
+    _failed: Dict[str, float] = {}
+
+    @staticmethod
+    def _platform_path(platform_id: str) -> str:
+        return os.path.join(get_config().build_cache_directory,
+                            'platforms',
+                            platform_id)
+
+    @staticmethod
+    @asynccontextmanager
+    async def _lock(objects_path: str) -> AsyncIterator[None]:
+        """Lock objects path, lock is removed after the last build."""
+        lock, users = PrecompiledCache._locks.get(objects_path,
+                                                  (asyncio.Lock(), 0))
+        PrecompiledCache._locks[objects_path] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = PrecompiledCache._locks[objects_path]
+            if users == 1:
+                del PrecompiledCache._locks[objects_path]
+            else:
+                PrecompiledCache._locks[objects_path] = (lock, users - 1)
+
+    @staticmethod
+    async def prepare_commands(
+        platform_id: str,
+        platform_version: str,
+        commands: List[CompilingSettings],
+        project_path: str
+    ) -> List[CompilingSettings]:
+        """
+        Replace platform translation units in commands by object files.
+
+        Objects are compiled from project_path on first use,\
+            so platform sources must be already included to project.
+        If precompiling fails, command is returned unchanged.
+        """
+        if get_config().build_cache_directory == '':
+            return commands
+        prepared: List[CompilingSettings] = []
+        for command in commands:
+            prepared.append(await PrecompiledCache._prepare_command(
+                platform_id, platform_version, command, project_path))
+        return prepared
+
+    @staticmethod
+    async def _prepare_command(
+        platform_id: str,
+        platform_version: str,
+        command: CompilingSettings,
+        project_path: str
+    ) -> CompilingSettings:
+        if not _is_gcc_like(command.command) or '-c' in command.flags:
+            return command
+        compile_flags, units = _split_flags(command.flags)
+        platform_units = [unit for unit in units if _is_platform_unit(unit)]
+        if not platform_units:
+            return command
+        key = hashlib.sha256(json.dumps(
+            [command.command, compile_flags, sorted(platform_units)]
+        ).encode('utf-8')).hexdigest()
+        objects_path = os.path.join(
+            PrecompiledCache._platform_path(platform_id),
+            platform_version,
+            key)
+        failed_at = PrecompiledCache._failed.get(objects_path)
+        if (failed_at is not None and
+                time.monotonic() - failed_at < _FAILED_RETRY_TIMEOUT):
+            return command
+        async with PrecompiledCache._lock(objects_path):
+            objects = await PrecompiledCache._build_objects(
+                command.command, compile_flags, platform_units,
+                project_path, objects_path)
+        if objects is None:
+            PrecompiledCache._failed[objects_path] = time.monotonic()
+            return command
+        PrecompiledCache._failed.pop(objects_path, None)
+        return CompilingSettings(
+            command=command.command,
+            flags=[objects.get(flag, flag) for flag in command.flags])
+
+    @staticmethod
+    async def _build_objects(command: str,
+                             compile_flags: List[str],
+                             units: List[str],
+                             project_path: str,
+                             objects_path: str) -> Dict[str, str] | None:
+        """
+        Compile units to objects_path, if they aren't compiled yet.
+
+        Return mapping unit -> object file or None if compiling failed.
+        """
+        objects = {
+            unit: os.path.join(objects_path, f'{os.path.basename(unit)}.o')
+            for unit in units
+        }
+        if all([await AsyncPath(obj).is_file()
+                for obj in objects.values()]):
+            return objects
+        tmp_path = f'{objects_path}.{uuid.uuid4().hex}.tmp'
+        await AsyncPath(tmp_path).mkdir(parents=True)
+        for unit in units:
+            process = await asyncio.create_subprocess_exec(
+                command,
+                *compile_flags,
+                '-c', unit,
+                '-o', os.path.join(tmp_path, f'{os.path.basename(unit)}.o'),
+                cwd=project_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE)
+            await process.communicate()
+            tmp_object = AsyncPath(tmp_path,
+                                   f'{os.path.basename(unit)}.o')
+            if process.returncode != 0 or not await tmp_object.is_file():
+                await aioshutil.rmtree(tmp_path)
+                return None
+        try:
+            await asyncio.to_thread(os.rename, tmp_path, objects_path)
+        except OSError:
+            # Другой процесс уже собрал такие же объектные файлы
+            await aioshutil.rmtree(tmp_path)
+            if not all([await AsyncPath(obj).is_file()
+                        for obj in objects.values()]):
+                return None
+        return objects
+
+    @staticmethod
+    async def invalidate(platform_id: str) -> None:
+        """Remove precompiled objects of all platform versions."""
+        if get_config().build_cache_directory == '':
+            return
+        path = AsyncPath(PrecompiledCache._platform_path(platform_id))
+        if await path.exists():
+            await aioshutil.rmtree(path)
+        PrecompiledCache._failed.clear()
@@ -14,8 +14,8 @@ from compiler.types.inner_types import (
 )
 from compiler.platform_handler import check_token
 from compiler.Compiler import run_commands
-from compiler.config import get_config
 from compiler.logger import Logger
+from compiler.types.ws_types import WebSocket
 
 
 class CompileCommandException(Exception):
@@ -26,18 +26,13 @@ class CompileCommandException(Exception):
 
 async def handle_ws_raw_compile(
         request: web.Request,
-        ws: Optional[web.WebSocketResponse] = None,
-        access_token: Optional[str] = None):
+        ws: WebSocket,
+        access_token: Optional[str] = None) -> None:
     """
     Handle for compiling from source.
 
     Send: CompilerResponse | RequestError
     """
-    if ws is None:
-        config = get_config()
-        ws = web.WebSocketResponse(
-            autoclose=False, max_msg_size=config.max_msg_size)
-        await ws.prepare(request)
     try:
         if access_token is None:
             access_token = await ws.receive_str()
@@ -102,4 +97,3 @@ async def handle_ws_raw_compile(
     except CompileCommandException as e:
         await Logger.logException()
         await ws.send_str(str(e))
-    return ws
@@ -2,17 +2,17 @@
 
 from typing import Dict
 
-from aiohttp import web
 from compiler.types.inner_types import (
     CompilerResponse,
     CommandResult,
     LegacyResponse,
     StateMachineResult
 )
+from compiler.types.ws_types import WebSocket
 
 
 async def send_error(
-    ws: web.WebSocketResponse,
+    ws: WebSocket,
     error: str,
 ):
     """Drop connection and send error without sm pinning."""
@@ -21,8 +21,31 @@ async def send_error(
         await ws.close()
 
 
+def create_sm_error_response(
+        state_machines: Dict[str, str]) -> CompilerResponse:
+    """Create NOTOK response with errors of state machines."""
+    return CompilerResponse(
+        result='NOTOK',
+        state_machines={
+            sm_id: StateMachineResult(
+                result='NOTOK',
+                name='',
+                commands=[
+                    CommandResult(
+                        command='compiler job',
+                        return_code=-2,
+                        stderr=error,
+                        stdout='')
+                ],
+                binary=[],
+                source=[])
+            for sm_id, error in state_machines.items()
+        }
+    )
+
+
 async def send_sm_error(
-    ws: web.WebSocketResponse,
+    ws: WebSocket,
     state_machines: Dict[str, str],
     legacy=False,
 ) -> None:
@@ -40,23 +63,5 @@ async def send_sm_error(
                 )
             )
         await ws.send_json(
-            CompilerResponse(
-                result='NOTOK',
-                state_machines={
-                    sm_id: StateMachineResult(
-                        result='NOTOK',
-                        name='',
-                        commands=[
-                            CommandResult(
-                                command='compiler job',
-                                return_code=-2,
-                                stderr=error,
-                                stdout='')
-                        ],
-                        binary=[],
-                        source=[])
-                    for sm_id, error in state_machines.items()
-                }
-            ).model_dump()
-        )
+            create_sm_error_response(state_machines).model_dump())
         await ws.close()
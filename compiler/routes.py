@@ -1,9 +1,37 @@
 """Module for working with routes."""
+from typing import Awaitable, Callable
+
 from aiohttp import web
+from compiler.config import get_config
 from compiler.main_handler import main_handle
 from compiler.handler import Handler
 from compiler.platform_handler import PlatformHandler
 from compiler.raw_compilation import handle_ws_raw_compile
+from compiler.types.ws_types import WebSocket
+
+# Аргументы: запрос, веб-сокет
+WebSocketHandler = Callable[[web.Request, WebSocket], Awaitable[None]]
+
+
+def websocket_route(
+    handler: WebSocketHandler,
+    autoclose: bool = False
+) -> Callable[[web.Request], Awaitable[web.WebSocketResponse]]:
+    """
+    Create route handler, that opens websocket and passes it to handler.
+
+    The same handlers are called by main_handle with its websocket.
+    """
+    async def handle(request: web.Request) -> web.WebSocketResponse:
+        config = get_config()
+        ws = web.WebSocketResponse(
+            autoclose=autoclose, max_msg_size=config.max_msg_size,
+            compress=bool(config.websocket_compression))
+        await ws.prepare(request)
+        await handler(request, ws)
+        return ws
+
+    return handle
 
 
 def setup_routes(app: web.Application) -> None:
@@ -11,23 +39,37 @@ def setup_routes(app: web.Application) -> None:
     app.add_routes(
         [
             web.get('/main', main_handle),
-            web.get('/ws', Handler.handle_ws_compile),
-            web.get('/ws/raw_compilation', handle_ws_raw_compile),
-            web.get('/ws/berloga/import', Handler.handle_berloga_import),
-            web.get('/ws/berloga/export', Handler.handle_berloga_export),
-            web.get('/cgml', Handler.handle_cgml_compile),
-            web.get('/platform/add', PlatformHandler.handle_add_platform),
+            web.get('/ws', websocket_route(Handler.handle_ws_compile)),
+            web.get('/ws/raw_compilation',
+                    websocket_route(handle_ws_raw_compile)),
+            web.get('/ws/berloga/import',
+                    websocket_route(Handler.handle_berloga_import,
+                                    autoclose=True)),
+            web.get('/ws/berloga/export',
+                    websocket_route(Handler.handle_berloga_export,
+                                    autoclose=True)),
+            web.get('/cgml', websocket_route(Handler.handle_cgml_compile)),
+            web.get('/cgml_generate',
+                    websocket_route(Handler.handle_cgml_generate)),
+            web.get('/cgml_batch',
+                    websocket_route(Handler.handle_cgml_batch)),
+            web.get('/platform/add',
+                    websocket_route(PlatformHandler.handle_add_platform)),
             web.get('/platform/delete',
-                    PlatformHandler.handle_remove_platform),
+                    websocket_route(PlatformHandler.handle_remove_platform)),
             web.get('/platform/delete_by_versions',
-                    PlatformHandler.handle_remove_platform_by_versions),
+                    websocket_route(
+                        PlatformHandler.handle_remove_platform_by_versions)),
             web.get('/platform/update',
-                    PlatformHandler.handle_update_platform),
+                    websocket_route(PlatformHandler.handle_update_platform)),
             web.get('/platform/get_json',
-                    PlatformHandler.handle_get_platform_by_id),
+                    websocket_route(
+                        PlatformHandler.handle_get_platform_by_id)),
             web.get('/platform/get_images',
-                    PlatformHandler.handle_get_platform_images),
+                    websocket_route(
+                        PlatformHandler.handle_get_platform_images)),
             web.get('/platform/get_sources',
-                    PlatformHandler.handle_get_platform_source_files)
+                    websocket_route(
+                        PlatformHandler.handle_get_platform_source_files))
         ]
     )
@@ -0,0 +1,109 @@
+"""Module implements cache of parsed state machines and generated code."""
+import hashlib
+from copy import deepcopy
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from cyberiadaml_py.types.elements import CGMLStateMachine
+from compiler.config import get_config
+from compiler.fullgraphmlparser.graphml_to_cpp import CppFileWriter
+from compiler.fullgraphmlparser.stateclasses import StateMachine
+from compiler.fullgraphmlparser.template_cache import TemplateCache
+from compiler.types.platform_types import Platform
+
+
+def get_state_machine_key(sm_id: str,
+                          platform_version: str,
+                          state_machine: CGMLStateMachine) -> str:
+    """
+    Calculate cache key for state machine.
+
+    Key is sha256 of state machine id, platform version and\
+        CGML elements: states, transitions, components, pseudo nodes\
+        and meta, so editing any of them changes the key.
+    """
+    key = hashlib.sha256(
+        f'{sm_id}\n{platform_version}\n'.encode('utf-8'))
+    key.update(repr(state_machine).encode('utf-8'))
+    return key.hexdigest()
+
+
+@dataclass
+class _CacheEntry:
+    platform: Platform
+    state_machine: StateMachine
+    sources: Optional[Dict[str, str]] = None
+    # Загрузка шаблонов, из которых сгенерированы sources
+    templates_generation: int = 0
+
+
+class StateMachineCache:
+    """
+    LRU cache of parsed state machines and generated sources.
+
+    Unchanged state machines of edited scheme are taken from cache,\
+        so only changed ones are parsed and generated again.
+    Entry is used only with the same Platform object, so\
+        reloaded or updated platform invalidates entries.
+    Size is limited by STATE_MACHINE_CACHE_SIZE, 0 disables cache.
+    """
+
+    _entries: 'OrderedDict[str, _CacheEntry]' = OrderedDict()
+
+    @classmethod
+    def get(cls, key: str, platform: Platform) -> Optional[StateMachine]:
+        """Get copy of parsed state machine by key."""
+        entry = cls._entries.get(key)
+        if entry is None:
+            return None
+        if entry.platform is not platform:
+            del cls._entries[key]
+            return None
+        cls._entries.move_to_end(key)
+        # CppFileWriter изменяет машину состояний,
+        # поэтому в кэше хранится нетронутая копия
+        return deepcopy(entry.state_machine)
+
+    @classmethod
+    def put(cls,
+            key: str,
+            platform: Platform,
+            state_machine: StateMachine) -> None:
+        """Save copy of parsed state machine, evict least\
+            recently used entries."""
+        size = get_config().state_machine_cache_size
+        if size <= 0:
+            return
+        state_machine.cache_key = key
+        cls._entries.pop(key, None)
+        cls._entries[key] = _CacheEntry(platform, deepcopy(state_machine))
+        while len(cls._entries) > size:
+            cls._entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls) -> None:
+        """Remove all entries."""
+        cls._entries.clear()
+
+    @classmethod
+    async def generate(cls, state_machine: StateMachine) -> Dict[str, str]:
+        """
+        Generate source and header files for state machine.
+
+        Sources of cached state machine are generated once\
+            and generated again after TemplateCache.reload.
+        Return dict, where key is filename and value is file content.
+        """
+        entry = (cls._entries.get(state_machine.cache_key)
+                 if state_machine.cache_key is not None else None)
+        if (entry is not None and entry.sources is not None and
+                entry.templates_generation == TemplateCache.generation()):
+            return dict(entry.sources)
+        templates_generation = TemplateCache.generation()
+        sources = await CppFileWriter(state_machine, True, True).generate(
+            state_machine.main_file_extension)
+        if entry is not None:
+            entry.sources = sources
+            entry.templates_generation = templates_generation
+        return dict(sources)
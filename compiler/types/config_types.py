@@ -19,6 +19,25 @@ class Config:
     build_directory: str
     module_directory: str
     base_path: str
+    build_cache_directory: str
+    max_compile_jobs: int
+    max_compile_queue_size: int
+    arduino_cli_daemons: int
+    websocket_compression: int
+    artifact_compression: str
+    workspace_ttl: int
+    build_directory_quota: int
+    memory_build_directory: str
+    max_loaded_platforms: int
+    platform_ttl: int
+    platform_manifest: str
+    state_machine_cache_size: int
+    compile_workers: int
+    worker_addresses: str
+    worker_listen: str
+    build_cache_size: int
+    worker_job_timeout: int
+    worker_token: str
 
 
 class ArgumentParser(Tap):
@@ -32,6 +51,25 @@ class ArgumentParser(Tap):
     log_path: str | None = None
     access_token_path: str | None = None
     build_path: str | None = None
+    build_cache_directory: str | None = None
+    max_compile_jobs: str | None = None
+    max_compile_queue_size: str | None = None
+    arduino_cli_daemons: str | None = None
+    websocket_compression: str | None = None
+    artifact_compression: str | None = None
+    workspace_ttl: str | None = None
+    build_directory_quota: str | None = None
+    memory_build_directory: str | None = None
+    max_loaded_platforms: str | None = None
+    platform_ttl: str | None = None
+    platform_manifest: str | None = None
+    state_machine_cache_size: str | None = None
+    compile_workers: str | None = None
+    worker_addresses: str | None = None
+    worker_listen: str | None = None
+    build_cache_size: str | None = None
+    worker_job_timeout: str | None = None
+    worker_token: str | None = None
 
     def configure(self):
         """Add CLI args to parser."""
@@ -58,4 +96,80 @@ class ArgumentParser(Tap):
                           )
         self.add_argument('--max-msg-size',
                           help='Max websocket message size.', required=False)
+        self.add_argument('--build-cache-directory',
+                          help='Path to directory with cached builds. '
+                          'Empty string disables cache.',
+                          required=False)
+        self.add_argument('--max-compile-jobs',
+                          help='Max count of simultaneous compilations.',
+                          required=False)
+        self.add_argument('--max-compile-queue-size',
+                          help='Max count of requests, '
+                          'that wait for compilation.',
+                          required=False)
+        self.add_argument('--arduino-cli-daemons',
+                          help='Count of warm arduino-cli daemons, '
+                          '0 disables daemon backend.',
+                          required=False)
+        self.add_argument('--websocket-compression',
+                          help='1 enables permessage-deflate, 0 disables it.',
+                          required=False)
+        self.add_argument('--artifact-compression',
+                          help='Compression of artifacts, sent as binary '
+                          'frames: none, gzip or zstd.',
+                          required=False)
+        self.add_argument('--workspace-ttl',
+                          help='Seconds to keep project directory after '
+                          'response, 0 removes it immediately.',
+                          required=False)
+        self.add_argument('--build-directory-quota',
+                          help='Max size of kept project directories '
+                          'in megabytes, 0 disables limit.',
+                          required=False)
+        self.add_argument('--memory-build-directory',
+                          help='Path to directory on RAM-backed filesystem '
+                          'for projects. Empty string disables it.',
+                          required=False)
+        self.add_argument('--max-loaded-platforms',
+                          help='Max count of platforms in memory, '
+                          '0 disables limit.',
+                          required=False)
+        self.add_argument('--platform-ttl',
+                          help='Seconds after which unused platform is '
+                          'unloaded from memory, 0 disables unloading.',
+                          required=False)
+        self.add_argument('--platform-manifest',
+                          help='Path to file with metadata of platform '
+                          'schemes. Empty string disables it.',
+                          required=False)
+        self.add_argument('--state-machine-cache-size',
+                          help='Count of parsed state machines with '
+                          'generated code, that are kept in memory. '
+                          '0 disables cache.',
+                          required=False)
+        self.add_argument('--compile-workers',
+                          help='Count of local compile worker processes, '
+                          '0 compiles in server process.',
+                          required=False)
+        self.add_argument('--worker-addresses',
+                          help='Comma-separated addresses of compile '
+                          'workers, started separately: unix:path or '
+                          'host:port.',
+                          required=False)
+        self.add_argument('--worker-listen',
+                          help='Run compile worker on address (unix:path '
+                          'or host:port) instead of server.',
+                          required=False)
+        self.add_argument('--build-cache-size',
+                          help='Max size of cached builds in megabytes, '
+                          '0 disables limit.',
+                          required=False)
+        self.add_argument('--worker-job-timeout',
+                          help='Seconds after which compile worker job '
+                          'fails and worker is restarted, 0 disables limit.',
+                          required=False)
+        self.add_argument('--worker-token',
+                          help='Shared secret of server and compile workers, '
+                          'required for worker on non-loopback address.',
+                          required=False)
         argcomplete.autocomplete(self)
@@ -54,6 +54,38 @@ class CommandResult(BaseModel):
     stderr: str | bytes
 
 
+class CompilerOutput(BaseModel):
+    """
+    Line of compiler output, sent while compilation is running.
+
+    Sent only if client requested streaming, full output is still\
+        sent in CompilerResponse.
+    """
+
+    state_machine: str
+    command: str
+    stream: Literal['stdout', 'stderr']
+    line: str
+
+
+ArtifactCompression = Literal['none', 'gzip', 'zstd']
+
+
+class ArtifactInfo(BaseModel):
+    """
+    Manifest entry of build artifact, sent as binary frame.
+
+    state_machine is empty for legacy responses.
+    size is size of uncompressed artifact.
+    """
+
+    state_machine: str
+    filename: str
+    extension: str
+    size: int
+    compression: ArtifactCompression = 'none'
+
+
 class File(BaseModel):
     filename: str
     extension: str
@@ -113,6 +145,20 @@ class CompilerResponse(BaseModel):
         return (f'Response: {self.result}, {self.state_machines}')
 
 
+class BatchItem(BaseModel):
+    """CGML scheme of batch compilation with client's id."""
+
+    id: str
+    scheme: str
+
+
+class BatchResult(BaseModel):
+    """Result of batch item, sent as soon as item is compiled."""
+
+    id: str
+    response: CompilerResponse
+
+
 @dataclass
 class EventSignal:
     """
@@ -1,6 +1,6 @@
-from typing import Dict, TypeAlias, Literal, List, Optional, Set
+from typing import Any, Dict, TypeAlias, Literal, List, Optional, Set
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from pydantic.dataclasses import dataclass
 from compiler.types.ide_types import SupportedCompilers
 
@@ -105,6 +105,12 @@ class Platform(BaseModel):
         default='', alias='mainFileExtension')
     header_file_extension: str = Field(
         default='', alias='headerFileExtension')
+    # Шаблоны имен файлов сборки (например, *.hex), отправляемых клиенту.
+    # Если список пуст, отправляются все файлы из build/.
+    artifacts: List[str] = Field(default_factory=list)
+    # Таблица кодогенерации (compiler.codegen_tables.PlatformTable),
+    # строится при первой генерации кода
+    _codegen_table: Any = PrivateAttr(default=None)
 
 
 @dataclass
@@ -1,4 +1,7 @@
-from typing import TypeAlias, Literal
+from typing import Any, AsyncIterator, Literal, Protocol, TypeAlias
+
+from aiohttp import WSMessage
+from pydantic import BaseModel
 
 Message: TypeAlias = Literal[
     'close',
@@ -6,6 +9,8 @@ Message: TypeAlias = Literal[
     'arduino',
     'berlogaExport',
     'cgml',
+    'cgml_generate',
+    'cgml_batch',
     'add_platform',
     'remove_platform',
     'remove_platform_versions',
@@ -15,3 +20,73 @@ Message: TypeAlias = Literal[
     'get_platform_sources',
     'auth'
 ]
+RequestId: TypeAlias = str | int
+# Тип ответа на запрос с идентификатором:
+# text, json - сообщение обработчика, binary - заголовок бинарного кадра,
+# done - запрос обработан, error - запрос не принят
+TaggedResponseType: TypeAlias = Literal['text', 'json', 'binary', 'done',
+                                        'error']
+
+
+class TaggedMessage(BaseModel):
+    """
+    Client message of request with id.
+
+    First message of request is command (Message),\
+        next messages are passed to the command handler.
+    """
+
+    request_id: RequestId
+    message: Any
+
+
+class TaggedResponse(BaseModel):
+    """Server message of request with id."""
+
+    request_id: RequestId
+    type: TaggedResponseType
+    data: Any = None
+
+
+class WebSocket(Protocol):
+    """
+    Websocket methods, used by request handlers.
+
+    Implemented by web.WebSocketResponse and PipelinedRequest.
+    """
+
+    @property
+    def closed(self) -> bool:
+        """Is websocket closed."""
+        ...
+
+    async def receive_str(self) -> str:
+        """Receive text message."""
+        ...
+
+    async def receive_json(self) -> Any:
+        """Receive text message and decode it."""
+        ...
+
+    async def receive_bytes(self) -> bytes:
+        """Receive binary message."""
+        ...
+
+    async def send_str(self, data: str) -> None:
+        """Send text message."""
+        ...
+
+    async def send_json(self, data: Any) -> None:
+        """Send JSON message."""
+        ...
+
+    async def send_bytes(self, data: bytes) -> None:
+        """Send binary message."""
+        ...
+
+    async def close(self) -> Any:
+        """Close websocket."""
+        ...
+
+    def __aiter__(self) -> AsyncIterator[WSMessage]:
+        ...
@@ -0,0 +1,417 @@
+"""Module implements dispatching compilation to worker processes."""
+import asyncio
+import contextlib
+import hmac
+import ipaddress
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import ValidationError
+from compiler.compile_scheduler import (
+    CompileScheduler,
+    QueuePositionCallback
+)
+from compiler.config import get_config
+from compiler.logger import Logger
+from compiler.types.inner_types import CompilerResponse
+
+# Период проверки доступности сборщиков в секундах
+_HEALTH_CHECK_PERIOD = 5
+_PING_TIMEOUT = 2
+# Время ожидания запуска локального сборщика в секундах
+_START_TIMEOUT = 60
+# Количество сборщиков, на которых пробуется выполнить задачу
+_MAX_ATTEMPTS = 3
+_MAX_FRAME_SIZE = 256 * 1024 * 1024
+_FRAME_HEADER = struct.Struct('>I')
+# pid сервера, запустившего локальный сборщик, сборщик завершается вместе с ним
+WORKER_PARENT_ENV = 'LAPKI_COMPILER_WORKER_PARENT'
+
+
+class WorkerException(Exception):
+    """Job can't be done by workers."""
+
+    def __init__(self,
+                 message: str,
+                 error_data: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        # Ошибки машин состояний, которые отправляются клиенту
+        self.error_data = (error_data if error_data is not None
+                           else {'': message})
+
+
+class WorkersUnavailableException(WorkerException):
+    """No healthy worker can take the job."""
+
+    ...
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:
+    """Read length-prefixed JSON message."""
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (size,) = _FRAME_HEADER.unpack(header)
+    if size > _MAX_FRAME_SIZE:
+        raise WorkerException(f'Слишком большое сообщение: {size} байт.')
+    return json.loads(await reader.readexactly(size))
+
+
+async def write_frame(writer: asyncio.StreamWriter, data: Any) -> None:
+    """Write length-prefixed JSON message."""
+    payload = json.dumps(data).encode('utf-8')
+    writer.write(_FRAME_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+def is_loopback_address(address: str) -> bool:
+    """Is address unix:path or loopback host:port."""
+    if address.startswith('unix:'):
+        return True
+    host = address.rsplit(':', 1)[0].strip('[]')
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_token(job: Any) -> bool:
+    """Check, that job contains configured worker token."""
+    if not isinstance(job, dict):
+        return False
+    token = job.get('token')
+    return (isinstance(token, str) and
+            hmac.compare_digest(token, get_config().worker_token))
+
+
+def _with_token(job: dict) -> dict:
+    return {**job, 'token': get_config().worker_token}
+
+
+async def open_connection(
+    address: str
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connect to unix:path or host:port address."""
+    if address.startswith('unix:'):
+        return await asyncio.open_unix_connection(address[len('unix:'):],
+                                                  limit=_MAX_FRAME_SIZE)
+    host, port = address.rsplit(':', 1)
+    return await asyncio.open_connection(host, int(port),
+                                         limit=_MAX_FRAME_SIZE)
+
+
+async def start_server(address: str, handler: Any) -> asyncio.AbstractServer:
+    """Listen on unix:path or host:port address."""
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if os.path.exists(path):
+            os.remove(path)
+        return await asyncio.start_unix_server(handler, path,
+                                               limit=_MAX_FRAME_SIZE)
+    host, port = address.rsplit(':', 1)
+    return await asyncio.start_server(handler, host, int(port),
+                                      limit=_MAX_FRAME_SIZE)
+
+
+@dataclass
+class _Worker:
+    address: str
+    # Процесс есть только у локальных сборщиков
+    local: bool = False
+    process: Optional[asyncio.subprocess.Process] = None
+    healthy: bool = False
+    jobs: int = 0
+    # Запуск и перезапуск локального сборщика
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class WorkerDispatcher:
+    """
+    Sends compilation jobs to stateless worker processes.
+
+    COMPILE_WORKERS local workers are started on unix sockets,\
+        workers from WORKER_ADDRESSES are started separately,\
+        e.g. on other machines with --worker-listen.
+    Job is sent to healthy worker with the least running jobs.
+    If worker fails during job, job is retried on another worker.
+    Workers are pinged every _HEALTH_CHECK_PERIOD seconds,\
+        dead local workers are restarted.
+    Job, that isn't done in WORKER_JOB_TIMEOUT seconds, fails,\
+        and its local worker is restarted.
+    Jobs wait for free worker slot in dispatcher's scheduler, so\
+        queue positions and queue limit work as without workers.\
+        Local workers share MAX_COMPILE_JOBS of this host.
+    """
+
+    _workers: List[_Worker] = []
+    _health_checker: Optional[asyncio.Task] = None
+    _socket_directory: Optional[str] = None
+    _restarts: Set[asyncio.Task] = set()
+    _scheduler: Optional[CompileScheduler] = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Are workers configured."""
+        return len(cls._workers) > 0
+
+    @classmethod
+    def worker_count(cls) -> int:
+        """Get count of configured workers."""
+        return len(cls._workers)
+
+    @classmethod
+    def capacity(cls) -> int:
+        """Get count of jobs, that workers run at the same time."""
+        if cls._scheduler is None:
+            return 0
+        return cls._scheduler.max_jobs
+
+    @staticmethod
+    def _local_worker_jobs() -> int:
+        # Локальные сборщики делят ядра машины сервера
+        config = get_config()
+        return max(1, config.max_compile_jobs //
+                   max(1, config.compile_workers))
+
+    @classmethod
+    async def start(cls) -> None:
+        """Start local workers and health checks."""
+        config = get_config()
+        if config.compile_workers > 0:
+            cls._socket_directory = tempfile.mkdtemp(
+                prefix='lapki-compiler-workers-')
+            for i in range(config.compile_workers):
+                path = os.path.join(cls._socket_directory, f'worker-{i}.sock')
+                cls._workers.append(_Worker(f'unix:{path}', local=True))
+        for address in config.worker_addresses.split(','):
+            if address.strip() != '':
+                cls._workers.append(_Worker(address.strip()))
+        if not cls._workers:
+            return
+        remote_workers = len(cls._workers) - config.compile_workers
+        cls._scheduler = CompileScheduler(
+            cls._local_worker_jobs() * config.compile_workers +
+            config.max_compile_jobs * remote_workers,
+            config.max_compile_queue_size)
+        await asyncio.gather(*(cls._check_worker(worker)
+                               for worker in cls._workers))
+        cls._health_checker = asyncio.create_task(cls._check_health())
+
+    @classmethod
+    def _worker_command(cls, address: str) -> List[str]:
+        # Сборщик запускается с теми же настройками, что и сервер,
+        # но со своей долей одновременных компиляций
+        return [sys.executable, '-m', 'compiler', *sys.argv[1:],
+                '--max-compile-jobs', str(cls._local_worker_jobs()),
+                '--worker-listen', address]
+
+    @classmethod
+    async def _spawn(cls, worker: _Worker) -> None:
+        worker.process = await asyncio.create_subprocess_exec(
+            *cls._worker_command(worker.address),
+            env={**os.environ, WORKER_PARENT_ENV: str(os.getpid())})
+        deadline = time.monotonic() + _START_TIMEOUT
+        while time.monotonic() < deadline:
+            if await cls._ping(worker):
+                worker.healthy = True
+                return
+            if worker.process.returncode is not None:
+                break
+            await asyncio.sleep(0.1)
+        worker.healthy = False
+        await Logger.logger.error(
+            f'Сборщик {worker.address} не запустился.')
+
+    @staticmethod
+    async def _ping(worker: _Worker) -> bool:
+        try:
+            reader, writer = await asyncio.wait_for(
+                open_connection(worker.address), _PING_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        try:
+            await write_frame(writer, _with_token({'type': 'ping'}))
+            response = await asyncio.wait_for(read_frame(reader),
+                                              _PING_TIMEOUT)
+            return (isinstance(response, dict) and
+                    response.get('type') == 'pong')
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                WorkerException, ValueError):
+            return False
+        finally:
+            writer.close()
+
+    @classmethod
+    async def _check_worker(cls, worker: _Worker) -> None:
+        if worker.local:
+            async with worker.lock:
+                if (worker.process is None or
+                        worker.process.returncode is not None):
+                    await cls._spawn(worker)
+                    return
+        worker.healthy = await cls._ping(worker)
+
+    @classmethod
+    async def _restart(cls, worker: _Worker) -> None:
+        async with worker.lock:
+            if (worker.process is not None and
+                    worker.process.returncode is None):
+                with contextlib.suppress(ProcessLookupError):
+                    worker.process.kill()
+                await worker.process.wait()
+            await cls._spawn(worker)
+
+    @classmethod
+    async def _check_health(cls) -> None:
+        while True:
+            await asyncio.sleep(_HEALTH_CHECK_PERIOD)
+            try:
+                await asyncio.gather(*(cls._check_worker(worker)
+                                       for worker in cls._workers))
+            except Exception:
+                await Logger.logException()
+
+    @classmethod
+    def _choose_worker(cls, excluded: List[_Worker]) -> Optional[_Worker]:
+        workers = [worker for worker in cls._workers
+                   if worker.healthy and worker not in excluded]
+        if not workers:
+            return None
+        return min(workers, key=lambda worker: worker.jobs)
+
+    @staticmethod
+    async def _run_job(worker: _Worker, job: dict) -> Any:
+        reader, writer = await open_connection(worker.address)
+        try:
+            await write_frame(writer, _with_token(job))
+            return await read_frame(reader)
+        except ValueError as e:
+            raise WorkerException(
+                f'Некорректный ответ сборщика {worker.address}.') from e
+        finally:
+            writer.close()
+
+    @classmethod
+    async def _run_job_with_timeout(cls, worker: _Worker, job: dict) -> Any:
+        timeout = get_config().worker_job_timeout
+        try:
+            return await asyncio.wait_for(cls._run_job(worker, job),
+                                          timeout if timeout > 0 else None)
+        except asyncio.TimeoutError:
+            # Завис сам сборщик, повтор на другом сборщике не поможет
+            worker.healthy = False
+            await Logger.logger.error(
+                f'Сборщик {worker.address} не выполнил задачу '
+                f'за {timeout} секунд.')
+            if worker.local:
+                task = asyncio.create_task(cls._restart(worker))
+                cls._restarts.add(task)
+                task.add_done_callback(cls._restarts.discard)
+            raise WorkerException('Превышено время компиляции.')
+
+    @classmethod
+    async def compile(cls,
+                      xml: str,
+                      requested_artifacts: List[str],
+                      on_queue_position: Optional[QueuePositionCallback] = None
+                      ) -> CompilerResponse:
+        """
+        Compile CGML scheme by one of workers.
+
+        Response contains source files and artifacts, encoded to base64.
+        Job waits for free worker slot, on_queue_position is called,\
+            while job is in queue. Raise CompileQueueFullException,\
+            if queue is full.
+        Raise WorkersUnavailableException, if no healthy worker is left,\
+            then scheme can be compiled in this process.
+        Raise WorkerException, if worker couldn't do the job.\
+            Its error_data contains errors of scheme, if worker failed\
+            to compile it.
+        """
+        if cls._scheduler is None or cls._choose_worker([]) is None:
+            raise WorkersUnavailableException('Нет доступных сборщиков.')
+        async with cls._scheduler.slot(on_queue_position):
+            return await cls._compile(xml, requested_artifacts)
+
+    @classmethod
+    async def _compile(cls,
+                       xml: str,
+                       requested_artifacts: List[str]) -> CompilerResponse:
+        job = {
+            'type': 'compile',
+            'xml': xml,
+            'requested_artifacts': requested_artifacts
+        }
+        excluded: List[_Worker] = []
+        for _ in range(_MAX_ATTEMPTS):
+            worker = cls._choose_worker(excluded)
+            if worker is None:
+                break
+            worker.jobs += 1
+            try:
+                response = await cls._run_job_with_timeout(worker, job)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                # Сборщик упал или недоступен, задача отправляется другому
+                worker.healthy = False
+                excluded.append(worker)
+                await Logger.logger.warning(
+                    f'Сборщик {worker.address} не выполнил задачу: {e!r}')
+                continue
+            finally:
+                worker.jobs -= 1
+            return cls._parse_response(worker, response)
+        raise WorkersUnavailableException('Нет доступных сборщиков.')
+
+    @staticmethod
+    def _parse_response(worker: _Worker, response: Any) -> CompilerResponse:
+        """Validate worker's response, raise WorkerException on error."""
+        malformed = f'Некорректный ответ сборщика {worker.address}.'
+        if not isinstance(response, dict):
+            raise WorkerException(malformed)
+        match response.get('type'):
+            case 'result':
+                try:
+                    return CompilerResponse.model_validate(
+                        response.get('response'))
+                except ValidationError as e:
+                    raise WorkerException(malformed) from e
+            case 'error':
+                message = response.get('message')
+                errors = response.get('errors')
+                if not (isinstance(errors, dict) and
+                        all(isinstance(sm_id, str) and isinstance(error, str)
+                            for sm_id, error in errors.items())):
+                    errors = None
+                raise WorkerException(
+                    message if isinstance(message, str)
+                    else 'Ошибка сборщика.',
+                    errors)
+            case _:
+                raise WorkerException(malformed)
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Stop health checks and local workers."""
+        if cls._health_checker is not None:
+            cls._health_checker.cancel()
+            cls._health_checker = None
+        for task in cls._restarts:
+            task.cancel()
+        await asyncio.gather(*cls._restarts, return_exceptions=True)
+        for worker in cls._workers:
+            if (worker.process is not None and
+                    worker.process.returncode is None):
+                worker.process.terminate()
+                await worker.process.wait()
+        cls._workers = []
+        cls._scheduler = None
+        if cls._socket_directory is not None:
+            shutil.rmtree(cls._socket_directory, ignore_errors=True)
+            cls._socket_directory = None
@@ -0,0 +1,185 @@
+"""Module implements lifecycle of build workspaces."""
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import aioshutil
+from aiopath import AsyncPath
+from compiler.config import get_config
+from compiler.logger import Logger
+
+# Период проверки устаревших рабочих директорий
+_SWEEP_PERIOD = 60
+# Минимум свободного места в RAM для создания проекта в ней
+_MEMORY_MIN_FREE = 256 * 1024 * 1024
+
+
+def _directory_size(path: str) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                ...
+    return size
+
+
+def _has_free_space(path: str) -> bool:
+    try:
+        os.makedirs(path, exist_ok=True)
+        return shutil.disk_usage(path).free >= _MEMORY_MIN_FREE
+    except OSError:
+        return False
+
+
+def _is_workspace_name(name: str) -> bool:
+    try:
+        return uuid.UUID(hex=name).hex == name
+    except ValueError:
+        return False
+
+
+@dataclass
+class _Workspace:
+    path: str
+    size: int = 0
+    released_at: float = field(default_factory=time.monotonic)
+    active: bool = True
+
+
+class WorkspaceManager:
+    """
+    Allocates unique project directories in BUILD_DIRECTORY.
+
+    If MEMORY_BUILD_DIRECTORY is set and has enough free space,\
+        projects are created there to avoid disk writes.
+
+    Workspace is removed after release, or kept for WORKSPACE_TTL\
+        seconds, if TTL is set.
+    All workspaces, including active ones, are limited by\
+        BUILD_DIRECTORY_QUOTA megabytes. Only kept workspaces are\
+        evicted, least recently released first.
+    Active workspaces are never removed.
+    """
+
+    _workspaces: 'OrderedDict[str, _Workspace]' = OrderedDict()
+    _sweeper: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def allocate(cls) -> str:
+        """Create empty workspace and return path to it."""
+        path = os.path.join(await cls._choose_directory(), uuid.uuid4().hex)
+        await AsyncPath(path).mkdir(parents=True)
+        cls._workspaces[path] = _Workspace(path)
+        return path
+
+    @staticmethod
+    async def _choose_directory() -> str:
+        config = get_config()
+        memory_directory = config.memory_build_directory
+        if (memory_directory != '' and
+                await asyncio.to_thread(_has_free_space, memory_directory)):
+            return memory_directory
+        return config.build_directory
+
+    @classmethod
+    async def release(cls, path: str) -> None:
+        """Mark workspace as unused, remove it if TTL isn't set."""
+        workspace = cls._workspaces.get(path)
+        if workspace is None:
+            return
+        if get_config().workspace_ttl <= 0:
+            await cls._remove(path)
+            return
+        workspace.active = False
+        workspace.size = await asyncio.to_thread(_directory_size, path)
+        workspace.released_at = time.monotonic()
+        cls._workspaces.move_to_end(path)
+        await cls._enforce_quota()
+
+    @classmethod
+    async def _remove(cls, path: str) -> None:
+        cls._workspaces.pop(path, None)
+        await aioshutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    async def _enforce_quota(cls) -> None:
+        quota = get_config().build_directory_quota * 1024 * 1024
+        if quota <= 0:
+            return
+        released = [workspace for workspace in cls._workspaces.values()
+                    if not workspace.active]
+        # Активные рабочие директории ещё изменяются, поэтому их размер
+        # вычисляется заново при каждой проверке
+        active = [workspace.path for workspace in cls._workspaces.values()
+                  if workspace.active]
+        total = sum(workspace.size for workspace in released)
+        total += sum(await asyncio.to_thread(
+            lambda: [_directory_size(path) for path in active]))
+        for workspace in released:
+            if total <= quota:
+                break
+            total -= workspace.size
+            await cls._remove(workspace.path)
+
+    @classmethod
+    async def cleanup_expired(cls) -> None:
+        """Remove released workspaces, which TTL is over."""
+        deadline = time.monotonic() - get_config().workspace_ttl
+        expired = [workspace.path for workspace in cls._workspaces.values()
+                   if not workspace.active and
+                   workspace.released_at <= deadline]
+        for path in expired:
+            await cls._remove(path)
+
+    @classmethod
+    async def cleanup_stale(cls) -> None:
+        """Remove workspaces, left by previous runs."""
+        config = get_config()
+        for directory in (config.build_directory,
+                          config.memory_build_directory):
+            build_directory = AsyncPath(directory)
+            if directory == '' or not await build_directory.is_dir():
+                continue
+            async for path in build_directory.iterdir():
+                if (_is_workspace_name(path.name) and
+                        str(path) not in cls._workspaces):
+                    await aioshutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    async def _sweep(cls) -> None:
+        while True:
+            await asyncio.sleep(_SWEEP_PERIOD)
+            try:
+                await cls.cleanup_expired()
+            except Exception:
+                await Logger.logException()
+
+    @classmethod
+    async def start(cls, cleanup_stale: bool = True) -> None:
+        """
+        Remove stale workspaces and start TTL cleanup.
+
+        Compile workers share build directory with server,\
+            so they must not remove stale workspaces.
+        """
+        if cleanup_stale:
+            await cls.cleanup_stale()
+        if cls._sweeper is None:
+            cls._sweeper = asyncio.create_task(cls._sweep())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Stop TTL cleanup and remove all released workspaces."""
+        if cls._sweeper is not None:
+            cls._sweeper.cancel()
+            cls._sweeper = None
+        for workspace in list(cls._workspaces.values()):
+            if not workspace.active:
+                await cls._remove(workspace.path)
@@ -0,0 +1,31 @@
+"""Module contains fixtures shared by tests."""
+import dataclasses
+from typing import Any, Callable, Iterator
+
+import pytest
+from compiler.config import get_config, set_config
+from compiler.types.config_types import Config
+
+ConfigOverride = Callable[..., Config]
+
+
+@pytest.fixture
+def override_config(
+        request: pytest.FixtureRequest) -> Iterator[ConfigOverride]:
+    """
+    Override fields of compiler config for one test.
+
+    Fields are replaced by calling fixture, e.g.\
+        override_config(platform_ttl=0), or by indirect parametrization\
+        with dict of fields. Config is restored after test.
+    """
+    old_config = get_config()
+
+    def override(**fields: Any) -> Config:
+        config = dataclasses.replace(get_config(), **fields)
+        set_config(config)
+        return config
+
+    override(**getattr(request, 'param', {}))
+    yield override
+    set_config(old_config)
@@ -0,0 +1,156 @@
+"""Module implements testing arduino-cli daemon backend."""
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List
+
+import pytest
+from aiopath import AsyncPath
+from compiler import arduino_daemon
+from compiler.arduino_daemon import ArduinoDaemonPool, parse_compile_flags
+from compiler.Compiler import Compiler, get_build_files
+from compiler.logger import Logger
+from compiler.types.platform_types import CompilingSettings
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+@pytest.mark.parametrize('flags, expected', [
+    pytest.param(['compile', '--export-binaries', '-b', 'arduino:avr:uno'],
+                 ('arduino:avr:uno', True), id='platform flags'),
+    pytest.param(['compile', '--fqbn', 'arduino:avr:micro'],
+                 ('arduino:avr:micro', False), id='without export'),
+    pytest.param(['compile', '-b', 'arduino:avr:uno', '--verbose'],
+                 None, id='unsupported flag'),
+    pytest.param(['upload', '-b', 'arduino:avr:uno'], None, id='not compile'),
+    pytest.param(['compile', '-e'], None, id='without fqbn'),
+])
+def test_parse_compile_flags(flags: List[str],
+                             expected: tuple[str, bool] | None):
+    """Only flags, supported by daemon backend, are parsed."""
+    assert parse_compile_flags(flags) == expected
+
+
+class _FakeRpcError(Exception):
+    """Error of fake gRPC call."""
+
+    def details(self) -> str:
+        """Get error message."""
+        return 'Platform not installed'
+
+
+class _FakeStub:
+    """arduino-cli daemon service, that saves compile requests."""
+
+    def __init__(self, channel: Any) -> None:
+        self.requests: List[Any] = []
+        _stubs.append(self)
+
+    async def Create(self, request: Any) -> Any:
+        """Create instance."""
+        return SimpleNamespace(instance='instance')
+
+    async def Init(self, request: Any) -> AsyncIterator[Any]:
+        """Init instance."""
+        yield SimpleNamespace()
+
+    async def Compile(self, request: Any) -> AsyncIterator[Any]:
+        """Compile sketch."""
+        self.requests.append(request)
+        if request.fqbn == 'unknown:avr:uno':
+            raise _FakeRpcError()
+        if request.export_dir:
+            os.makedirs(request.export_dir, exist_ok=True)
+            Path(request.export_dir, 'sketch.ino.hex').write_text('hex')
+        yield SimpleNamespace(out_stream=b'Sketch uses ', err_stream=b'')
+        yield SimpleNamespace(out_stream=b'924 bytes.', err_stream=b'')
+
+
+class _FakeChannel:
+    """gRPC channel to fake daemon."""
+
+    async def channel_ready(self) -> None:
+        """Wait, until channel is ready."""
+        ...
+
+    async def close(self) -> None:
+        """Close channel."""
+        ...
+
+
+_stubs: List[_FakeStub] = []
+
+
+@pytest.fixture
+async def fake_daemon(tmp_path: Path,
+                      monkeypatch,
+                      override_config):
+    """Replace grpc modules and arduino-cli by fakes."""
+    fake_cli = tmp_path / 'bin' / 'arduino-cli'
+    fake_cli.parent.mkdir()
+    # Как настоящий arduino-cli, компиляция с --export-binaries
+    # кладет бинарные файлы в build/<fqbn с точками>/
+    fake_cli.write_text('#!/bin/sh\n'
+                        'if [ "$1" = daemon ]; then exec sleep 30; fi\n'
+                        'fqbn=$(echo "$3" | tr : .)\n'
+                        'mkdir -p "build/$fqbn"\n'
+                        'echo hex > "build/$fqbn/sketch.ino.hex"\n')
+    fake_cli.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{fake_cli.parent}:{os.environ["PATH"]}')
+    monkeypatch.setattr(arduino_daemon, 'grpc', SimpleNamespace(
+        aio=SimpleNamespace(insecure_channel=lambda _: _FakeChannel(),
+                            AioRpcError=_FakeRpcError)))
+    monkeypatch.setattr(arduino_daemon, 'commands_pb2', SimpleNamespace(
+        CreateRequest=SimpleNamespace, InitRequest=SimpleNamespace))
+    monkeypatch.setattr(arduino_daemon, 'commands_pb2_grpc', SimpleNamespace(
+        ArduinoCoreServiceStub=_FakeStub))
+    monkeypatch.setattr(arduino_daemon, 'compile_pb2', SimpleNamespace(
+        CompileRequest=SimpleNamespace))
+    override_config(arduino_cli_daemons=1,
+                    log_path=str(tmp_path / 'logs.log'))
+    await Logger.init_logger()
+    _stubs.clear()
+    yield
+    await ArduinoDaemonPool.close()
+
+
+async def test_compile_by_daemon(fake_daemon, tmp_path: Path):
+    """Sketch is compiled by Compile call of daemon."""
+    assert ArduinoDaemonPool.available()
+    result = await ArduinoDaemonPool.compile(
+        str(tmp_path), ['compile', '--export-binaries', '-b',
+                        'arduino:avr:uno'])
+    assert result is not None
+    assert (result.return_code, result.stdout) == (0, 'Sketch uses 924 bytes.')
+    request = _stubs[0].requests[0]
+    assert (request.instance, request.fqbn) == ('instance', 'arduino:avr:uno')
+    assert request.export_dir == str(tmp_path / 'build' / 'arduino.avr.uno')
+
+    failed = await ArduinoDaemonPool.compile(
+        str(tmp_path), ['compile', '-b', 'unknown:avr:uno'])
+    assert failed is not None
+    assert (failed.return_code, failed.stderr) == (1, 'Platform not installed')
+    # Демон запускается один раз и переиспользуется
+    assert len(_stubs) == 1
+    assert await ArduinoDaemonPool.compile(
+        str(tmp_path), ['compile', '--verbose']) is None
+
+
+async def test_backends_export_same_artifacts(fake_daemon,
+                                              tmp_path: Path,
+                                              override_config):
+    """Daemon and arduino-cli process put binaries to the same paths."""
+    command = CompilingSettings(
+        command='arduino-cli',
+        flags=['compile', '-b', 'arduino:avr:uno', '--export-binaries'])
+    artifacts = []
+    for backend, daemons in (('daemon', 1), ('process', 0)):
+        override_config(arduino_cli_daemons=daemons)
+        base_dir = tmp_path / backend
+        base_dir.mkdir()
+        results = await Compiler.compile_project(str(base_dir), [command])
+        assert results[0].return_code == 0
+        artifacts.append(sorted([
+            f'{build_file.filename}.{build_file.extension}'
+            async for build_file in get_build_files(AsyncPath(base_dir))]))
+    assert artifacts[0] == artifacts[1] != []
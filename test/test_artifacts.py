@@ -0,0 +1,73 @@
+"""Module implements testing sending build artifacts."""
+import gzip
+from typing import Any, List
+
+from aiopath import AsyncPath
+from compiler.artifacts import find_artifacts, send_artifacts
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+class FakeWebSocket:
+    """Websocket, that saves sent frames."""
+
+    def __init__(self) -> None:
+        self.frames: List[Any] = []
+
+    async def send_json(self, data: Any) -> None:
+        """Save JSON frame."""
+        self.frames.append(data)
+
+    async def send_bytes(self, data: bytes) -> None:
+        """Save binary frame."""
+        self.frames.append(data)
+
+
+async def test_send_artifacts(tmp_path):
+    """Manifest is sent first, then raw bytes in manifest order."""
+    (tmp_path / 'sketch.ino.hex').write_bytes(b'\x00\x01hex')
+    (tmp_path / 'nested').mkdir()
+    (tmp_path / 'nested' / 'sketch.bin').write_bytes(b'bin')
+    paths = sorted(await find_artifacts(str(tmp_path)), key=str)
+    ws = FakeWebSocket()
+    await send_artifacts(ws, [('sm', path) for path in paths])
+    manifest = ws.frames[0]['artifacts']
+    assert [(info['filename'], info['extension'], info['size'])
+            for info in manifest] == [('sketch', '.bin', 3),
+                                      ('sketch', '.ino.hex', 5)]
+    assert all(info['state_machine'] == 'sm' for info in manifest)
+    assert ws.frames[1:] == [await AsyncPath(path).read_bytes()
+                             for path in paths]
+
+
+async def test_find_artifacts_by_patterns(tmp_path):
+    """Only files matching every non-empty pattern group are found."""
+    for name in ('sketch.ino.hex', 'sketch.ino.bin',
+                 'sketch.ino.elf', 'sketch.ino.map'):
+        (tmp_path / name).write_bytes(b'')
+
+    async def names(*pattern_groups: List[str]) -> List[str]:
+        return sorted(path.name for path in await find_artifacts(
+            str(tmp_path), *pattern_groups))
+
+    assert len(await names()) == 4
+    assert await names(['*.hex', '*.bin'], []) == ['sketch.ino.bin',
+                                                   'sketch.ino.hex']
+    assert await names(['*.hex', '*.bin'], ['*.hex']) == ['sketch.ino.hex']
+    assert await names(['*.hex'], ['*.elf']) == []
+
+
+async def test_send_compressed_artifacts(tmp_path):
+    """Compressed frames are decompressed to original content."""
+    content = b'\xff' * 4096
+    (tmp_path / 'sketch.bin').write_bytes(content)
+    ws = FakeWebSocket()
+    await send_artifacts(ws,
+                         [('sm', path)
+                          for path in await find_artifacts(str(tmp_path))],
+                         'gzip')
+    info = ws.frames[0]['artifacts'][0]
+    assert info['compression'] == 'gzip'
+    assert info['size'] == len(content)
+    assert len(ws.frames[1]) < len(content)
+    assert gzip.decompress(ws.frames[1]) == content
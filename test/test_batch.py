@@ -0,0 +1,126 @@
+"""Module implements testing batch compilation of CGML-schemes."""
+import asyncio
+from pathlib import Path
+from typing import Any, List
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import pytest
+from compiler import handler
+from compiler.handler import Handler
+from compiler.logger import Logger
+from compiler.routes import websocket_route
+from compiler.types.inner_types import BatchItem, CompilerResponse
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+@pytest.fixture
+async def client(tmp_path: Path, override_config):
+    """Start server with /cgml_batch route."""
+    override_config(log_path=str(tmp_path / 'logs.log'), max_compile_jobs=2)
+    await Logger.init_logger()
+    app = web.Application()
+    app.router.add_get('/cgml_batch',
+                       websocket_route(Handler.handle_cgml_batch))
+    async with TestClient(TestServer(app)) as client:
+        yield client
+
+
+async def test_batch_is_deduplicated(client, monkeypatch):
+    """Identical schemes are compiled once, results are streamed."""
+    compiled: List[str] = []
+    running = 0
+    max_running = 0
+
+    async def compile_batch_item(xml: str,
+                                 requested_artifacts: List[str]
+                                 ) -> CompilerResponse:
+        nonlocal running, max_running
+        compiled.append(xml)
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.05 if xml == 'slow' else 0.01)
+        running -= 1
+        return CompilerResponse(result=xml, state_machines={})
+
+    monkeypatch.setattr(handler, 'compile_scheme', compile_batch_item)
+    ws = await client.ws_connect('/cgml_batch')
+    items = [('1', 'slow'), ('2', 'a'), ('3', 'b'), ('4', 'a'), ('5', 'c')]
+    for item_id, scheme in items:
+        await ws.send_json({'id': item_id, 'scheme': scheme})
+    await ws.send_str('stop')
+    results = {}
+    while True:
+        message = await ws.receive_json(timeout=10)
+        if 'batch_done' in message:
+            assert message['batch_done'] == len(items)
+            break
+        result = message['batch_result']
+        results[result['id']] = result['response']['result']
+    assert results == dict(items)
+    assert sorted(compiled) == ['a', 'b', 'c', 'slow']
+    assert max_running <= 2
+    await ws.close()
+
+
+async def test_results_are_reused_after_sending(client, monkeypatch):
+    """Scheme isn't compiled again, if its result was already sent."""
+    compiled: List[str] = []
+
+    async def compile_batch_item(xml: str,
+                                 requested_artifacts: List[str]
+                                 ) -> CompilerResponse:
+        compiled.append(xml)
+        return CompilerResponse(result=xml, state_machines={})
+
+    monkeypatch.setattr(handler, 'compile_scheme', compile_batch_item)
+    ws = await client.ws_connect('/cgml_batch')
+    await ws.send_json({'id': '1', 'scheme': 'a'})
+    message = await ws.receive_json(timeout=10)
+    assert message['batch_result']['id'] == '1'
+    await ws.send_json({'id': '2', 'scheme': 'a'})
+    message = await ws.receive_json(timeout=10)
+    assert message['batch_result'] == {
+        'id': '2', 'response': {'result': 'a', 'state_machines': {}}}
+    await ws.send_str('stop')
+    assert (await ws.receive_json(timeout=10))['batch_done'] == 2
+    assert compiled == ['a']
+    await ws.close()
+
+
+async def test_send_error_stops_batch(monkeypatch):
+    """Other items aren't compiled, if result can't be sent."""
+    cancelled = False
+
+    async def compile_batch_item(xml: str,
+                                 requested_artifacts: List[str]
+                                 ) -> CompilerResponse:
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10 if xml == 'slow' else 0)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return CompilerResponse(result=xml, state_machines={})
+
+    class _ClosedWebSocket:
+        async def send_json(self, data: Any) -> None:
+            raise ConnectionResetError('Cannot write to closing transport')
+
+    monkeypatch.setattr(handler, 'compile_scheme', compile_batch_item)
+    batch = handler._CGMLBatch(_ClosedWebSocket(),  # type: ignore
+                               [], 2)
+    await batch.add(BatchItem(id='1', scheme='slow'))
+    await batch.add(BatchItem(id='2', scheme='fast'))
+    with pytest.raises(ConnectionResetError):
+        await asyncio.wait_for(batch.wait(), 5)
+    assert cancelled
+
+
+async def test_invalid_item(client):
+    """Invalid batch item is reported as error."""
+    ws = await client.ws_connect('/cgml_batch')
+    await ws.send_str('{"scheme": "without id"}')
+    response = await ws.receive_json(timeout=10)
+    assert response['result'] == 'NOTOK'
@@ -0,0 +1,125 @@
+"""Module implements testing build cache."""
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+from aiopath import AsyncPath
+from compiler.build_cache import BuildCache, get_build_key
+from compiler.types.inner_types import CommandResult, File
+from compiler.types.platform_types import CompilingSettings
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+@pytest.fixture
+def cache_directory(tmp_path: Path, override_config) -> Path:
+    """Set temporary build cache directory."""
+    override_config(build_cache_directory=str(tmp_path / 'cache'),
+                    build_cache_size=0)
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def sources() -> List[File]:
+    """Get generated sources."""
+    return [File(filename='sketch', extension='ino', fileContent='void;'),
+            File(filename='sketch', extension='h', fileContent='int a;')]
+
+
+@pytest.fixture
+def commands() -> List[CompilingSettings]:
+    """Get compiler commands."""
+    return [CompilingSettings(command='arduino-cli',
+                              flags=['compile', '-b', 'arduino:avr:uno'])]
+
+
+def test_build_key(sources: List[File],
+                   commands: List[CompilingSettings]):
+    """Key depends on sources, platform, build files and flags."""
+    key = get_build_key(sources, 'ArduinoUno', '1.0', {'a.h'}, commands)
+    assert key == get_build_key(list(reversed(sources)), 'ArduinoUno',
+                                '1.0', {'a.h'}, commands)
+    assert key != get_build_key(sources, 'ArduinoUno', '1.1', {'a.h'},
+                                commands)
+    assert key != get_build_key(sources, 'ArduinoUno', '1.0', {'b.h'},
+                                commands)
+    assert key != get_build_key(sources[:1], 'ArduinoUno', '1.0', {'a.h'},
+                                commands)
+    other_commands = [CompilingSettings(command='arduino-cli',
+                                        flags=['compile'])]
+    assert key != get_build_key(sources, 'ArduinoUno', '1.0', {'a.h'},
+                                other_commands)
+
+
+async def test_save_and_load(cache_directory: Path, tmp_path: Path):
+    """Saved build is restored to another build directory."""
+    build_path = tmp_path / 'project' / 'build'
+    build_path.mkdir(parents=True)
+    (build_path / 'sketch.hex').write_bytes(b'\x00\x01')
+    results = [CommandResult(command='arduino-cli compile',
+                             return_code=0, stdout='ok', stderr='')]
+
+    assert await BuildCache.load('uno', 'key', str(tmp_path / 'miss')) is None
+    await BuildCache.save('uno', 'key', str(build_path), results)
+
+    restored_path = tmp_path / 'restored' / 'build'
+    assert await BuildCache.load('uno', 'key', str(restored_path)) == results
+    restored_file = AsyncPath(restored_path, 'sketch.hex')
+    assert await restored_file.read_bytes() == b'\x00\x01'
+
+
+async def test_failed_build_is_not_saved(cache_directory: Path,
+                                         tmp_path: Path):
+    """Builds with non-zero return code are not cached."""
+    build_path = tmp_path / 'build'
+    build_path.mkdir()
+    results = [CommandResult(command='arduino-cli compile',
+                             return_code=1, stdout='', stderr='error')]
+    await BuildCache.save('uno', 'key', str(build_path), results)
+    assert await BuildCache.load('uno', 'key',
+                                 str(tmp_path / 'restored')) is None
+
+
+async def _save_build(tmp_path: Path, platform_id: str, key: str,
+                      size: int) -> None:
+    build_path = tmp_path / 'builds' / key
+    build_path.mkdir(parents=True)
+    (build_path / 'sketch.bin').write_bytes(b'\x00' * size)
+    await BuildCache.save(platform_id, key, str(build_path), [
+        CommandResult(command='gcc', return_code=0, stdout='', stderr='')])
+
+
+async def test_least_recently_used_builds_are_evicted(
+        cache_directory: Path,
+        tmp_path: Path,
+        override_config):
+    """Cache size is limited, used entries are kept longer."""
+    override_config(build_cache_size=1)
+    await _save_build(tmp_path, 'uno', 'first', 400 * 1024)
+    await _save_build(tmp_path, 'uno', 'second', 400 * 1024)
+    # Время изменения записей различается не на всех файловых системах
+    os.utime(cache_directory / 'builds' / 'uno' / 'first', (1, 1))
+    os.utime(cache_directory / 'builds' / 'uno' / 'second', (2, 2))
+    assert await BuildCache.load('uno', 'first',
+                                 str(tmp_path / 'restored')) is not None
+    await _save_build(tmp_path, 'micro', 'third', 400 * 1024)
+    assert await BuildCache.load('uno', 'second',
+                                 str(tmp_path / 'restored')) is None
+    assert await BuildCache.load('uno', 'first',
+                                 str(tmp_path / 'restored')) is not None
+    assert await BuildCache.load('micro', 'third',
+                                 str(tmp_path / 'restored')) is not None
+
+
+async def test_invalidate(cache_directory: Path, tmp_path: Path):
+    """Builds of changed platform are removed."""
+    await _save_build(tmp_path, 'uno', 'first', 1)
+    await _save_build(tmp_path, 'micro', 'second', 1)
+    await BuildCache.invalidate('uno')
+    assert await BuildCache.load('uno', 'first',
+                                 str(tmp_path / 'restored')) is None
+    assert await BuildCache.load('micro', 'second',
+                                 str(tmp_path / 'restored')) is not None
+    assert [path.name for path in (cache_directory / 'builds').iterdir()
+            ] == ['micro']
@@ -10,13 +10,19 @@ from contextlib import contextmanager
 import pytest
 from aiopath import AsyncPath
 from compiler.config import get_config
-from compiler.handler import compile_xml, create_response
+from compiler.handler import (
+    compile_xml,
+    create_generate_response,
+    create_response,
+    generate_xml
+)
 from cyberiadaml_py.cyberiadaml_parser import CGMLParser
 from compiler.fullgraphmlparser.graphml_to_cpp import CppFileWriter
 from compiler.types.platform_types import Platform
-from compiler.CGML import parse
+from compiler.CGML import parse, _InnerTriggerException
+from compiler.CGML import __parse_trigger as parse_trigger
+from compiler.codegen_tables import get_platform_table
 from compiler.platform_manager import PlatformManager
-from compiler.os_commands import init_os_commands
 
 pytest_plugins = ('pytest_asyncio',)
 
@@ -32,7 +38,6 @@ async def init_platform(platform_id: str, platform_path: str):
 def create_test_folder(path: str, wait_time: int):
     """Create test folder by path and delete it\
         after exit from 'with' statement and wait time."""
-    init_os_commands()
     try:
         Path(path).mkdir(parents=True)
         yield
@@ -67,6 +72,43 @@ def test_new_platform_creation(path: str):
         Platform(**json.loads(f.read()))
 
 
+@pytest.mark.parametrize(
+    'trigger, expected',
+    [
+        pytest.param('timer1.timeout', ('timer1.timeout', None, None)),
+        pytest.param('button1.clicked[a > 0]',
+                     ('button1.clicked', 'a > 0', None)),
+        pytest.param('[a > 0]', (None, 'a > 0', None)),
+        pytest.param('timer1.timeout post', ('timer1.timeout', None, 'post')),
+    ]
+)
+def test_parse_trigger(trigger: str, expected: tuple):
+    """Test classification of triggers by combined regex."""
+    inner = parse_trigger(trigger)
+    assert (inner.trigger, inner.condition, inner.postfix) == expected
+
+
+def test_parse_trigger_error():
+    """Test, that invalid trigger raises error with reason."""
+    with pytest.raises(_InnerTriggerException) as e:
+        parse_trigger('button1.clicked[a > 0')
+    assert e.value.trigger == 'button1.clicked[a > 0'
+    assert e.value.reason == 'незакрытые квадратные скобки'
+
+
+def test_platform_codegen_table():
+    """Test, that code generation table is computed once per platform."""
+    path = 'compiler/platforms/ArduinoUno/1.0/ArduinoUno-1.0.json'
+    with open(path, 'r') as f:
+        platform = Platform(**json.loads(f.read()))
+    table = get_platform_table(platform)
+    assert get_platform_table(platform) is table
+    button = platform.components['Button']
+    assert table.components['Button'].signal_checks['clicked'] == (
+        '.' + button.signals['clicked'].checkMethod + '()')
+    assert table.components['QHsmSerial'].delimeter == '::'
+
+
 @pytest.mark.asyncio
 async def test_generating_code():
     """Test generating code without compiling."""
@@ -87,6 +129,24 @@ async def test_generating_code():
                 print(e)
 
 
+async def test_generate_only():
+    """Test generating sources in memory without compiling."""
+    await init_platform(
+        'ArduinoUno',
+        'compiler/platforms/ArduinoUno/1.0/ArduinoUno-1.0.json'
+    )
+    with open('examples/CyberiadaFormat-Blinker.graphml', 'r') as f:
+        data = f.read()
+    errors, result = await generate_xml(data)
+    response = create_generate_response(errors, result)
+    assert response.result == 'OK'
+    for sm in response.state_machines.values():
+        assert sm.commands == [] and sm.binary == []
+        assert [(file.filename, file.extension) for file in sm.source] == [
+            ('sketch', 'ino'), ('sketch', 'h')]
+        assert all(file.fileContent for file in sm.source)
+
+
 @pytest.mark.parametrize('scheme_path, platform_id, platform_path', [
     pytest.param(
         'examples/CyberiadaFormat-Blinker.graphml',
@@ -0,0 +1,119 @@
+"""Module implements testing compile scheduler."""
+import asyncio
+from typing import List
+
+from aiohttp.test_utils import make_mocked_request
+import pytest
+from compiler import handler
+from compiler.handler import compile_xml, queue_position_sender
+from compiler.compile_scheduler import (
+    CompileQueueFullException,
+    CompileScheduler
+)
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+async def test_concurrency_limit():
+    """No more than max_jobs compilations run at the same time."""
+    scheduler = CompileScheduler(max_jobs=2, max_queue_size=10)
+    running = 0
+    max_running = 0
+
+    async def job() -> None:
+        nonlocal running, max_running
+        async with scheduler.slot():
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(job() for _ in range(6)))
+    assert max_running == 2
+    assert scheduler.running == 0
+    assert scheduler.queued == 0
+
+
+async def test_queue_positions_and_rejection():
+    """Queued requests get positions, extra requests are rejected."""
+    scheduler = CompileScheduler(max_jobs=1, max_queue_size=2)
+    release = asyncio.Event()
+    positions: List[int] = []
+    order: List[str] = []
+
+    async def on_position(position: int) -> None:
+        positions.append(position)
+
+    async def job(name: str) -> None:
+        async with scheduler.slot(on_position):
+            order.append(name)
+            await release.wait()
+
+    tasks = [asyncio.create_task(job(name)) for name in 'abc']
+    await asyncio.sleep(0)
+    assert scheduler.queued == 2
+    assert positions == [1, 2]
+    with pytest.raises(CompileQueueFullException):
+        async with scheduler.slot():
+            ...
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ['a', 'b', 'c']
+
+
+async def test_cancelled_waiter_leaves_queue():
+    """Cancelled request doesn't hold place in queue."""
+    scheduler = CompileScheduler(max_jobs=1, max_queue_size=1)
+    async with scheduler.slot():
+        waiter = asyncio.create_task(scheduler.slot().__aenter__())
+        await asyncio.sleep(0)
+        assert scheduler.queued == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.queued == 0
+    assert scheduler.running == 0
+
+
+async def test_queue_positions_are_opt_in():
+    """Queue positions are sent only on client's request."""
+    sent: List[dict] = []
+
+    class _WebSocket:
+        async def send_json(self, data: dict) -> None:
+            sent.append(data)
+
+    ws = _WebSocket()
+    assert queue_position_sender(make_mocked_request('GET', '/cgml'),
+                                 ws) is None  # type: ignore
+    sender = queue_position_sender(
+        make_mocked_request('GET', '/cgml?queue_position=1'),
+        ws)  # type: ignore
+    assert sender is not None
+    await sender(2)
+    assert sent == [{'queue_position': 2}]
+
+
+async def test_rejection_cancels_other_state_machines(monkeypatch):
+    """Request, rejected by scheduler, doesn't compile other machines."""
+    cancelled = False
+
+    async def parse(xml: str):
+        return {}, {'rejected': None, 'slow': None}
+
+    async def compile_state_machine(sm_id: str, *args):
+        nonlocal cancelled
+        if sm_id == 'rejected':
+            raise CompileQueueFullException('Очередь переполнена.')
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    monkeypatch.setattr(handler, 'parse', parse)
+    monkeypatch.setattr(handler, '_compile_state_machine',
+                        compile_state_machine)
+    with pytest.raises(CompileQueueFullException):
+        await asyncio.wait_for(compile_xml('scheme', 'base'), 5)
+    assert cancelled
@@ -0,0 +1,65 @@
+"""Module implements testing streaming of compiler output."""
+import os
+from typing import List
+
+import pytest
+from compiler.Compiler import Compiler, OutputStream
+from compiler.types.platform_types import CompilingSettings
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+async def test_output_is_streamed_by_lines(tmp_path):
+    """Every output line is passed to callback and kept in result."""
+    lines: List[tuple[str, OutputStream, str]] = []
+
+    async def on_output(command: str,
+                        stream: OutputStream,
+                        line: str) -> None:
+        lines.append((command, stream, line))
+
+    commands = [CompilingSettings(command='gcc', flags=['--version']),
+                CompilingSettings(command='gcc', flags=['missing.c'])]
+    results = await Compiler.compile_project(str(tmp_path),
+                                             commands,
+                                             on_output)
+    assert results[0].return_code == 0
+    assert results[1].return_code != 0
+    stdout = [line for command, stream, line in lines
+              if command == 'gcc --version' and stream == 'stdout']
+    stderr = [line for command, stream, line in lines
+              if command == 'gcc missing.c' and stream == 'stderr']
+    assert stdout == results[0].stdout.splitlines()
+    assert stderr == results[1].stderr.splitlines()
+    assert stderr
+
+
+async def test_output_without_callback(tmp_path):
+    """Compilation without callback returns the same output."""
+    commands = [CompilingSettings(command='gcc', flags=['--version'])]
+    results = await Compiler.compile_project(str(tmp_path), commands)
+    assert results[0].return_code == 0
+    assert results[0].stdout
+
+
+async def test_process_is_killed_on_callback_error(tmp_path, monkeypatch):
+    """Command is stopped, if output can't be sent."""
+    # Компилятор, который печатает свой pid и зависает
+    fake_gcc = tmp_path / 'bin' / 'gcc'
+    fake_gcc.parent.mkdir()
+    fake_gcc.write_text('#!/bin/sh\necho $$\nexec sleep 30\n')
+    fake_gcc.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{fake_gcc.parent}:{os.environ["PATH"]}')
+    pids: List[int] = []
+
+    async def on_output(command: str,
+                        stream: OutputStream,
+                        line: str) -> None:
+        pids.append(int(line))
+        raise ConnectionResetError('Client disconnected.')
+
+    commands = [CompilingSettings(command='gcc', flags=[])]
+    with pytest.raises(ConnectionResetError):
+        await Compiler.compile_project(str(tmp_path), commands, on_output)
+    with pytest.raises(ProcessLookupError):
+        os.kill(pids[0], 0)
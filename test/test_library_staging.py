@@ -0,0 +1,34 @@
+"""Module implements testing staging of library files."""
+import os
+from pathlib import Path
+
+import pytest
+from compiler.library_staging import stage_files
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+async def test_stage_files(tmp_path: Path):
+    """Files are placed to target directory by their names."""
+    source = tmp_path / 'library' / 'source'
+    source.mkdir(parents=True)
+    (source / 'LED.h').write_text('class LED;')
+    (source / 'LED.ino').write_text('LED::LED() {}')
+    target = tmp_path / 'sketch'
+    target.mkdir()
+    (target / 'LED.h').write_text('old')
+
+    await stage_files({str(source / 'LED.h'), str(source / 'LED.ino')},
+                      str(target))
+
+    assert (target / 'LED.h').read_text() == 'class LED;'
+    assert (target / 'LED.ino').read_text() == 'LED::LED() {}'
+    # Исходник платформы не должен поменяться при повторном размещении
+    assert (source / 'LED.h').read_text() == 'class LED;'
+    assert os.path.samefile(source / 'LED.h', target / 'LED.h')
+
+
+async def test_stage_missing_file(tmp_path: Path):
+    """Missing library file raises OSError."""
+    with pytest.raises(OSError):
+        await stage_files({str(tmp_path / 'missing.h')}, str(tmp_path))
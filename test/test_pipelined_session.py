@@ -0,0 +1,88 @@
+"""Module implements testing requests with id on /main."""
+from pathlib import Path
+from typing import Any, Dict, List
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import pytest
+from compiler import pipelined_session
+from compiler.logger import Logger
+from compiler.main_handler import main_handle
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+@pytest.fixture
+async def client(tmp_path: Path, override_config):
+    """Start server with /main route."""
+    override_config(log_path=str(tmp_path / 'logs.log'))
+    await Logger.init_logger()
+    app = web.Application()
+    app.router.add_get('/main', main_handle)
+    async with TestClient(TestServer(app)) as client:
+        yield client
+
+
+async def _receive_until_done(ws, count: int) -> Dict[Any, List[dict]]:
+    responses: Dict[Any, List[dict]] = {}
+    done = 0
+    while done < count:
+        response = await ws.receive_json(timeout=10)
+        responses.setdefault(response['request_id'], []).append(response)
+        if response['type'] == 'done':
+            done += 1
+    return responses
+
+
+async def test_requests_are_pipelined(client):
+    """Several requests are handled on one connection at once."""
+    ws = await client.ws_connect('/main')
+    await ws.send_json({'request_id': 1, 'message': 'cgml_generate'})
+    await ws.send_json({'request_id': 'b', 'message': 'cgml_generate'})
+    await ws.send_json({'request_id': 'c', 'message': 'unknown'})
+    # Сообщения запросов отправляются в обратном порядке
+    await ws.send_json({'request_id': 'b', 'message': 'not a scheme'})
+    await ws.send_json({'request_id': 1, 'message': 'not a scheme'})
+    responses = await _receive_until_done(ws, 3)
+    for request_id in (1, 'b'):
+        response, done = responses[request_id]
+        assert response['type'] == 'json'
+        assert response['data']['result'] == 'NOTOK'
+        assert done['type'] == 'done'
+    # Ошибка запроса не закрывает соединение
+    await ws.send_json({'request_id': 'd', 'message': 'unknown'})
+    assert (await _receive_until_done(ws, 1))['d'][-1]['type'] == 'done'
+    unknown, _ = responses['c']
+    assert unknown['type'] == 'text'
+    assert unknown['data'].startswith('Unknown unknown!')
+    await ws.close()
+
+
+async def test_plain_commands(client):
+    """Commands without request id are handled as before."""
+    ws = await client.ws_connect('/main')
+    await ws.send_str('unknown')
+    assert (await ws.receive_str(timeout=10)).startswith('Unknown unknown!')
+    await ws.close()
+
+
+async def test_finished_and_rejected_requests(client, monkeypatch):
+    """Messages of finished and rejected requests aren't commands."""
+    monkeypatch.setattr(pipelined_session, '_MAX_REQUESTS_IN_FLIGHT', 1)
+    ws = await client.ws_connect('/main')
+    await ws.send_json({'request_id': 1, 'message': 'cgml_generate'})
+    await ws.send_json({'request_id': 2, 'message': 'cgml_generate'})
+    rejected = await ws.receive_json(timeout=10)
+    assert (rejected['request_id'], rejected['type']) == (2, 'error')
+    # Схема отклоненного запроса не выполняется как команда
+    await ws.send_json({'request_id': 2, 'message': 'not a scheme'})
+    follow_up = await ws.receive_json(timeout=10)
+    assert (follow_up['request_id'], follow_up['type']) == (2, 'error')
+    await ws.send_json({'request_id': 1, 'message': 'not a scheme'})
+    responses = await _receive_until_done(ws, 1)
+    assert [response['type'] for response in responses[1]] == ['json',
+                                                               'done']
+    await ws.send_json({'request_id': 1, 'message': 'not a scheme'})
+    follow_up = await ws.receive_json(timeout=10)
+    assert (follow_up['request_id'], follow_up['type']) == (1, 'error')
+    await ws.close()
@@ -1,4 +1,5 @@
 """Module to test platform processing."""
+import asyncio
 import json
 from contextlib import asynccontextmanager
 from typing import List
@@ -11,6 +12,7 @@ from compiler.platform_manager import (
     PlatformManager,
     get_full_platform_name,
     get_path_to_platform,
+    read_platform_meta
 )
 from compiler.config import get_config
 from compiler.platform_handler import (
@@ -217,6 +219,118 @@ async def test_delete_platfrom(
         assert platform_manager.versions_info == {}
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('override_config',
+                         [{'max_loaded_platforms': 2, 'platform_ttl': 0}],
+                         indirect=True)
+async def test_platform_eviction(platform_manager: PlatformManager,
+                                 platform: Platform,
+                                 source_files: List[File],
+                                 images: List[File],
+                                 override_config):
+    """Least recently used and expired platforms are unloaded."""
+    async with (add_platform(platform, source_files, images) as first,
+                add_platform(platform, source_files, images) as second,
+                add_platform(platform, source_files, images) as third):
+        await platform_manager.get_platform(first, '1.0')
+        await platform_manager.get_platform(second, '1.0')
+        await platform_manager.get_platform(first, '1.0')
+        await platform_manager.get_platform(third, '1.0')
+        assert platform_manager.is_loaded(first, '1.0')
+        assert not platform_manager.is_loaded(second, '1.0')
+        assert platform_manager.is_loaded(third, '1.0')
+
+        override_config(platform_ttl=0.01)
+        await platform_manager.get_platform(second, '1.0')
+        assert platform_manager.is_loaded(second, '1.0')
+        await asyncio.sleep(0.05)
+        assert not platform_manager.is_loaded(second, '1.0')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_platform_loads(platform_manager: PlatformManager,
+                                         platform: Platform,
+                                         source_files: List[File],
+                                         images: List[File],
+                                         monkeypatch: pytest.MonkeyPatch):
+    """Concurrent requests of cold platform wait for one load."""
+    loads = 0
+    load_platform = platform_manager.load_platform
+
+    async def counting_load_platform(path_to_platform: str) -> Platform:
+        nonlocal loads
+        loads += 1
+        return await load_platform(path_to_platform)
+
+    monkeypatch.setattr(platform_manager, 'load_platform',
+                        counting_load_platform)
+    async with add_platform(platform, source_files, images) as platform_id:
+        platforms = await asyncio.gather(
+            *(platform_manager.get_platform(platform_id, '1.0')
+              for _ in range(5)))
+        assert loads == 1
+        assert all(loaded is platforms[0] for loaded in platforms)
+
+
+def test_read_platform_meta():
+    """Metadata is read without parsing the rest of scheme."""
+    with open('compiler/platforms/ArduinoUno/1.0/ArduinoUno-1.0.json',
+              'r') as f:
+        data = f.read()
+    platform = Platform(**json.loads(data))
+    assert read_platform_meta(data) == {'id': platform.id,
+                                        'version': platform.version,
+                                        'name': platform.name,
+                                        'author': platform.author}
+    # Компоненты после метаданных не разбираются
+    assert read_platform_meta(
+        '{"id": "a", "version": "1.0", "name": "A", "author": "",'
+        ' "components": not json')['id'] == 'a'
+    with pytest.raises(ValueError):
+        read_platform_meta('{"id": "a", "name": "A"}')
+    with pytest.raises(ValueError):
+        read_platform_meta('{"version": "1.0", "name": "A"}')
+
+
+@pytest.mark.asyncio
+async def test_platform_manifest(tmp_path, override_config):
+    """Unchanged schemes are taken from manifest without reading."""
+    manifest_path = tmp_path / 'manifest.json'
+    override_config(platform_manifest=str(manifest_path))
+    schemes = tmp_path / 'platforms'
+    schemes.mkdir()
+    with open('compiler/platforms/ArduinoUno/1.0/ArduinoUno-1.0.json',
+              'r') as f:
+        scheme = json.load(f)
+    scheme['id'] = 'manifest-test'
+    (schemes / 'a.json').write_text(json.dumps(scheme))
+    # Схема без id и схема, не проходящая валидацию, не попадают в манифест
+    (schemes / 'b.json').write_text(
+        json.dumps({**scheme, 'id': 'manifest-invalid', 'compile': []}))
+    del scheme['id']
+    (schemes / 'c.json').write_text(json.dumps(scheme))
+    try:
+        await PlatformManager().init_platforms(str(schemes))
+        manifest = json.loads(manifest_path.read_text())
+        assert list(manifest) == [str(schemes / 'a.json')]
+        assert not PlatformManager().platform_exist('manifest-invalid')
+        assert not PlatformManager().platform_exist('')
+        entry = manifest[str(schemes / 'a.json')]
+        assert entry['meta']['id'] == 'manifest-test'
+        entry['meta']['name'] = 'From manifest'
+        manifest_path.write_text(json.dumps(manifest))
+        PlatformManager().platforms_info = (
+            PlatformManager()._delete_from_version_registry(
+                'manifest-test', {'1.0'}))
+        await PlatformManager().init_platforms(str(schemes))
+        assert (PlatformManager().versions_info['manifest-test'].name ==
+                'From manifest')
+    finally:
+        PlatformManager().platforms_info = (
+            PlatformManager()._delete_from_version_registry(
+                'manifest-test', {'1.0'}))
+
+
 @pytest.mark.asyncio
 async def test_check_token(access_controller: AccessController) -> None:
     """Testing the check access token."""
@@ -0,0 +1,75 @@
+"""Module implements testing cache of precompiled platform units."""
+import asyncio
+from pathlib import Path
+
+import pytest
+from compiler.Compiler import Compiler
+from compiler.precompiled_cache import PrecompiledCache, _split_flags
+from compiler.types.platform_types import CompilingSettings
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+@pytest.fixture
+def cache_directory(tmp_path: Path, override_config) -> Path:
+    """Set temporary build cache directory."""
+    override_config(build_cache_directory=str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+def test_split_flags():
+    """Linker flags are dropped, sources are separated."""
+    compile_flags, units = _split_flags([
+        '-mcpu=cortex-m0plus', '-DSTM32G030x6', '-T', './usercode.ld',
+        './startup.s', '-o', './build/sketch.elf', '-g', './sketch.cpp',
+        '-Os', 'qhsm.cpp', '-Xlinker', '--gc-sections', '-I', 'include'
+    ])
+    assert compile_flags == ['-mcpu=cortex-m0plus', '-DSTM32G030x6', '-g',
+                             '-Os', '-I', 'include']
+    assert units == ['./startup.s', './sketch.cpp', 'qhsm.cpp']
+
+
+async def test_prepare_commands(cache_directory: Path, tmp_path: Path):
+    """Platform units are compiled once and replaced by objects."""
+    project = tmp_path / 'project'
+    (project / 'build').mkdir(parents=True)
+    (project / 'lib.c').write_text('int lib(void) { return 1; }\n')
+    (project / 'sketch.c').write_text(
+        'int lib(void);\nint main(void) { return lib() - 1; }\n')
+    command = CompilingSettings(
+        command='gcc',
+        flags=['-O2', 'sketch.c', 'lib.c', '-o', './build/sketch'])
+
+    commands = await PrecompiledCache.prepare_commands(
+        'platform', '1.0', [command], str(project))
+
+    flags = commands[0].flags
+    assert 'sketch.c' in flags
+    assert 'lib.c' not in flags
+    object_file = next(flag for flag in flags if flag.endswith('lib.c.o'))
+    assert Path(object_file).is_file()
+    # Блокировка удаляется после сборки
+    assert PrecompiledCache._locks == {}
+    results = await Compiler.compile_project(str(project), commands)
+    assert results[0].return_code == 0
+
+    await PrecompiledCache.invalidate('platform')
+    assert not Path(object_file).exists()
+
+
+async def test_concurrent_builds(cache_directory: Path, tmp_path: Path):
+    """Builds of the same objects by several processes don't conflict."""
+    project = tmp_path / 'project'
+    project.mkdir()
+    (project / 'lib.c').write_text('int lib(void) { return 1; }\n')
+    objects_path = str(cache_directory / 'platforms' / 'platform' / 'key')
+    # Блокировка общая только внутри процесса, поэтому вызывается напрямую
+    results = await asyncio.gather(*(PrecompiledCache._build_objects(
+        'gcc', ['-O2'], ['lib.c'], str(project), objects_path)
+        for _ in range(3)))
+    assert all(objects == results[0] for objects in results)
+    assert results[0] is not None
+    assert Path(results[0]['lib.c']).is_file()
+    # Временные директории удалены
+    assert [path.name for path in Path(objects_path).parent.iterdir()] == [
+        'key']
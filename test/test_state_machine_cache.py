@@ -0,0 +1,96 @@
+"""Module implements testing cache of parsed state machines."""
+import re
+
+import pytest
+from compiler.CGML import parse
+from compiler.fullgraphmlparser.template_cache import TemplateCache
+from compiler.platform_manager import PlatformManager
+from compiler.state_machine_cache import StateMachineCache
+
+pytest_plugins = ('pytest_asyncio',)
+
+_SCHEME = 'examples/CyberiadaFormat-Blinker.graphml'
+
+
+def _create_scheme(first_sm_delay: int = 1000) -> str:
+    """Create scheme with two state machines from Blinker example."""
+    with open(_SCHEME, 'r') as f:
+        data = f.read()
+    start = data.index('<graph ')
+    end = data.index('</graph>') + len('</graph>')
+    graph = data[start:end]
+    # Вторая машина состояний - копия первой с другими id
+    second_graph = re.sub(r'(id|source|target)="([^"]+)"',
+                          lambda match: f'{match[1]}="b_{match[2]}"',
+                          graph)
+    first_graph = graph.replace('timer1.start(1000)',
+                                f'timer1.start({first_sm_delay})')
+    return data[:start] + first_graph + second_graph + data[end:]
+
+
+@pytest.fixture
+async def cache_size(override_config):
+    """Init ArduinoUno platform and set state machine cache size."""
+    platform_manager = PlatformManager()
+    if not platform_manager.platform_exist('ArduinoUno'):
+        await platform_manager.load_platform(
+            'compiler/platforms/ArduinoUno/1.0/ArduinoUno-1.0.json')
+    StateMachineCache.clear()
+
+    def configure(size: int) -> None:
+        override_config(state_machine_cache_size=size)
+
+    yield configure
+    StateMachineCache.clear()
+
+
+async def test_unchanged_state_machines_are_reused(cache_size):
+    """Only edited state machine is parsed and generated again."""
+    cache_size(64)
+    data = _create_scheme()
+    _, first = await parse(data)
+    assert len(first) == 2
+    first_sources = {sm_id: await StateMachineCache.generate(sm)
+                     for sm_id, sm in first.items()}
+    _, second = await parse(data)
+    for sm_id, sm in second.items():
+        assert sm is not first[sm_id]
+        assert sm.cache_key == first[sm_id].cache_key
+        assert await StateMachineCache.generate(sm) == first_sources[sm_id]
+
+    _, third = await parse(_create_scheme(500))
+    changed = [sm_id for sm_id, sm in third.items()
+               if sm.cache_key != first[sm_id].cache_key]
+    assert changed == ['Ga']
+    edited_sources = await StateMachineCache.generate(third['Ga'])
+    assert 'timer1.start(500)' in edited_sources['sketch.ino']
+
+
+async def test_cache_size(cache_size):
+    """Least recently used state machines are evicted, 0 disables cache."""
+    cache_size(1)
+    await parse(_create_scheme())
+    assert len(StateMachineCache._entries) == 1
+
+    StateMachineCache.clear()
+    cache_size(0)
+    _, state_machines = await parse(_create_scheme())
+    assert len(StateMachineCache._entries) == 0
+    assert all(sm.cache_key is None for sm in state_machines.values())
+
+
+async def test_sources_are_generated_after_templates_reload(cache_size):
+    """Cached sources are not used after templates are reloaded."""
+    cache_size(64)
+    data = _create_scheme()
+    _, state_machines = await parse(data)
+    sm = state_machines['Ga']
+    sources = await StateMachineCache.generate(sm)
+    assert sm.cache_key is not None
+    StateMachineCache._entries[sm.cache_key].sources = {'sketch.ino': ''}
+    _, state_machines = await parse(data)
+    assert await StateMachineCache.generate(state_machines['Ga']) == {
+        'sketch.ino': ''}
+    TemplateCache.reload()
+    _, state_machines = await parse(data)
+    assert await StateMachineCache.generate(state_machines['Ga']) == sources
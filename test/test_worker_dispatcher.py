@@ -0,0 +1,237 @@
+"""Module implements testing dispatching jobs to compile workers."""
+import asyncio
+import contextvars
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from compiler import compile_worker, handler
+from compiler.CGML import CGMLException
+from compiler.compile_scheduler import CompileQueueFullException
+from compiler.logger import Logger
+from compiler.types.inner_types import CompilerResponse
+from compiler.worker_dispatcher import (
+    WorkerDispatcher,
+    WorkerException,
+    is_loopback_address,
+    open_connection,
+    read_frame,
+    start_server,
+    write_frame
+)
+
+pytest_plugins = ('pytest_asyncio',)
+
+# Адрес сборщика, обрабатывающего текущее соединение
+_worker_address: contextvars.ContextVar[str] = contextvars.ContextVar(
+    '_worker_address')
+
+
+async def _handle_dying_worker(reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter) -> None:
+    """Answer pings, but drop connection on compile job."""
+    job = await read_frame(reader)
+    if job['type'] == 'ping':
+        await write_frame(writer, {'type': 'pong'})
+    writer.close()
+
+
+async def _handle_hanging_worker(reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+    """Answer pings, but never finish compile job."""
+    job = await read_frame(reader)
+    if job['type'] == 'ping':
+        await write_frame(writer, {'type': 'pong'})
+    else:
+        await asyncio.sleep(30)
+    writer.close()
+
+
+@pytest.fixture
+async def workers(tmp_path: Path, monkeypatch, override_config):
+    """Start in-process workers and dispatcher."""
+    compiled: Dict[str, List[str]] = {}
+    servers: List[asyncio.AbstractServer] = []
+
+    async def compile_scheme_locally(
+            xml: str,
+            requested_artifacts: List[str]) -> CompilerResponse:
+        compiled.setdefault(_worker_address.get(), []).append(xml)
+        await asyncio.sleep(0.01)
+        if xml == 'invalid':
+            raise CGMLException({'sm': 'invalid scheme'})
+        return CompilerResponse(result=xml, state_machines={})
+
+    monkeypatch.setattr(compile_worker,
+                        'compile_scheme_locally',
+                        compile_scheme_locally)
+
+    async def start(good: int,
+                    dying: int,
+                    hanging: int = 0,
+                    **config: Any) -> Dict[str, List[str]]:
+        addresses = []
+        for i in range(hanging):
+            address = f'unix:{tmp_path / f"hanging-{i}.sock"}'
+            servers.append(await start_server(address,
+                                              _handle_hanging_worker))
+            addresses.append(address)
+        for i in range(dying):
+            address = f'unix:{tmp_path / f"dying-{i}.sock"}'
+            servers.append(await start_server(address, _handle_dying_worker))
+            addresses.append(address)
+        for i in range(good):
+            address = f'unix:{tmp_path / f"worker-{i}.sock"}'
+
+            async def handle(reader, writer, address=address):
+                _worker_address.set(address)
+                await compile_worker._handle_connection(reader, writer)
+            servers.append(await start_server(address, handle))
+            addresses.append(address)
+        override_config(log_path=str(tmp_path / 'logs.log'),
+                        compile_workers=0,
+                        worker_addresses=','.join(addresses),
+                        **config)
+        await Logger.init_logger()
+        await WorkerDispatcher.start()
+        return compiled
+
+    yield start
+    await WorkerDispatcher.stop()
+    for server in servers:
+        server.close()
+
+
+async def test_job_is_retried_on_another_worker(workers):
+    """Job is done by another worker, if its worker dies."""
+    compiled = await workers(1, 1)
+    assert WorkerDispatcher.worker_count() == 2
+    response = await WorkerDispatcher.compile('scheme', [])
+    assert response.result == 'scheme'
+    assert list(compiled.values()) == [['scheme']]
+    # Упавший сборщик больше не получает задачи
+    await WorkerDispatcher.compile('next', [])
+    assert list(compiled.values()) == [['scheme', 'next']]
+
+
+async def test_load_is_balanced(workers):
+    """Concurrent jobs are sent to the least loaded workers."""
+    compiled = await workers(2, 0)
+    responses = await asyncio.gather(*(WorkerDispatcher.compile(str(i), [])
+                                       for i in range(4)))
+    assert [response.result for response in responses] == [
+        '0', '1', '2', '3']
+    assert sorted(len(jobs) for jobs in compiled.values()) == [2, 2]
+
+
+async def test_no_workers_available(workers):
+    """Job fails, if all workers are dead."""
+    await workers(0, 2)
+    with pytest.raises(WorkerException):
+        await WorkerDispatcher.compile('scheme', [])
+
+
+async def test_local_fallback(workers, monkeypatch):
+    """Scheme is compiled in server process, if all workers are dead."""
+    await workers(0, 2)
+
+    async def compile_scheme_locally(
+            xml: str,
+            requested_artifacts: List[str],
+            on_queue_position: Any = None) -> CompilerResponse:
+        return CompilerResponse(result=f'local {xml}', state_machines={})
+
+    monkeypatch.setattr(handler,
+                        'compile_scheme_locally',
+                        compile_scheme_locally)
+    response = await handler.compile_scheme('scheme', [])
+    assert response.result == 'local scheme'
+
+
+async def test_jobs_are_queued(workers):
+    """Jobs wait for free worker slot and are rejected on full queue."""
+    await workers(1, 0, max_compile_jobs=1, max_compile_queue_size=1)
+    positions: List[int] = []
+
+    async def on_queue_position(position: int) -> None:
+        positions.append(position)
+
+    jobs = [asyncio.create_task(WorkerDispatcher.compile('first', [])),
+            asyncio.create_task(WorkerDispatcher.compile(
+                'second', [], on_queue_position))]
+    await asyncio.sleep(0)
+    with pytest.raises(CompileQueueFullException):
+        await WorkerDispatcher.compile('third', [])
+    responses = await asyncio.gather(*jobs)
+    assert [response.result for response in responses] == [
+        'first', 'second']
+    assert positions == [1]
+
+
+def test_local_workers_share_jobs(override_config):
+    """Local workers are started with their share of compile jobs."""
+    override_config(compile_workers=4, max_compile_jobs=8)
+    command = WorkerDispatcher._worker_command('unix:/tmp/worker.sock')
+    assert command[-4:] == ['--max-compile-jobs', '2',
+                            '--worker-listen', 'unix:/tmp/worker.sock']
+
+
+async def test_worker_compile_error(workers):
+    """Errors of scheme are raised with their state machines."""
+    await workers(1, 0)
+    with pytest.raises(WorkerException) as e:
+        await WorkerDispatcher.compile('invalid', [])
+    assert e.value.error_data == {'sm': 'invalid scheme'}
+
+
+async def test_job_timeout(workers):
+    """Job fails, if worker doesn't finish it in time."""
+    await workers(0, 0, hanging=1, worker_job_timeout=1)
+    with pytest.raises(WorkerException):
+        await WorkerDispatcher.compile('scheme', [])
+
+
+async def test_worker_token(workers, tmp_path: Path):
+    """Worker rejects jobs with another token."""
+    compiled = await workers(1, 0, worker_token='secret')
+    response = await WorkerDispatcher.compile('scheme', [])
+    assert response.result == 'scheme'
+    reader, writer = await open_connection(
+        f'unix:{tmp_path / "worker-0.sock"}')
+    await write_frame(writer, {'type': 'compile',
+                               'xml': 'other',
+                               'token': 'wrong'})
+    assert (await read_frame(reader))['type'] == 'error'
+    writer.close()
+    assert list(compiled.values()) == [['scheme']]
+
+
+async def test_worker_address_without_token(workers):
+    """Worker without token listens only on local addresses."""
+    await workers(0, 0)
+    assert is_loopback_address('unix:/tmp/worker.sock')
+    assert is_loopback_address('localhost:9000')
+    assert is_loopback_address('[::1]:9000')
+    assert not is_loopback_address('0.0.0.0:9000')
+    with pytest.raises(WorkerException):
+        await compile_worker.serve('0.0.0.0:0')
+
+
+@pytest.mark.parametrize('frame', [
+    pytest.param([1, 2], id='not object'),
+    pytest.param({'type': 'result', 'response': {'result': 1}},
+                 id='invalid response'),
+    pytest.param({'type': 'unknown'}, id='unknown type'),
+    pytest.param({'type': 'error', 'errors': ['error']}, id='invalid errors'),
+])
+async def test_malformed_response(workers, monkeypatch, frame: Any):
+    """Malformed worker response is raised as WorkerException."""
+    await workers(1, 0)
+
+    async def run_job(worker: Any, job: dict) -> Any:
+        return frame
+
+    monkeypatch.setattr(WorkerDispatcher, '_run_job', staticmethod(run_job))
+    with pytest.raises(WorkerException) as e:
+        await WorkerDispatcher.compile('scheme', [])
+    assert set(e.value.error_data) == {''}
@@ -0,0 +1,95 @@
+"""Module implements testing build workspaces lifecycle."""
+from pathlib import Path
+
+import pytest
+from compiler import workspace_manager
+from compiler.workspace_manager import WorkspaceManager
+
+pytest_plugins = ('pytest_asyncio',)
+
+
+@pytest.fixture
+def build_directory(tmp_path: Path, override_config):
+    """Set temporary build directory."""
+    def configure(workspace_ttl: int, build_directory_quota: int) -> None:
+        override_config(build_directory=str(tmp_path),
+                        workspace_ttl=workspace_ttl,
+                        build_directory_quota=build_directory_quota)
+
+    return configure
+
+
+async def test_unique_workspaces_removed_after_release(build_directory):
+    """Workspaces don't collide and are removed without TTL."""
+    build_directory(0, 0)
+    paths = [await WorkspaceManager.allocate() for _ in range(10)]
+    assert len(set(paths)) == 10
+    for path in paths:
+        assert Path(path).is_dir()
+        await WorkspaceManager.release(path)
+        assert not Path(path).exists()
+
+
+async def test_ttl_cleanup(build_directory):
+    """Released workspaces are kept until TTL is over."""
+    build_directory(3600, 0)
+    path = await WorkspaceManager.allocate()
+    await WorkspaceManager.release(path)
+    await WorkspaceManager.cleanup_expired()
+    assert Path(path).is_dir()
+    build_directory(0, 0)
+    await WorkspaceManager.cleanup_expired()
+    assert not Path(path).exists()
+
+
+async def test_quota_evicts_oldest(build_directory):
+    """Least recently released workspaces are evicted over quota."""
+    build_directory(3600, 1)
+    paths = []
+    for _ in range(3):
+        path = await WorkspaceManager.allocate()
+        (Path(path) / 'sketch.hex').write_bytes(b'\0' * 400 * 1024)
+        await WorkspaceManager.release(path)
+        paths.append(path)
+    assert [Path(path).exists() for path in paths] == [False, True, True]
+    # Активные рабочие директории учитываются в квоте, но не удаляются
+    active = await WorkspaceManager.allocate()
+    (Path(active) / 'sketch.elf').write_bytes(b'\0' * 1024 * 1024)
+    other = await WorkspaceManager.allocate()
+    await WorkspaceManager.release(other)
+    assert [Path(path).exists() for path in paths] == [False, False, False]
+    assert Path(active).is_dir()
+    await WorkspaceManager.release(active)
+    assert Path(active).is_dir()
+    await WorkspaceManager.stop()
+    assert not Path(active).exists()
+
+
+async def test_cleanup_stale(build_directory, tmp_path: Path):
+    """Workspaces of previous runs are removed, other files are kept."""
+    build_directory(0, 0)
+    stale = tmp_path / ('a' * 32)
+    stale.mkdir()
+    other = tmp_path / 'other'
+    other.mkdir()
+    await WorkspaceManager.cleanup_stale()
+    assert not stale.exists()
+    assert other.exists()
+
+
+async def test_memory_directory(build_directory,
+                                tmp_path: Path,
+                                monkeypatch: pytest.MonkeyPatch,
+                                override_config):
+    """Workspaces are created in memory directory while it has space."""
+    build_directory(0, 0)
+    memory_directory = tmp_path / 'memory'
+    override_config(memory_build_directory=str(memory_directory))
+    monkeypatch.setattr(workspace_manager, '_MEMORY_MIN_FREE', 0)
+    path = await WorkspaceManager.allocate()
+    assert Path(path).parent == memory_directory
+    await WorkspaceManager.release(path)
+    monkeypatch.setattr(workspace_manager, '_MEMORY_MIN_FREE', 2 ** 62)
+    path = await WorkspaceManager.allocate()
+    assert Path(path).parent == tmp_path
+    await WorkspaceManager.release(path)